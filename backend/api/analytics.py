@@ -1,15 +1,18 @@
 from fastapi import APIRouter, Depends, Query
 from typing import List, Optional
-from models.analytics import FailureAnalytics, StudyPlanResponse, OverallStats
+from models.analytics import FailureAnalytics, StudyPlanResponse, OverallStats, DailyProgress, ScorePercentile
 from services.analytics_service import AnalyticsService
-from middleware.auth import get_current_user
+from services.score_distribution_service import ScoreDistributionService
+from middleware.auth import get_current_user, require_role
+from utils.executors import analytics_executor
+from utils.db_budget import db_budget
 
 router = APIRouter(prefix="/api/analytics", tags=["analytics"])
 
 def get_analytics_service():
     return AnalyticsService()
 
-@router.get("/failures", response_model=List[FailureAnalytics])
+@router.get("/failures", response_model=List[FailureAnalytics], dependencies=[Depends(db_budget(max_calls=3))])
 async def get_failure_analytics(
     theme_id: Optional[str] = Query(None, description="Filter by theme ID"),
     top: int = Query(10, ge=1, le=50, description="Top N themes to return"),
@@ -17,10 +20,10 @@ async def get_failure_analytics(
 ):
     """Get failure analytics for current user"""
     service = get_analytics_service()
-    analytics = service.get_failure_analytics(current_user["id"], theme_id, top)
+    analytics = await analytics_executor.run(service.get_failure_analytics, current_user["id"], theme_id, top)
     return analytics
 
-@router.get("/study-plan", response_model=StudyPlanResponse)
+@router.get("/study-plan", response_model=StudyPlanResponse, dependencies=[Depends(db_budget(max_calls=5))])
 async def generate_study_plan(
     threshold: float = Query(70.0, ge=0, le=100, description="Accuracy threshold for weak themes"),
     max_themes: int = Query(10, ge=1, le=20, description="Maximum themes in study plan"),
@@ -28,14 +31,42 @@ async def generate_study_plan(
 ):
     """Generate personalized study plan based on weak areas"""
     service = get_analytics_service()
-    study_plan = service.generate_study_plan(current_user["id"], threshold, max_themes)
+    study_plan = await analytics_executor.run(service.generate_study_plan, current_user["id"], threshold, max_themes)
     return study_plan
 
-@router.get("/overall-stats", response_model=OverallStats)
+@router.get("/overall-stats", response_model=OverallStats, dependencies=[Depends(db_budget(max_calls=3))])
 async def get_overall_stats(
     current_user: dict = Depends(get_current_user)
 ):
     """Get overall statistics for current user"""
     service = get_analytics_service()
-    stats = service.get_overall_stats(current_user["id"])
+    stats = await analytics_executor.run(service.get_overall_stats, current_user["id"])
     return stats
+
+@router.get("/progress", response_model=List[DailyProgress])
+async def get_daily_progress(
+    days: int = Query(30, ge=1, le=366, description="Number of days to return, today included"),
+    theme_id: Optional[str] = Query(None, description="Filter by theme ID; totals over all themes if omitted"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get daily progress rollups for charts"""
+    service = get_analytics_service()
+    progress = await analytics_executor.run(service.get_daily_progress, current_user["id"], days, theme_id)
+    return progress
+
+@router.get("/percentile", response_model=ScorePercentile)
+async def get_score_percentile(
+    exam_type: str = Query("SIMULACRO", description="Exam type to compare against"),
+    score: Optional[float] = Query(None, ge=0, description="Score to rank; defaults to the user's latest"),
+    current_user: dict = Depends(get_current_user)
+):
+    """Get how a score compares to everyone else's for an exam type"""
+    service = ScoreDistributionService()
+    return await analytics_executor.run(service.get_percentile, current_user["id"], exam_type, score)
+
+@router.get("/cache-stats")
+async def get_cache_stats(
+    current_user: dict = Depends(require_role(["admin"]))
+):
+    """Get analytics cache hit-rate metrics (admin only)"""
+    return AnalyticsService.get_cache_stats()
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from models.user import UserCreate, UserLogin, Token, UserResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from models.user import UserCreate, UserLogin, Token, UserResponse, UserAdminUpdate
 from services.auth_service import AuthService
-from middleware.auth import get_current_user
+from middleware.auth import get_current_user, require_role, get_principal_cache_stats
+from middleware.admission import admitted, client_address
+from utils.security import PasswordPool
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
@@ -12,7 +14,7 @@ def get_auth_service():
 async def register(user_data: UserCreate):
     """Register a new user"""
     auth_service = get_auth_service()
-    user = auth_service.register(user_data)
+    user = await auth_service.register(user_data)
     return UserResponse(
         id=user.id,
         email=user.email,
@@ -23,12 +25,42 @@ async def register(user_data: UserCreate):
     )
 
 @router.post("/login", response_model=Token)
-async def login(credentials: UserLogin):
+async def login(credentials: UserLogin, request: Request):
     """Login and get access token"""
-    auth_service = get_auth_service()
-    return auth_service.login(credentials)
+    # Limited per account and client address, so failed guesses from elsewhere cannot lock a user out
+    with admitted("login", f"{credentials.email.lower()}|{client_address(request)}"):
+        auth_service = get_auth_service()
+        return await auth_service.login(credentials)
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(current_user: dict = Depends(get_current_user)):
     """Get current user information"""
-    return UserResponse(**current_user)
\ No newline at end of file
+    auth_service = get_auth_service()
+    return UserResponse(**auth_service.get_user(current_user["id"]))
+
+@router.post("/revoke")
+async def revoke_my_tokens(current_user: dict = Depends(get_current_user)):
+    """Log out everywhere by revoking all of the current user's tokens"""
+    auth_service = get_auth_service()
+    auth_service.revoke_tokens(current_user["id"])
+    return {"message": "All tokens revoked"}
+
+@router.patch("/users/{user_id}", response_model=UserResponse)
+async def update_user_access(
+    user_id: str,
+    update: UserAdminUpdate,
+    current_user: dict = Depends(require_role(["admin"]))
+):
+    """Change a user's role or active flag (admin only)"""
+    auth_service = get_auth_service()
+    return UserResponse(**auth_service.update_user_access(user_id, update))
+
+@router.get("/cache-stats")
+async def get_auth_cache_stats(current_user: dict = Depends(require_role(["admin"]))):
+    """Get verified-token cache hit-rate metrics (admin only)"""
+    return get_principal_cache_stats()
+
+@router.get("/password-pool-stats")
+async def get_password_pool_stats(current_user: dict = Depends(require_role(["admin"]))):
+    """Get bcrypt worker pool queueing and rejection metrics (admin only)"""
+    return PasswordPool.stats()
\ No newline at end of file
@@ -3,30 +3,37 @@ from typing import List
 from models.exam import ExamCreate, ExamResponse, AttemptStart, AnswerSubmit, AttemptResponse
 from services.exam_service import ExamService
 from middleware.auth import get_current_user
+from middleware.admission import admit_user
+from utils.executors import exams_executor
+from utils.db_budget import db_budget
 
 router = APIRouter(prefix="/api/exams", tags=["exams"])
 
 def get_exam_service():
     return ExamService()
 
-@router.post("/generate", status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/generate",
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(admit_user("exam_generate")), Depends(db_budget(max_calls=16))]
+)
 async def generate_exam(
     exam_data: ExamCreate,
     current_user: dict = Depends(get_current_user)
 ):
     """Generate a new exam with random questions from selected themes"""
     exam_service = get_exam_service()
-    exam = exam_service.generate_exam(exam_data, current_user["id"])
+    exam = await exams_executor.run(exam_service.generate_exam, exam_data, current_user["id"])
     return exam
 
-@router.get("/history")
+@router.get("/history", dependencies=[Depends(db_budget(max_calls=3))])
 async def get_exam_history(
     limit: int = Query(50, ge=1, le=100),
     current_user: dict = Depends(get_current_user)
 ):
     """Get user's exam history"""
     exam_service = get_exam_service()
-    history = exam_service.get_user_exam_history(current_user["id"], limit)
+    history = await exams_executor.run(exam_service.get_user_exam_history, current_user["id"], limit)
     return {"history": history, "total": len(history)}
 
 @router.get("/{exam_id}")
@@ -36,7 +43,7 @@ async def get_exam(
 ):
     """Get exam details"""
     exam_service = get_exam_service()
-    exam = exam_service.get_exam(exam_id)
+    exam = await exams_executor.run(exam_service.get_exam, exam_id)
     return exam
 
 @router.post("/start", status_code=status.HTTP_201_CREATED)
@@ -46,10 +53,10 @@ async def start_attempt(
 ):
     """Start a new exam attempt"""
     exam_service = get_exam_service()
-    attempt = exam_service.start_attempt(attempt_data.exam_id, current_user["id"])
+    attempt = await exams_executor.run(exam_service.start_attempt, attempt_data.exam_id, current_user["id"])
     return attempt
 
-@router.post("/attempts/{attempt_id}/answer")
+@router.post("/attempts/{attempt_id}/answer", dependencies=[Depends(db_budget(max_calls=3))])
 async def submit_answer(
     attempt_id: str,
     answer: AnswerSubmit,
@@ -57,17 +64,17 @@ async def submit_answer(
 ):
     """Submit an answer for a question in an attempt"""
     exam_service = get_exam_service()
-    result = exam_service.submit_answer(attempt_id, answer, current_user["id"])
+    result = await exams_executor.run(exam_service.submit_answer, attempt_id, answer, current_user["id"])
     return result
 
-@router.post("/attempts/{attempt_id}/finish")
+@router.post("/attempts/{attempt_id}/finish", dependencies=[Depends(db_budget(max_calls=16))])
 async def finish_attempt(
     attempt_id: str,
     current_user: dict = Depends(get_current_user)
 ):
     """Finish attempt and get results"""
     exam_service = get_exam_service()
-    result = exam_service.finish_attempt(attempt_id, current_user["id"])
+    result = await exams_executor.run(exam_service.finish_attempt, attempt_id, current_user["id"])
     return result
 
 @router.get("/attempts/{attempt_id}/results")
@@ -77,5 +84,5 @@ async def get_attempt_results(
 ):
     """Get attempt results"""
     exam_service = get_exam_service()
-    result = exam_service.get_attempt_results(attempt_id, current_user["id"])
+    result = await exams_executor.run(exam_service.get_attempt_results, attempt_id, current_user["id"])
     return result
\ No newline at end of file
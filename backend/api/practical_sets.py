@@ -54,11 +54,12 @@ async def get_practical_set(
 
 @router.get("/random/one", response_model=PracticalSetDetailResponse)
 async def get_random_practical_set(
+    unattempted: bool = Query(False, description="Only pick sets the user has not attempted yet"),
     current_user: dict = Depends(get_current_user)
 ):
     """Get a random practical set for exam"""
     service = get_practical_set_service()
-    practical_set = service.get_random_practical_set()
+    practical_set = service.get_random_practical_set(current_user["id"] if unattempted else None)
     return PracticalSetDetailResponse(**practical_set)
 
 @router.delete("/{practical_set_id}")
@@ -0,0 +1,84 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from middleware.auth import require_role
+from utils.profiling import SamplingProfiler, AllocationTracker
+from config.settings import settings
+
+router = APIRouter(prefix="/api/system/profiling", tags=["system"])
+
+def require_profiling(current_user: dict = Depends(require_role(["admin"]))):
+    if not settings.profiling_enabled:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profiling is disabled"
+        )
+    return current_user
+
+@router.get("/cpu", response_class=PlainTextResponse)
+async def profile_cpu(
+    seconds: float = Query(10, gt=0, le=120),
+    interval_ms: float = Query(10, ge=1, le=1000),
+    current_user: dict = Depends(require_profiling)
+):
+    """Sample every thread's stack for N seconds; returns collapsed stacks for flamegraph tools"""
+    stacks = await run_in_threadpool(SamplingProfiler.profile, seconds, interval_ms / 1000)
+    if stacks is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A profile is already running"
+        )
+    return PlainTextResponse(
+        stacks,
+        headers={"Content-Disposition": 'attachment; filename="profile.collapsed"'}
+    )
+
+@router.get("/memory")
+async def get_memory_status(current_user: dict = Depends(require_profiling)):
+    """Get tracemalloc status and stored snapshot names"""
+    return AllocationTracker.status()
+
+@router.post("/memory/start")
+async def start_memory_tracing(
+    frames: int = Query(10, ge=1, le=50),
+    current_user: dict = Depends(require_profiling)
+):
+    """Start tracemalloc (slows allocations until stopped)"""
+    AllocationTracker.start(frames)
+    return AllocationTracker.status()
+
+@router.post("/memory/stop")
+async def stop_memory_tracing(current_user: dict = Depends(require_profiling)):
+    """Stop tracemalloc and drop stored snapshots"""
+    AllocationTracker.stop()
+    return AllocationTracker.status()
+
+@router.post("/memory/snapshots/{name}")
+async def take_memory_snapshot(
+    name: str,
+    top: int = Query(25, ge=1, le=200),
+    current_user: dict = Depends(require_profiling)
+):
+    """Take a named tracemalloc snapshot and return its top allocation sites"""
+    if not AllocationTracker.status()["tracing"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="tracemalloc is not running"
+        )
+    return {"name": name, "top": await run_in_threadpool(AllocationTracker.take_snapshot, name, top)}
+
+@router.get("/memory/diff")
+async def diff_memory_snapshots(
+    base: str = Query(..., description="Name of the earlier snapshot"),
+    current: str = Query(..., description="Name of the later snapshot"),
+    top: int = Query(25, ge=1, le=200),
+    current_user: dict = Depends(require_profiling)
+):
+    """Diff two snapshots by allocation site, largest growth first"""
+    diff = await run_in_threadpool(AllocationTracker.diff, base, current, top)
+    if diff is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Snapshot not found"
+        )
+    return {"base": base, "current": current, "top": diff}
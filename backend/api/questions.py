@@ -3,12 +3,16 @@ from typing import List, Optional
 from models.question import (
     QuestionCreate,
     QuestionResponse,
+    QuestionStats,
     ListBulkQuestionsUpload,
     PracticalSetUpload,
     BulkDeleteQuestionsRequest
 )
 from services.question_service import QuestionService
 from middleware.auth import get_current_user, require_role
+from middleware.admission import admit_user
+from utils.executors import imports_executor
+from utils.db_budget import db_budget
 import json
 
 router = APIRouter(prefix="/api/questions", tags=["questions"])
@@ -48,6 +52,16 @@ async def get_question(
     question = question_service.get_question_by_id(question_id)
     return QuestionResponse(**question)
 
+@router.get("/{question_id}/stats", response_model=QuestionStats)
+async def get_question_stats(
+    question_id: str,
+    current_user: dict = Depends(require_role(["admin", "curator"]))
+):
+    """Get empirical item statistics for a question (admin/curator only)"""
+    question_service = get_question_service()
+    stats = question_service.get_question_stats(question_id)
+    return QuestionStats(**stats)
+
 @router.put("/{question_id}", response_model=QuestionResponse)
 async def update_question(
     question_id: str,
@@ -80,7 +94,10 @@ async def bulk_delete_questions(
     result = question_service.delete_questions(delete_request.question_ids)
     return {"message": "Bulk delete finished", **result}
 
-@router.post("/upload/bulk")
+@router.post(
+    "/upload/bulk",
+    dependencies=[Depends(admit_user("bulk_upload")), Depends(db_budget(max_calls=50))]
+)
 async def upload_bulk_questions(
     file: UploadFile = File(...),
     current_user: dict = Depends(require_role(["admin", "curator"]))
@@ -92,7 +109,7 @@ async def upload_bulk_questions(
         
         upload_data = ListBulkQuestionsUpload(**data)
         question_service = get_question_service()
-        result = question_service.upload_bulk_questions(upload_data.uploads, current_user["id"])
+        result = await imports_executor.run(question_service.upload_bulk_questions, upload_data.uploads, current_user["id"])
         
         return result
     except json.JSONDecodeError:
@@ -118,7 +135,7 @@ async def upload_practical_set(
         
         upload_data = PracticalSetUpload(**data)
         question_service = get_question_service()
-        result = question_service.upload_practical_set(upload_data, current_user["id"])
+        result = await imports_executor.run(question_service.upload_practical_set, upload_data, current_user["id"])
         
         return result
     except json.JSONDecodeError:
@@ -0,0 +1,76 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Optional
+from middleware.auth import require_role
+from config.settings import settings
+from middleware.admission import AdmissionController
+from utils.executors import get_executor_stats
+from utils.slow_queries import slow_query_log
+from utils.db_budget import BudgetViolations
+from utils.tracing import TraceExporter
+from utils.loop_monitor import LoopLagMonitor
+
+router = APIRouter(prefix="/api/system", tags=["system"])
+
+@router.get("/admission")
+async def get_admission_stats(current_user: dict = Depends(require_role(["admin"]))):
+    """Get admission control counters per route class (admin only)"""
+    return AdmissionController.stats()
+
+@router.get("/executors")
+async def get_executor_metrics(current_user: dict = Depends(require_role(["admin"]))):
+    """Get queue depth and wait times of the per-area service executors (admin only)"""
+    return get_executor_stats()
+
+@router.get("/slow-queries")
+async def get_slow_queries(
+    top: int = Query(20, ge=1, le=200),
+    current_user: dict = Depends(require_role(["admin"]))
+):
+    """Get the slow Mongo query shapes that cost the most total time (admin only)"""
+    return {"threshold_ms": settings.slow_query_threshold_ms, "shapes": slow_query_log.worst_shapes(top)}
+
+@router.delete("/slow-queries")
+async def reset_slow_queries(current_user: dict = Depends(require_role(["admin"]))):
+    """Clear the slow query report (admin only)"""
+    slow_query_log.reset()
+    return {"message": "Slow query report cleared"}
+
+@router.get("/db-budget")
+async def get_db_budget_violations(current_user: dict = Depends(require_role(["admin"]))):
+    """Get requests that exceeded their route's DB budget (admin only)"""
+    return BudgetViolations.report()
+
+@router.delete("/db-budget")
+async def reset_db_budget_violations(current_user: dict = Depends(require_role(["admin"]))):
+    """Clear recorded DB budget violations (admin only)"""
+    BudgetViolations.reset()
+    return {"message": "DB budget violations cleared"}
+
+@router.get("/traces")
+async def get_recent_traces(
+    limit: int = Query(50, ge=1, le=500),
+    route: Optional[str] = Query(None, description="Route template, e.g. /api/exams/attempts/{attempt_id}/finish"),
+    current_user: dict = Depends(require_role(["admin"]))
+):
+    """List recently traced requests (admin only)"""
+    return {
+        "mode": settings.tracing_mode,
+        "dropped": TraceExporter.dropped,
+        "traces": TraceExporter.recent(limit, route)
+    }
+
+@router.get("/traces/{trace_id}")
+async def get_trace(trace_id: str, current_user: dict = Depends(require_role(["admin"]))):
+    """Get one trace with its spans (admin only)"""
+    trace = TraceExporter.get(trace_id)
+    if trace is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Trace not found"
+        )
+    return trace
+
+@router.get("/loop-lag")
+async def get_loop_lag(current_user: dict = Depends(require_role(["admin"]))):
+    """Get this worker's event loop lag (admin only)"""
+    return LoopLagMonitor.stats()
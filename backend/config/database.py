@@ -1,6 +1,12 @@
 from pymongo import MongoClient, ASCENDING, DESCENDING
 from pymongo.database import Database as PyMongoDatabase
 from config.settings import settings
+from utils.metrics import mongo_command_metrics
+from utils.slow_queries import slow_query_log
+from utils.db_budget import db_usage_counter
+from utils.tracing import tracing_command_listener
+from utils.pool_monitor import pool_monitor
+import time
 import logging
 
 logger = logging.getLogger(__name__)
@@ -8,28 +14,84 @@ logger = logging.getLogger(__name__)
 class Database:
     client: MongoClient
     db: PyMongoDatabase
+    # Separate single-connection client whose timeouts are bounded by the readiness deadline
+    ping_client: MongoClient
 
 def get_database():
     return Database.db
 
+def ping_mongo() -> float:
+    """Round-trip time of a ping to the server, in seconds"""
+    started = time.perf_counter()
+    Database.ping_client.admin.command("ping", maxTimeMS=settings.ready_ping_timeout_ms)
+    return time.perf_counter() - started
+
+def get_pool_stats() -> dict:
+    return pool_monitor.stats(Database.client.options.pool_options.max_pool_size)
+
 def connect_to_mongo():
     try:
-        Database.client = MongoClient(settings.mongo_url)
+        listeners = [mongo_command_metrics, slow_query_log, pool_monitor]
+        if settings.db_budget_mode != "off":
+            listeners.append(db_usage_counter)
+        if settings.tracing_mode != "off":
+            listeners.append(tracing_command_listener)
+        Database.client = MongoClient(settings.mongo_url, event_listeners=listeners)
         Database.db = Database.client.get_database(name=settings.mongo_db_name)
+        Database.ping_client = MongoClient(
+            settings.mongo_url,
+            maxPoolSize=1,
+            serverSelectionTimeoutMS=settings.ready_ping_timeout_ms,
+            connectTimeoutMS=settings.ready_ping_timeout_ms,
+            socketTimeoutMS=settings.ready_ping_timeout_ms
+        )
         
         # Create indexes
         Database.db.users.create_index([("email", ASCENDING)], unique=True)
+        Database.db.users.create_index([("id", ASCENDING)], unique=True)
+        Database.db.token_revocations.create_index([("user_id", ASCENDING)], unique=True)
+        Database.db.token_revocations.create_index([("updated_at", ASCENDING)])
         Database.db.themes.create_index([("code", ASCENDING)], unique=True)
+        Database.db.themes.create_index([("id", ASCENDING)], unique=True)
         Database.db.questions.create_index([("theme_id", ASCENDING)])
+        Database.db.questions.create_index([("id", ASCENDING)], unique=True)
         Database.db.questions.create_index([("created_at", DESCENDING)])
         Database.db.attempts.create_index([("user_id", ASCENDING)])
         Database.db.attempts.create_index([("exam_id", ASCENDING)])
+        Database.db.attempts.create_index([("user_id", ASCENDING), ("finished_at", DESCENDING)])
+        Database.db.attempts.create_index([("finished_at", ASCENDING)])
+        Database.db.attempts.create_index(
+            [("finished_at", ASCENDING), ("abandoned_at", ASCENDING), ("started_at", ASCENDING)]
+        )
+        Database.db.exams.create_index([("id", ASCENDING)], unique=True)
+        Database.db.exams.create_index([("created_at", ASCENDING), ("id", ASCENDING)])
         Database.db.practical_sets.create_index([("created_at", DESCENDING)])
         Database.db.practical_sets.create_index([("is_active", ASCENDING)])
-        Database.db.analytics_failures.create_index([("user_id", ASCENDING)])
-        Database.db.analytics_failures.create_index([("theme_id", ASCENDING)])
-        Database.db.analytics_failures.create_index([("failed_at", DESCENDING)])
+        Database.db.practical_sets.create_index([("id", ASCENDING)], unique=True)
+        Database.db.attempts.create_index([("user_id", ASCENDING), ("practical_set_id", ASCENDING)])
+        Database.db.failure_buckets.create_index(
+            [("user_id", ASCENDING), ("theme_id", ASCENDING), ("month", ASCENDING)], unique=True
+        )
+        Database.db.failure_buckets.create_index([("month", ASCENDING)])
         Database.db.user_theme_stats.create_index([("user_id", ASCENDING), ("theme_id", ASCENDING)], unique=True)
+        Database.db.user_daily_progress.create_index(
+            [("user_id", ASCENDING), ("theme_id", ASCENDING), ("day", ASCENDING)], unique=True
+        )
+        Database.db.user_summary.create_index([("user_id", ASCENDING)], unique=True)
+        Database.db.user_question_history.create_index([("user_id", ASCENDING), ("theme_id", ASCENDING)])
+        Database.db.user_question_history.create_index(
+            [("user_id", ASCENDING), ("question_id", ASCENDING)], unique=True
+        )
+        Database.db.user_question_history.create_index(
+            [("user_id", ASCENDING), ("theme_id", ASCENDING), ("box", ASCENDING), ("next_due", ASCENDING)]
+        )
+        Database.db.user_question_history_packed.create_index(
+            [("user_id", ASCENDING), ("theme_id", ASCENDING)], unique=True
+        )
+        Database.db.question_index.create_index([("theme_id", ASCENDING)], unique=True)
+        Database.db.question_stats.create_index([("question_id", ASCENDING)], unique=True)
+        Database.db.job_state.create_index([("job", ASCENDING)], unique=True)
+        Database.db.score_distributions.create_index([("exam_type", ASCENDING)], unique=True)
         
         logger.info("Connected to MongoDB successfully")
     except Exception as e:
@@ -39,4 +101,5 @@ def connect_to_mongo():
 def close_mongo_connection():
     if Database.client:
         Database.client.close()
+        Database.ping_client.close()
         logger.info("Closed MongoDB connection")
\ No newline at end of file
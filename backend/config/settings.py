@@ -7,6 +7,67 @@ class Settings(BaseSettings):
     jwt_algorithm: str = "HS256"
     jwt_access_token_expire_minutes: int = 43200
     mongo_db_name: str
+    analytics_cache_ttl_seconds: int = 300
+    analytics_cache_max_entries: int = 20000
+    score_distribution_flush_seconds: int = 30
+    score_latest_cache_max_entries: int = 20000
+    failure_retention_months: int = 12
+    question_history_mode: str = "legacy"  # legacy, dual or packed
+    attempt_archive_dir: str = "archive/attempts"
+    attempt_archive_after_days: int = 180
+    auth_revocation_sync_seconds: int = 5
+    auth_revocation_overlap_seconds: int = 60  # Re-read window for late-committing changes
+    auth_revocation_full_resync_seconds: int = 300
+    auth_principal_cache_ttl_seconds: int = 300
+    auth_principal_cache_max_entries: int = 50000
+    password_pool_workers: int = 2
+    password_pool_max_queue: int = 64
+    bcrypt_rounds: int = 0  # 0 calibrates at startup against bcrypt_target_ms
+    bcrypt_target_ms: int = 250
+    bcrypt_min_rounds: int = 12  # passlib default before calibration; never hash weaker
+    bcrypt_max_rounds: int = 14
+    analytics_executor_workers: int = 4
+    imports_executor_workers: int = 1
+    exams_executor_workers: int = 16
+    slow_query_threshold_ms: float = 100.0
+    slow_query_max_shapes: int = 500
+    db_budget_mode: str = "off"  # off, dev (headers + warnings) or test (headers + 500 when over budget)
+    tracing_mode: str = "off"  # off, memory or file
+    tracing_sample_rate: float = 1.0
+    tracing_buffer_size: int = 200
+    tracing_file_path: str = "traces.jsonl"
+    tracing_file_queue_size: int = 1000
+    profiling_enabled: bool = False
+    ready_ping_timeout_ms: int = 1000
+    ready_max_ping_ms: float = 250.0
+    ready_max_pool_utilization: float = 0.95
+    ready_max_loop_lag_ms: float = 500.0
+    loop_monitor_enabled: bool = True
+    loop_lag_interval_ms: int = 100
+    loop_lag_threshold_ms: int = 250  # Log the blocking stack beyond this
+    admission_enabled: bool = True
+    admission_max_tracked_clients: int = 50000
+    admission_trust_forwarded_for: bool = True  # only behind a load balancer that appends X-Forwarded-For
+    admission_login_rate: float = 20.0  # tokens per second
+    admission_login_burst: float = 60.0
+    admission_login_per_account_rate: float = 0.2
+    admission_login_per_account_burst: float = 5.0
+    admission_login_concurrency: int = 16
+    admission_exam_generate_rate: float = 10.0
+    admission_exam_generate_burst: float = 30.0
+    admission_exam_generate_per_user_rate: float = 0.2
+    admission_exam_generate_per_user_burst: float = 3.0
+    admission_exam_generate_concurrency: int = 4
+    admission_bulk_upload_rate: float = 0.2
+    admission_bulk_upload_burst: float = 2.0
+    admission_bulk_upload_per_user_rate: float = 0.05
+    admission_bulk_upload_per_user_burst: float = 1.0
+    admission_bulk_upload_concurrency: int = 1
+    janitor_interval_minutes: int = 0  # 0 disables the in-process schedule
+    janitor_abandoned_after_hours: int = 24
+    janitor_orphan_exam_after_hours: int = 24
+    janitor_batch_size: int = 500
+    janitor_batch_pause_seconds: float = 0.5
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,69 @@
+"""
+Move finished attempts older than N days to compressed NDJSON segments on local disk.
+
+The attempt document stays in Mongo as a slim stub (score, dates, details counters,
+exam name and type) with an `archive` pointer to its segment offset;
+ExamService.get_attempt_results rehydrates it transparently.
+
+Usage (from backend/):
+    python -m jobs.archive_attempts [--days N] [--batch-size 1000]
+"""
+from config.database import connect_to_mongo, close_mongo_connection
+from config.settings import settings
+from repositories.exam_repository import ExamRepository
+from repositories.attempt_archive_repository import AttemptArchiveRepository
+from datetime import datetime, timedelta, timezone
+import argparse
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def archive_attempts(days: int, batch_size: int = 1000) -> int:
+    exam_repo = ExamRepository()
+    archive_repo = AttemptArchiveRepository()
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    
+    archived = 0
+    while True:
+        attempts = exam_repo.get_archivable_attempts(cutoff, batch_size)
+        if not attempts:
+            return archived
+        
+        exams = exam_repo.get_exam_summaries(list({a["exam_id"] for a in attempts}))
+        # The segment is durable on disk before any attempt is slimmed down
+        _, locations = archive_repo.write_segment(attempts)
+        
+        stubs = []
+        for attempt, location in zip(attempts, locations):
+            exam = exams.get(attempt["exam_id"], {})
+            stubs.append({
+                "id": attempt["id"],
+                "archive": location,
+                "exam_name": exam.get("name"),
+                "exam_type": exam.get("type")
+            })
+        exam_repo.mark_archived(stubs)
+        
+        archived += len(attempts)
+        logger.info(f"Archived {archived} attempts...")
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive old finished attempts to cold storage")
+    parser.add_argument("--days", type=int, default=settings.attempt_archive_after_days,
+                        help="Archive attempts finished more than this many days ago")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Attempts per segment file")
+    args = parser.parse_args()
+    
+    connect_to_mongo()
+    try:
+        archived = archive_attempts(args.days, args.batch_size)
+        logger.info(f"Archived {archived} attempts older than {args.days} days")
+    finally:
+        close_mongo_connection()
+
+if __name__ == "__main__":
+    main()
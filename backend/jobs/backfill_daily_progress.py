@@ -0,0 +1,93 @@
+"""
+Build user_daily_progress rollups from existing finished attempts.
+
+Rollups for the backfilled window are deleted first, so the job can be re-run.
+Archived attempts no longer carry their per-question results, so those are read
+back from their archive segments; the job refuses to start if any segment in the
+window is missing. Run it while no attempts are being finished in that window,
+or live finishes may be counted twice.
+
+Usage (from backend/):
+    python -m jobs.backfill_daily_progress [--since YYYY-MM-DD] [--batch-size 500]
+"""
+from config.database import connect_to_mongo, close_mongo_connection, get_database
+from repositories.analytics_repository import AnalyticsRepository
+from repositories.attempt_archive_repository import AttemptArchiveRepository
+from services.analytics_service import AnalyticsService
+from datetime import datetime
+from typing import Optional
+import argparse
+import os
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def backfill_daily_progress(since: Optional[datetime] = None, batch_size: int = 500) -> int:
+    db = get_database()
+    analytics_repo = AnalyticsRepository()
+    
+    rollup_query = {}
+    attempt_query = {"finished_at": {"$ne": None}}
+    if since:
+        rollup_query["day"] = {"$gte": analytics_repo.day_bucket(since)}
+        attempt_query["finished_at"] = {"$gte": analytics_repo.day_bucket(since)}
+    
+    archive_repo = AttemptArchiveRepository()
+    segments = db.attempts.distinct("archive.segment", {**attempt_query, "archive": {"$ne": None}})
+    missing = [seg for seg in segments if not os.path.exists(os.path.join(archive_repo.archive_dir, seg))]
+    if missing:
+        # Deleting first would drop these attempts' rollups without rebuilding them
+        raise RuntimeError(f"Archive segments missing from {archive_repo.archive_dir}: {', '.join(missing)}")
+    
+    deleted = analytics_repo.daily_collection.delete_many(rollup_query).deleted_count
+    logger.info(f"Deleted {deleted} existing rollups")
+    
+    cursor = db.attempts.find(
+        attempt_query,
+        {"_id": 0, "user_id": 1, "finished_at": 1, "archive": 1,
+         "details.results.theme_id": 1, "details.results.status": 1}
+    ).batch_size(batch_size)
+    
+    processed = 0
+    operations = []
+    for attempt in cursor:
+        if attempt.get("archive"):
+            attempt = {**attempt, "details": archive_repo.read(attempt["archive"]).get("details")}
+        results = (attempt.get("details") or {}).get("results") or []
+        theme_stats = AnalyticsService.count_results_by_theme(results)
+        operations.extend(
+            analytics_repo.daily_progress_updates(attempt["user_id"], attempt["finished_at"], theme_stats)
+        )
+        processed += 1
+        
+        if processed % batch_size == 0:
+            if operations:
+                analytics_repo.daily_collection.bulk_write(operations, ordered=False)
+                operations = []
+            logger.info(f"Processed {processed} attempts...")
+    
+    if operations:
+        analytics_repo.daily_collection.bulk_write(operations, ordered=False)
+    
+    return processed
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill daily progress rollups from attempts")
+    parser.add_argument("--since", type=datetime.fromisoformat,
+                        help="Only rebuild days from this date (YYYY-MM-DD) onwards")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    
+    connect_to_mongo()
+    try:
+        processed = backfill_daily_progress(args.since, args.batch_size)
+        logger.info(f"Backfilled daily progress from {processed} attempts")
+    finally:
+        close_mongo_connection()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Close abandoned attempts and delete exams that no attempt references.
+
+Thresholds, batch size and the pause between batches come from the JANITOR_* settings.
+Schedule it with cron, or set JANITOR_INTERVAL_MINUTES to run it inside the API process.
+
+Usage (from backend/):
+    python -m jobs.cleanup_abandoned [--delete-all]
+"""
+from config.database import connect_to_mongo, close_mongo_connection
+from services.janitor_service import JanitorService
+import argparse
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description="Clean up abandoned attempts and orphan exams")
+    parser.add_argument("--delete-all", action="store_true",
+                        help="Delete abandoned attempts even if they have answers, instead of finalizing them")
+    args = parser.parse_args()
+    
+    connect_to_mongo()
+    try:
+        JanitorService().run(delete_all_abandoned=args.delete_all)
+    finally:
+        close_mongo_connection()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Apply the failure retention policy: monthly failure buckets older than N months lose
+their per-failure arrays and are folded into one counters-only document per user and theme.
+
+Usage (from backend/):
+    python -m jobs.compact_failure_buckets [--months N]
+"""
+from config.database import connect_to_mongo, close_mongo_connection
+from config.settings import settings
+from repositories.analytics_repository import AnalyticsRepository
+from datetime import datetime, timezone
+import argparse
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def retention_cutoff(months: int) -> datetime:
+    """First day of the oldest month that is kept in full"""
+    current = AnalyticsRepository.month_bucket(datetime.now(timezone.utc))
+    total_months = current.year * 12 + (current.month - 1) - months
+    return current.replace(year=total_months // 12, month=total_months % 12 + 1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact failure buckets past the retention window")
+    parser.add_argument("--months", type=int, default=settings.failure_retention_months,
+                        help="Months of detailed failures to keep")
+    args = parser.parse_args()
+    
+    connect_to_mongo()
+    try:
+        cutoff = retention_cutoff(args.months)
+        compacted = AnalyticsRepository().compact_failure_buckets(cutoff)
+        logger.info(f"Compacted {compacted} failure buckets older than {cutoff:%Y-%m}")
+    finally:
+        close_mongo_connection()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Incrementally compute empirical item statistics per question from finished attempts.
+
+For every question it keeps, in question_stats:
+- exposure_count: times it appeared in a finished attempt
+- p_value: proportion of exposures answered correctly
+- discrimination: point-biserial correlation between answering it correctly and the
+  attempt's proportion correct (uncorrected: the item itself is part of that total)
+- choice_counts: how often each choice index was selected ("unanswered" for blanks)
+
+Only attempts finished after the last watermark are read. Sufficient statistics are
+$inc-merged so runs compose, then derived fields are recomputed for touched questions.
+
+Usage (from backend/):
+    python -m jobs.compute_question_stats [--batch-size 1000]
+"""
+from config.database import connect_to_mongo, close_mongo_connection, get_database
+from repositories.job_state_repository import JobStateRepository
+from repositories.question_stats_repository import QuestionStatsRepository
+from datetime import datetime, timezone
+from typing import Dict, List, Set
+import numpy as np
+import argparse
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+JOB_NAME = "question_stats"
+UNANSWERED_CODE = -1
+
+def _batch_increments(attempts: List[dict]) -> Dict[str, dict]:
+    """Aggregate a batch of attempts into per-question $inc documents"""
+    question_ids = []
+    correct = []
+    totals = []
+    selected = []
+    
+    for attempt in attempts:
+        details = attempt.get("details") or {}
+        results = details.get("results") or []
+        if not results:
+            continue
+        total = details.get("correct", 0) / len(results)
+        for result in results:
+            question_ids.append(result["question_id"])
+            correct.append(1.0 if result.get("status") == "correct" else 0.0)
+            totals.append(total)
+            answer = result.get("selected_answer")
+            selected.append(UNANSWERED_CODE if answer is None else int(answer))
+    
+    if not question_ids:
+        return {}
+    
+    unique_ids, inverse = np.unique(np.array(question_ids, dtype=object), return_inverse=True)
+    correct_arr = np.array(correct)
+    totals_arr = np.array(totals)
+    
+    n = np.bincount(inverse)
+    n_correct = np.bincount(inverse, weights=correct_arr)
+    total_score = np.bincount(inverse, weights=totals_arr)
+    total_score_sq = np.bincount(inverse, weights=totals_arr ** 2)
+    correct_score = np.bincount(inverse, weights=correct_arr * totals_arr)
+    
+    increments = {
+        question_id: {
+            "sums.n": int(n[i]),
+            "sums.n_correct": int(n_correct[i]),
+            "sums.total_score": float(total_score[i]),
+            "sums.total_score_sq": float(total_score_sq[i]),
+            "sums.correct_score": float(correct_score[i])
+        }
+        for i, question_id in enumerate(unique_ids)
+    }
+    
+    pairs, pair_counts = np.unique(
+        np.stack([inverse, np.array(selected)]), axis=1, return_counts=True
+    )
+    for (question_index, choice), count in zip(pairs.T, pair_counts):
+        key = "unanswered" if choice == UNANSWERED_CODE else str(choice)
+        increments[unique_ids[question_index]][f"choice_counts.{key}"] = int(count)
+    
+    return increments
+
+def _derive_stats(sums_docs: List[dict]) -> Dict[str, dict]:
+    """Vectorized p-value and point-biserial discrimination from sufficient statistics"""
+    if not sums_docs:
+        return {}
+    
+    sums = [doc["sums"] for doc in sums_docs]
+    n = np.array([s["n"] for s in sums], dtype=float)
+    n1 = np.array([s["n_correct"] for s in sums], dtype=float)
+    total = np.array([s["total_score"] for s in sums])
+    total_sq = np.array([s["total_score_sq"] for s in sums])
+    correct_total = np.array([s["correct_score"] for s in sums])
+    n0 = n - n1
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        p = n1 / n
+        sd = np.sqrt(np.maximum(total_sq / n - (total / n) ** 2, 0.0))
+        mean_correct = correct_total / n1
+        mean_incorrect = (total - correct_total) / n0
+        discrimination = (mean_correct - mean_incorrect) / sd * np.sqrt(p * (1 - p))
+    
+    discrimination[(n1 == 0) | (n0 == 0) | (sd == 0)] = np.nan
+    updated_at = datetime.utcnow()
+    
+    return {
+        doc["question_id"]: {
+            "exposure_count": int(n[i]),
+            "p_value": round(float(p[i]), 4),
+            "discrimination": None if np.isnan(discrimination[i]) else round(float(discrimination[i]), 4),
+            "updated_at": updated_at
+        }
+        for i, doc in enumerate(sums_docs)
+    }
+
+def compute_question_stats(batch_size: int = 1000) -> int:
+    job_state = JobStateRepository()
+    stats_repo = QuestionStatsRepository()
+    
+    watermark = job_state.get_watermark(JOB_NAME)
+    # Attempts finishing while the job runs are left for the next run
+    cutoff = datetime.now(timezone.utc)
+    finished_range = {"$lte": cutoff}
+    if watermark:
+        finished_range["$gt"] = watermark
+    
+    cursor = get_database().attempts.find(
+        {"finished_at": finished_range},
+        {"_id": 0, "finished_at": 1, "details.correct": 1,
+         "details.results.question_id": 1, "details.results.status": 1,
+         "details.results.selected_answer": 1}
+    ).sort("finished_at", 1).batch_size(batch_size)
+    
+    processed = 0
+    touched: Set[str] = set()
+    batch = []
+    
+    def flush_batch():
+        increments = _batch_increments(batch)
+        stats_repo.add_sums(increments)
+        touched.update(increments)
+        job_state.set_watermark(JOB_NAME, batch[-1]["finished_at"])
+    
+    for attempt in cursor:
+        batch.append(attempt)
+        if len(batch) >= batch_size:
+            flush_batch()
+            processed += len(batch)
+            batch = []
+            logger.info(f"Processed {processed} attempts...")
+    
+    if batch:
+        flush_batch()
+        processed += len(batch)
+    
+    touched_ids = sorted(touched)
+    for start in range(0, len(touched_ids), batch_size):
+        chunk = touched_ids[start:start + batch_size]
+        stats_repo.set_derived(_derive_stats(stats_repo.get_sums(chunk)))
+    
+    logger.info(f"Updated stats for {len(touched_ids)} questions")
+    return processed
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute per-question item statistics")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    
+    connect_to_mongo()
+    try:
+        processed = compute_question_stats(args.batch_size)
+        logger.info(f"Processed {processed} attempts since last watermark")
+    finally:
+        close_mongo_connection()
+
+if __name__ == "__main__":
+    main()
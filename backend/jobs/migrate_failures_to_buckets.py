@@ -0,0 +1,73 @@
+"""
+Move per-failure documents from analytics_failures into monthly failure_buckets.
+
+Each batch is appended to its buckets and then deleted from the source, so an
+interrupted run can simply be started again. The source collection is dropped
+once it is empty.
+
+Usage (from backend/):
+    python -m jobs.migrate_failures_to_buckets [--batch-size 5000]
+"""
+from config.database import connect_to_mongo, close_mongo_connection, get_database
+from repositories.analytics_repository import AnalyticsRepository
+from models.analytics import FailureRecord
+import argparse
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SOURCE_COLLECTION = "analytics_failures"
+
+def collection_footprint(name: str) -> dict:
+    db = get_database()
+    if name not in db.list_collection_names():
+        return {"count": 0, "size": 0, "index_size": 0}
+    stats = db.command("collStats", name)
+    return {"count": stats["count"], "size": stats["size"], "index_size": stats["totalIndexSize"]}
+
+def migrate_failures_to_buckets(batch_size: int = 5000) -> int:
+    source = get_database()[SOURCE_COLLECTION]
+    analytics_repo = AnalyticsRepository()
+    
+    migrated = 0
+    while True:
+        docs = list(source.find({}).sort("failed_at", 1).limit(batch_size))
+        if not docs:
+            break
+        
+        failures = [
+            FailureRecord(**{key: value for key, value in doc.items() if key != "_id"})
+            for doc in docs
+        ]
+        operations = analytics_repo.failure_bucket_updates(failures)
+        analytics_repo.failures_collection.bulk_write(operations, ordered=False)
+        source.delete_many({"_id": {"$in": [doc["_id"] for doc in docs]}})
+        
+        migrated += len(docs)
+        logger.info(f"Migrated {migrated} failures...")
+    
+    source.drop()
+    return migrated
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate failure records into monthly buckets")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+    
+    connect_to_mongo()
+    try:
+        before = collection_footprint(SOURCE_COLLECTION)
+        migrated = migrate_failures_to_buckets(args.batch_size)
+        after = collection_footprint(AnalyticsRepository().failures_collection.name)
+        logger.info(f"Migrated {migrated} failures")
+        logger.info(f"Before ({SOURCE_COLLECTION}): {before}")
+        logger.info(f"After (buckets): {after}")
+    finally:
+        close_mongo_connection()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Convert legacy user_question_history documents into packed per-theme documents.
+
+Migration path:
+1. Set QUESTION_HISTORY_MODE=dual: new answers are written to both layouts, and
+   reads use packed documents, falling back to legacy ones per theme.
+2. Run this job; it rebuilds each (user, theme) packed document from legacy data
+   and marks it converted. Until then dual mode reads that theme from legacy documents,
+   even if packed writes already exist for it.
+3. Set QUESTION_HISTORY_MODE=packed once it has completed.
+
+Usage (from backend/):
+    python -m jobs.pack_question_history [--user-id USER_ID] [--batch-size 2000]
+"""
+from config.database import connect_to_mongo, close_mongo_connection, get_database
+from repositories.packed_history_repository import PackedHistoryRepository, to_epoch
+from models.user_progress import OutcomeType, PackedThemeHistory, OUTCOME_CODES
+from itertools import groupby
+from typing import List, Optional
+import argparse
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+MAX_GROUP_RETRIES = 5
+
+def _build_packed(packed_repo: PackedHistoryRepository, user_id: str, theme_id: str,
+                  legacy_docs: List[dict]) -> dict:
+    positions = packed_repo.question_index.get_positions(
+        theme_id, [doc["question_id"] for doc in legacy_docs]
+    )
+    packed = PackedThemeHistory(user_id=user_id, theme_id=theme_id, converted=True).model_dump()
+    for doc in legacy_docs:
+        last_seen = to_epoch(doc["last_seen"])
+        packed["q"].append(positions[doc["question_id"]])
+        packed["o"].append(OUTCOME_CODES[OutcomeType(doc["outcome"])])
+        packed["t"].append(last_seen)
+        packed["n"].append(doc.get("times_answered", 1))
+        packed["b"].append(doc.get("box", 1))
+        # Records from before scheduling are due right away
+        packed["d"].append(to_epoch(doc["next_due"]) if doc.get("next_due") else last_seen)
+    return packed
+
+def _pack_group(packed_repo: PackedHistoryRepository, user_id: str, theme_id: str,
+                legacy_docs: List[dict]) -> None:
+    legacy_collection = get_database().user_question_history
+    for attempt in range(MAX_GROUP_RETRIES):
+        if attempt:
+            # A dual write landed meanwhile; start again from fresh legacy data
+            legacy_docs = list(legacy_collection.find(
+                {"user_id": user_id, "theme_id": theme_id}, {"_id": 0}
+            ))
+        existing = packed_repo.get_theme_docs(user_id, [theme_id]).get(theme_id)
+        expected_version = existing["v"] if existing else 0
+        packed = _build_packed(packed_repo, user_id, theme_id, legacy_docs)
+        if packed_repo.replace_theme_history(user_id, theme_id, packed, expected_version):
+            return
+    raise RuntimeError(f"Could not pack history of user {user_id} on theme {theme_id}")
+
+def pack_question_history(user_id: Optional[str] = None, batch_size: int = 2000) -> int:
+    packed_repo = PackedHistoryRepository()
+    query = {"user_id": user_id} if user_id else {}
+    
+    cursor = get_database().user_question_history.find(query, {"_id": 0}) \
+        .sort([("user_id", 1), ("theme_id", 1)]) \
+        .batch_size(batch_size)
+    
+    packed_groups = 0
+    for (group_user_id, theme_id), docs in groupby(cursor, key=lambda d: (d["user_id"], d["theme_id"])):
+        _pack_group(packed_repo, group_user_id, theme_id, list(docs))
+        packed_groups += 1
+        if packed_groups % 1000 == 0:
+            logger.info(f"Packed {packed_groups} user/theme histories...")
+    
+    return packed_groups
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack legacy question history per user and theme")
+    parser.add_argument("--user-id", help="Only convert this user's history")
+    parser.add_argument("--batch-size", type=int, default=2000)
+    args = parser.parse_args()
+    
+    connect_to_mongo()
+    try:
+        packed = pack_question_history(args.user_id, args.batch_size)
+        logger.info(f"Packed {packed} user/theme histories")
+    finally:
+        close_mongo_connection()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Recompute the persisted score distribution of every exam type from finished attempts.
+
+Usage (from backend/):
+    python -m jobs.rebuild_score_distributions [--batch-size 1000]
+"""
+from config.database import connect_to_mongo, close_mongo_connection, get_database
+from repositories.score_distribution_repository import ScoreDistributionRepository
+from services.score_distribution_service import SCORE_BIN_WIDTH
+from utils.score_histogram import ScoreHistogram
+from typing import Dict
+import argparse
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def rebuild_score_distributions(batch_size: int = 1000) -> Dict[str, int]:
+    histograms: Dict[str, ScoreHistogram] = {}
+    
+    cursor = get_database().attempts.find(
+        {"finished_at": {"$ne": None}, "score": {"$ne": None}},
+        {"_id": 0, "score": 1, "details.exam_type": 1, "details.scale": 1}
+    ).batch_size(batch_size)
+    
+    for attempt in cursor:
+        details = attempt.get("details") or {}
+        exam_type = details.get("exam_type")
+        if not exam_type:
+            continue
+        if exam_type not in histograms:
+            histograms[exam_type] = ScoreHistogram(details.get("scale", 100), SCORE_BIN_WIDTH)
+        histograms[exam_type].add(attempt["score"])
+    
+    distribution_repo = ScoreDistributionRepository()
+    for exam_type, histogram in histograms.items():
+        counts = {i: count for i, count in enumerate(histogram.counts) if count}
+        distribution_repo.replace(exam_type, histogram.scale, SCORE_BIN_WIDTH, counts)
+    
+    return {exam_type: histogram.total for exam_type, histogram in histograms.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild score distributions from attempts")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    
+    connect_to_mongo()
+    try:
+        totals = rebuild_score_distributions(args.batch_size)
+        logger.info(f"Rebuilt score distributions: {totals}")
+    finally:
+        close_mongo_connection()
+
+if __name__ == "__main__":
+    main()
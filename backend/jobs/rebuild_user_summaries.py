@@ -0,0 +1,46 @@
+"""
+Recompute user_summary documents from attempts and theme stats.
+
+Usage (from backend/):
+    python -m jobs.rebuild_user_summaries [--user-id USER_ID]
+"""
+from config.database import connect_to_mongo, close_mongo_connection, get_database
+from repositories.analytics_repository import AnalyticsRepository
+import argparse
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def rebuild_user_summaries(user_id: str = None) -> int:
+    analytics_repo = AnalyticsRepository()
+    
+    if user_id:
+        analytics_repo.rebuild_user_summary(user_id)
+        return 1
+    
+    rebuilt = 0
+    for user in get_database().users.find({}, {"_id": 0, "id": 1}):
+        analytics_repo.rebuild_user_summary(user["id"])
+        rebuilt += 1
+        if rebuilt % 500 == 0:
+            logger.info(f"Rebuilt {rebuilt} user summaries...")
+    return rebuilt
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild materialized user summaries from history")
+    parser.add_argument("--user-id", help="Only rebuild this user's summary")
+    args = parser.parse_args()
+    
+    connect_to_mongo()
+    try:
+        rebuilt = rebuild_user_summaries(args.user_id)
+        logger.info(f"Rebuilt {rebuilt} user summaries")
+    finally:
+        close_mongo_connection()
+
+if __name__ == "__main__":
+    main()
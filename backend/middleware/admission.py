@@ -0,0 +1,167 @@
+from fastapi import Depends, HTTPException, Request, status
+from middleware.auth import get_current_user
+from config.settings import settings
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict
+import math
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """Classic token bucket; callers hold the admission lock"""
+    __slots__ = ("rate", "burst", "tokens", "updated_at")
+    
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+    
+    def wait_time(self, now: float) -> float:
+        """Refill, then return 0 if a token is available or the seconds until one is"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class _RouteClass:
+    def __init__(self, rate: float, burst: float, per_user_rate: float, per_user_burst: float, max_concurrency: int):
+        self.global_bucket = TokenBucket(rate, burst)
+        self.per_user_rate = per_user_rate
+        self.per_user_burst = per_user_burst
+        self.max_concurrency = max_concurrency
+        # LRU of per-key buckets, at most admission_max_tracked_clients of them. Churning that many new
+        # keys evicts a bucket and so resets it; the global bucket still caps the route class as a whole.
+        self.user_buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected_user_rate = 0
+        self.rejected_global_rate = 0
+        self.rejected_concurrency = 0
+    
+    def user_bucket(self, key: str) -> TokenBucket:
+        bucket = self.user_buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.per_user_rate, self.per_user_burst)
+            self.user_buckets[key] = bucket
+            if len(self.user_buckets) > settings.admission_max_tracked_clients:
+                self.user_buckets.popitem(last=False)
+        else:
+            self.user_buckets.move_to_end(key)
+        return bucket
+
+class AdmissionController:
+    """
+    In-process admission control for expensive routes (per worker).
+    Rejects early with 429 so cheap exam-taking routes keep their latency under load spikes.
+    """
+    classes: Dict[str, _RouteClass] = {
+        "login": _RouteClass(
+            settings.admission_login_rate, settings.admission_login_burst,
+            settings.admission_login_per_account_rate, settings.admission_login_per_account_burst,
+            settings.admission_login_concurrency
+        ),
+        "exam_generate": _RouteClass(
+            settings.admission_exam_generate_rate, settings.admission_exam_generate_burst,
+            settings.admission_exam_generate_per_user_rate, settings.admission_exam_generate_per_user_burst,
+            settings.admission_exam_generate_concurrency
+        ),
+        "bulk_upload": _RouteClass(
+            settings.admission_bulk_upload_rate, settings.admission_bulk_upload_burst,
+            settings.admission_bulk_upload_per_user_rate, settings.admission_bulk_upload_per_user_burst,
+            settings.admission_bulk_upload_concurrency
+        )
+    }
+    lock = threading.Lock()
+    
+    @classmethod
+    def acquire(cls, route_class: str, key: str) -> None:
+        rc = cls.classes[route_class]
+        now = time.monotonic()
+        with cls.lock:
+            if rc.in_flight >= rc.max_concurrency:
+                rc.rejected_concurrency += 1
+                cls._reject(route_class, 1.0)
+            # Check both buckets before taking from either, so a rejection costs no tokens
+            user_bucket = rc.user_bucket(key)
+            retry_after = user_bucket.wait_time(now)
+            if retry_after:
+                rc.rejected_user_rate += 1
+                cls._reject(route_class, retry_after)
+            retry_after = rc.global_bucket.wait_time(now)
+            if retry_after:
+                rc.rejected_global_rate += 1
+                cls._reject(route_class, retry_after)
+            user_bucket.tokens -= 1
+            rc.global_bucket.tokens -= 1
+            rc.in_flight += 1
+            rc.admitted += 1
+    
+    @classmethod
+    def release(cls, route_class: str) -> None:
+        with cls.lock:
+            cls.classes[route_class].in_flight -= 1
+    
+    @staticmethod
+    def _reject(route_class: str, retry_after: float) -> None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Too many {route_class} requests, retry later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+    
+    @classmethod
+    def stats(cls) -> dict:
+        with cls.lock:
+            return {
+                name: {
+                    "in_flight": rc.in_flight,
+                    "max_concurrency": rc.max_concurrency,
+                    "admitted": rc.admitted,
+                    "rejected_user_rate": rc.rejected_user_rate,
+                    "rejected_global_rate": rc.rejected_global_rate,
+                    "rejected_concurrency": rc.rejected_concurrency,
+                    "tracked_clients": len(rc.user_buckets)
+                }
+                for name, rc in cls.classes.items()
+            }
+
+def admit_user(route_class: str):
+    """Dependency limiting an authenticated route class per user and globally"""
+    async def dependency(current_user: dict = Depends(get_current_user)):
+        if not settings.admission_enabled:
+            yield
+            return
+        AdmissionController.acquire(route_class, current_user["id"])
+        try:
+            yield
+        finally:
+            AdmissionController.release(route_class)
+    return dependency
+
+def client_address(request: Request) -> str:
+    """
+    Client IP for limiting keys: behind the load balancer, the entry it appended to
+    X-Forwarded-For (the last one), since earlier entries are client-controlled.
+    """
+    forwarded = request.headers.get("x-forwarded-for")
+    if forwarded and settings.admission_trust_forwarded_for:
+        return forwarded.split(",")[-1].strip()
+    return request.client.host if request.client else "unknown"
+
+@contextmanager
+def admitted(route_class: str, key: str):
+    """Admission for handlers whose limiting key comes from the request body"""
+    if not settings.admission_enabled:
+        yield
+        return
+    AdmissionController.acquire(route_class, key)
+    try:
+        yield
+    finally:
+        AdmissionController.release(route_class)
@@ -2,12 +2,49 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from utils.security import decode_access_token
 from repositories.user_repository import UserRepository
+from middleware.revocation_filter import RevocationFilter
+from utils.cache import TTLCache
+from config.settings import settings
 from typing import Optional
+import hashlib
+import time
 
 security = HTTPBearer()
 
+# Verified tokens per worker: token hash -> (revocation stamp, payload, user or None).
+# An entry is only used while the user's RevocationFilter entry is unchanged since it was cached.
+_principal_cache = TTLCache(
+    max_entries=settings.auth_principal_cache_max_entries,
+    ttl_seconds=settings.auth_principal_cache_ttl_seconds
+)
+
+def get_principal_cache_stats() -> dict:
+    return _principal_cache.stats()
+
+def _cached_principal(token_hash: str) -> Optional[tuple]:
+    found, value = _principal_cache.get(token_hash)
+    if not found:
+        return None
+    stamp, payload, user = value
+    if payload.get("exp", 0) <= time.time():
+        _principal_cache.delete(token_hash)
+        return None
+    user_id = payload.get("uid") or user["id"]
+    if stamp != RevocationFilter.stamp(user_id):
+        _principal_cache.delete(token_hash)
+        return None
+    return payload, user
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
+    token_hash = hashlib.sha256(token.encode()).hexdigest()
+    cached = _cached_principal(token_hash)
+    if cached is not None:
+        payload, user = cached
+        if user is not None:
+            return _legacy_principal(payload, user)
+        return _claims_principal(payload)
+    
     payload = decode_access_token(token)
     
     if payload is None:
@@ -23,6 +60,12 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             detail="Invalid authentication credentials"
         )
     
+    if "uid" in payload:
+        user = _claims_principal(payload)
+        _principal_cache.set(token_hash, (RevocationFilter.stamp(payload["uid"]), payload, None))
+        return user
+    
+    # Tokens issued before claims were embedded
     user_repo = UserRepository()
     user = user_repo.get_by_email(email)
     
@@ -32,8 +75,35 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             detail="User not found"
         )
     
+    principal = _legacy_principal(payload, user)
+    _principal_cache.set(token_hash, (RevocationFilter.stamp(user["id"]), payload, user))
+    return principal
+
+def _claims_principal(payload: dict) -> dict:
+    """Claims-based tokens are validated without reading the user"""
+    RevocationFilter.ensure_synced()
+    user = RevocationFilter.apply(payload)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token revoked"
+        )
     return user
 
+def _legacy_principal(payload: dict, user: dict) -> dict:
+    """
+    Tokens issued before claims were embedded go through the revocation filter too,
+    keyed by the user's id and as token version 0, so revocation and deactivation apply to them.
+    """
+    claims = {
+        **payload,
+        "uid": user["id"],
+        "tv": payload.get("tv", 0),
+        "role": user["role"],
+        "active": user.get("is_active", True)
+    }
+    return {**user, **_claims_principal(claims)}
+
 def require_role(allowed_roles: list):
     def role_checker(current_user: dict = Depends(get_current_user)):
         if current_user["role"] not in allowed_roles:
@@ -0,0 +1,60 @@
+from utils.db_budget import DbUsage, BudgetViolations, current_db_usage
+from config.settings import settings
+import json
+
+class DbBudgetMiddleware:
+    """
+    Dev/test only: counts Mongo round trips per request, reports requests over their route's
+    budget and adds X-DB-Calls / X-DB-Time / X-DB-Bytes response headers.
+    In test mode an over-budget request fails with a 500, so the test that made it fails too.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        usage = DbUsage()
+        replaced = False
+        
+        async def send_wrapper(message):
+            nonlocal replaced
+            if replaced:
+                # The handler's own response was swapped for the budget error
+                return
+            if message["type"] == "http.response.start":
+                db_headers = [
+                    (b"x-db-calls", str(usage.calls).encode()),
+                    (b"x-db-time", f"{usage.time_ms:.1f}".encode()),
+                    (b"x-db-bytes", str(usage.bytes).encode())
+                ]
+                if usage.over_budget():
+                    route = getattr(scope.get("route"), "path", scope["path"])
+                    BudgetViolations.record(scope["method"], route, usage)
+                    if settings.db_budget_mode == "test":
+                        replaced = True
+                        body = json.dumps({
+                            "detail": f"DB budget exceeded: {usage.calls}/{usage.max_calls} calls, "
+                                      f"{usage.bytes}/{usage.max_bytes} bytes"
+                        }).encode()
+                        await send({
+                            "type": "http.response.start",
+                            "status": 500,
+                            "headers": [
+                                (b"content-type", b"application/json"),
+                                (b"content-length", str(len(body)).encode())
+                            ] + db_headers
+                        })
+                        await send({"type": "http.response.body", "body": body})
+                        return
+                message["headers"] = list(message.get("headers", [])) + db_headers
+            await send(message)
+        
+        token = current_db_usage.set(usage)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_db_usage.reset(token)
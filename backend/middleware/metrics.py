@@ -0,0 +1,36 @@
+from utils.metrics import RequestMetrics
+import time
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording latency, status and in-flight requests per route"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        status_code = 500
+        
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        RequestMetrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            RequestMetrics.in_flight -= 1
+            # FastAPI stores the matched route in the scope during routing
+            route = scope.get("route")
+            RequestMetrics.observe(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                status_code,
+                time.perf_counter() - started
+            )
@@ -0,0 +1,33 @@
+from utils.request_context import current_scope, current_request_id
+import uuid
+
+class RequestContextMiddleware:
+    """Bind the request scope and a request id (X-Request-ID, generated if absent) to contextvars"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:64]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+        
+        scope_token = current_scope.set(scope)
+        request_id_token = current_request_id.set(request_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_scope.reset(scope_token)
+            current_request_id.reset(request_id_token)
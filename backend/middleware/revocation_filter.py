@@ -0,0 +1,87 @@
+from repositories.token_revocation_repository import TokenRevocationRepository
+from typing import Dict, Optional
+from config.settings import settings
+from datetime import datetime, timedelta
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class RevocationFilter:
+    """
+    In-memory mirror of token_revocations, kept fresh by a periodic incremental sync.
+    Lets get_current_user trust JWT claims without reading the user on every request.
+    
+    Incremental syncs re-read an overlap window before the newest change seen, so writes
+    that commit late or share a timestamp are not skipped; a periodic full resync bounds
+    anything that still slips through.
+    """
+    entries: Dict[str, dict] = {}
+    last_change: Optional[datetime] = None
+    synced_at: Optional[float] = None
+    full_synced_at: Optional[float] = None
+    lock = threading.Lock()
+    
+    @classmethod
+    def sync(cls) -> None:
+        now = time.monotonic()
+        full = (
+            cls.full_synced_at is None
+            or now - cls.full_synced_at > settings.auth_revocation_full_resync_seconds
+        )
+        since = None
+        if not full and cls.last_change is not None:
+            since = cls.last_change - timedelta(seconds=settings.auth_revocation_overlap_seconds)
+        changes = TokenRevocationRepository().get_changed_since(since)
+        
+        # Entries in the overlap window are re-read every sync; only count real changes
+        changed = sum(1 for entry in changes if cls.entries.get(entry["user_id"]) != entry)
+        with cls.lock:
+            if full:
+                cls.entries = {entry["user_id"]: entry for entry in changes}
+                cls.full_synced_at = now
+            else:
+                for entry in changes:
+                    cls.entries[entry["user_id"]] = entry
+            if changes:
+                newest = max(entry["updated_at"] for entry in changes)
+                if cls.last_change is None or newest > cls.last_change:
+                    cls.last_change = newest
+            cls.synced_at = now
+        if changed:
+            logger.info(f"Synced {changed} token revocation changes")
+    
+    @classmethod
+    def ensure_synced(cls) -> None:
+        if cls.synced_at is None:
+            cls.sync()
+    
+    @classmethod
+    def stamp(cls, user_id: str) -> Optional[datetime]:
+        """When the user's entry last changed; cached principals are only valid under the same stamp"""
+        entry = cls.entries.get(user_id)
+        return entry["updated_at"] if entry else None
+    
+    @classmethod
+    def apply(cls, claims: dict) -> Optional[dict]:
+        """
+        Principal built from token claims with the latest known role and active flag,
+        or None if the token was revoked or the user deactivated.
+        """
+        entry = cls.entries.get(claims["uid"])
+        role = claims.get("role")
+        is_active = claims.get("active", True)
+        if entry:
+            if claims.get("tv", 0) < entry["token_version"]:
+                return None
+            role = entry["role"]
+            is_active = entry["is_active"]
+        if not is_active:
+            return None
+        return {
+            "id": claims["uid"],
+            "email": claims["sub"],
+            "role": role,
+            "is_active": is_active
+        }
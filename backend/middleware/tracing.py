@@ -0,0 +1,34 @@
+from utils.tracing import Trace, TraceExporter, current_trace, span
+from utils.request_context import current_request_id
+from config.settings import settings
+import random
+import uuid
+
+class TracingMiddleware:
+    """Starts a trace (id = request id) for sampled requests and exports it when the request ends"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or random.random() >= settings.tracing_sample_rate:
+            await self.app(scope, receive, send)
+            return
+        
+        status_code = 500
+        
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        trace = Trace(current_request_id.get() or uuid.uuid4().hex)
+        trace_token = current_trace.set(trace)
+        try:
+            with span("http.request", method=scope["method"], path=scope["path"]):
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            current_trace.reset(trace_token)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            TraceExporter.export(trace, scope["method"], route, status_code)
@@ -14,6 +14,20 @@ class FailureRecord(BaseModel):
     selected_answer: Optional[int]
     correct_answer: int
 
+class FailureBucket(BaseModel):
+    """Failures of a user on a theme during one month, stored as parallel arrays"""
+    user_id: str
+    theme_id: str
+    month: Optional[datetime]  # None for the compacted counters of expired months
+    count: int = 0
+    last_failed_at: Optional[datetime] = None
+    question_ids: List[str] = []
+    attempt_ids: List[str] = []
+    selected: List[Optional[int]] = []
+    correct: List[int] = []
+    failed_at: List[datetime] = []
+    compacted: bool = False
+
 class UserThemeStats(BaseModel):
     """Aggregated statistics for a user on a specific theme"""
     user_id: str
@@ -25,6 +39,35 @@ class UserThemeStats(BaseModel):
     accuracy_rate: float = 0.0
     last_updated: datetime = Field(default_factory=datetime.utcnow)
 
+class UserSummary(BaseModel):
+    """Materialized per-user totals, updated incrementally on each finished attempt"""
+    user_id: str
+    exams_completed: int = 0
+    scored_exams: int = 0
+    score_sum: float = 0.0
+    best_score: float = 0.0
+    total_questions: int = 0
+    total_correct: int = 0
+    total_incorrect: int = 0
+    total_unanswered: int = 0
+    theme_count: int = 0
+    accuracy_sum: float = 0.0  # Sum of per-theme accuracy_rate, so the average updates incrementally
+    avg_theme_accuracy: float = 0.0
+    weak_themes_count: int = 0
+    stats_version: int = 0  # Bumped on every change; keys the analytics cache across workers
+    last_updated: datetime = Field(default_factory=datetime.utcnow)
+
+class DailyProgress(BaseModel):
+    """Progress rollup for one day, for one theme or summed over all themes"""
+    day: datetime
+    theme_id: Optional[str] = None
+    answered: int = 0
+    correct: int = 0
+    incorrect: int = 0
+    unanswered: int = 0
+    score_sum: float = 0.0  # +1 per correct, -0.25 per incorrect, as in exam scoring
+    attempt_count: int = 0
+
 class FailureAnalytics(BaseModel):
     """Analytics response for user failures"""
     theme_id: str
@@ -33,7 +76,7 @@ class FailureAnalytics(BaseModel):
     failure_count: int
     total_attempts: int
     accuracy_rate: float
-    last_failed_at: Optional[datetime]
+    last_failed_at: Optional[datetime] = None
 
 class StudyPlanItem(BaseModel):
     """Item in a personalized study plan"""
@@ -64,3 +107,16 @@ class OverallStats(BaseModel):
     average_score: float = 0.0
     best_score: float = 0.0
     weak_themes_count: int = 0
+
+class ScoreBucket(BaseModel):
+    lower: float
+    upper: float
+    count: int
+
+class ScorePercentile(BaseModel):
+    """Where a score ranks among all finished attempts of an exam type"""
+    exam_type: str
+    score: float
+    percentile: float
+    total_scores: int
+    histogram: List[ScoreBucket]
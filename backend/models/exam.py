@@ -8,6 +8,7 @@ class ExamCreate(BaseModel):
     name: str
     theme_ids: List[str]
     question_count: int = 10
+    practical_set_id: Optional[str] = None
 
 class QuestionSnapshot(BaseModel):
     question_id: str
@@ -22,6 +23,7 @@ class ExamInDB(BaseModel):
     name: str
     theme_ids: List[str]
     questions: List[QuestionSnapshot]  # Snapshot of questions
+    practical_set_id: Optional[str] = None
     created_by: str
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -46,6 +48,7 @@ class AttemptInDB(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     exam_id: str
     user_id: str
+    practical_set_id: Optional[str] = None
     answers: Dict[str, Optional[int]] = {}  # question_id -> selected_answer
     started_at: datetime = Field(default_factory=datetime.utcnow)
     finished_at: Optional[datetime] = None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 import uuid
 
@@ -28,6 +28,15 @@ class QuestionResponse(QuestionBase):
     created_by: Optional[str] = None
     created_at: datetime
 
+class QuestionStats(BaseModel):
+    """Empirical item statistics computed from finished attempts"""
+    question_id: str
+    exposure_count: int = 0
+    p_value: float = 0.0  # Proportion of exposures answered correctly
+    discrimination: Optional[float] = None  # Point-biserial correlation
+    choice_counts: Dict[str, int] = {}
+    updated_at: Optional[datetime] = None
+
 # Upload models
 class QuestionUploadItem(BaseModel):
     text: str
@@ -1,8 +1,10 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from typing import Literal, Optional
 from datetime import datetime
 import uuid
 
+UserRole = Literal["admin", "curator", "student"]
+
 class UserBase(BaseModel):
     email: EmailStr
     display_name: str
@@ -19,6 +21,7 @@ class UserInDB(UserBase):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     hashed_password: str
     is_active: bool = True
+    token_version: int = 0  # Bumped to revoke all tokens issued before
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 class UserResponse(UserBase):
@@ -26,6 +29,10 @@ class UserResponse(UserBase):
     is_active: bool
     created_at: datetime
 
+class UserAdminUpdate(BaseModel):
+    role: Optional[UserRole] = None
+    is_active: Optional[bool] = None
+
 class Token(BaseModel):
     access_token: str
     token_type: str
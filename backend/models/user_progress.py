@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 import uuid
 from enum import Enum
@@ -9,6 +9,13 @@ class OutcomeType(str, Enum):
     INCORRECT = "INCORRECT"
     UNANSWERED = "UNANSWERED"
 
+# Review interval per Leitner box (box 1 = just failed)
+LEITNER_INTERVAL_DAYS = [1, 3, 7, 14, 30]
+
+# Outcome codes used by the packed history representation
+OUTCOME_CODES = {OutcomeType.CORRECT: 0, OutcomeType.INCORRECT: 1, OutcomeType.UNANSWERED: 2}
+OUTCOMES_BY_CODE = {code: outcome for outcome, code in OUTCOME_CODES.items()}
+
 class UserQuestionHistory(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     user_id: str
@@ -17,3 +24,22 @@ class UserQuestionHistory(BaseModel):
     last_seen: datetime = Field(default_factory=datetime.utcnow)
     outcome: OutcomeType
     times_answered: int = 1
+    box: int = 1  # Leitner box, 1 = review soonest
+    next_due: Optional[datetime] = None
+
+class PackedThemeHistory(BaseModel):
+    """
+    All of a user's history on one theme in a single document. Arrays are parallel:
+    q holds question positions from the theme's question index, o outcome codes,
+    t last_seen and d next_due as epoch seconds, n times_answered and b Leitner box.
+    """
+    user_id: str
+    theme_id: str
+    v: int = 0  # Version for optimistic concurrency
+    converted: bool = False  # Set by the pack job once legacy history is folded in
+    q: List[int] = []
+    o: List[int] = []
+    t: List[int] = []
+    n: List[int] = []
+    b: List[int] = []
+    d: List[int] = []
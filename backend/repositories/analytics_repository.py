@@ -1,7 +1,10 @@
 from config.database import get_database
-from models.analytics import FailureRecord, UserThemeStats
+from models.analytics import FailureRecord, UserSummary
+from utils.tracing import traced
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 from typing import List, Optional, Dict
-from datetime import datetime
+from datetime import datetime, timezone
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,25 +12,83 @@ logger = logging.getLogger(__name__)
 class AnalyticsRepository:
     def __init__(self):
         self.db = get_database()
-        self.failures_collection = self.db.analytics_failures
+        self.failures_collection = self.db.failure_buckets
         self.stats_collection = self.db.user_theme_stats
+        self.summary_collection = self.db.user_summary
+        self.attempt_collection = self.db.attempts
+        self.daily_collection = self.db.user_daily_progress
+    
+    # Failures are stored with the bucket pattern: one document per user, theme and
+    # month holding parallel arrays (question_ids, attempt_ids, selected, correct,
+    # failed_at). Buckets past the retention window are folded into a single
+    # counters-only document per user and theme (month None, compacted True).
+    @staticmethod
+    def month_bucket(moment: datetime) -> datetime:
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(timezone.utc)
+        return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+    
+    def failure_bucket_updates(self, failures: List[FailureRecord]) -> List[UpdateOne]:
+        """One $push upsert per (user, theme, month) bucket touched by the failures"""
+        grouped: Dict[tuple, List[FailureRecord]] = {}
+        for failure in failures:
+            key = (failure.user_id, failure.theme_id, self.month_bucket(failure.failed_at))
+            grouped.setdefault(key, []).append(failure)
+        
+        operations = []
+        for (user_id, theme_id, month), bucket_failures in grouped.items():
+            operations.append(UpdateOne(
+                {"user_id": user_id, "theme_id": theme_id, "month": month},
+                {
+                    "$push": {
+                        "question_ids": {"$each": [f.question_id for f in bucket_failures]},
+                        "attempt_ids": {"$each": [f.attempt_id for f in bucket_failures]},
+                        "selected": {"$each": [f.selected_answer for f in bucket_failures]},
+                        "correct": {"$each": [f.correct_answer for f in bucket_failures]},
+                        "failed_at": {"$each": [f.failed_at for f in bucket_failures]}
+                    },
+                    "$inc": {"count": len(bucket_failures)},
+                    "$max": {"last_failed_at": max(f.failed_at for f in bucket_failures)}
+                },
+                upsert=True
+            ))
+        return operations
+    
+    @traced
+    def record_failures(self, failures: List[FailureRecord]) -> None:
+        """Record failed question answers into their monthly buckets"""
+        operations = self.failure_bucket_updates(failures)
+        if operations:
+            self.failures_collection.bulk_write(operations, ordered=False)
+            logger.info(f"Recorded {len(failures)} failures in {len(operations)} buckets")
     
     def record_failure(self, failure: FailureRecord) -> None:
         """Record a failed question answer"""
-        failure_dict = failure.model_dump()
-        self.failures_collection.insert_one(failure_dict)
-        logger.info(f"Failure recorded for user {failure.user_id} on theme {failure.theme_id}")
+        self.record_failures([failure])
     
     def get_user_failures_by_theme(self, user_id: str, theme_id: Optional[str] = None) -> List[dict]:
-        """Get user's failures, optionally filtered by theme"""
-        query = {"user_id": user_id}
+        """Get user's individual failures (compacted months excluded), newest first"""
+        query = {"user_id": user_id, "compacted": {"$ne": True}}
         if theme_id:
             query["theme_id"] = theme_id
         
-        failures = list(
-            self.failures_collection.find(query, {"_id": 0})
-            .sort("failed_at", -1)
-        )
+        failures = []
+        for bucket in self.failures_collection.find(query, {"_id": 0}):
+            for question_id, attempt_id, selected, correct, failed_at in zip(
+                bucket["question_ids"], bucket["attempt_ids"], bucket["selected"],
+                bucket["correct"], bucket["failed_at"]
+            ):
+                failures.append({
+                    "user_id": bucket["user_id"],
+                    "theme_id": bucket["theme_id"],
+                    "question_id": question_id,
+                    "attempt_id": attempt_id,
+                    "selected_answer": selected,
+                    "correct_answer": correct,
+                    "failed_at": failed_at
+                })
+        
+        failures.sort(key=lambda f: f["failed_at"], reverse=True)
         return failures
     
     def get_failure_stats_by_theme(self, user_id: str) -> List[Dict]:
@@ -37,8 +98,8 @@ class AnalyticsRepository:
             {
                 "$group": {
                     "_id": "$theme_id",
-                    "failure_count": {"$sum": 1},
-                    "last_failed_at": {"$max": "$failed_at"}
+                    "failure_count": {"$sum": "$count"},
+                    "last_failed_at": {"$max": "$last_failed_at"}
                 }
             },
             {"$sort": {"failure_count": -1}}
@@ -47,54 +108,248 @@ class AnalyticsRepository:
         stats = list(self.failures_collection.aggregate(pipeline))
         return stats
     
+    def compact_failure_buckets(self, before_month: datetime, batch_size: int = 500) -> int:
+        """Fold monthly buckets older than before_month into per-theme counter documents"""
+        compacted = 0
+        while True:
+            buckets = list(
+                self.failures_collection.find(
+                    {"month": {"$lt": before_month}, "compacted": {"$ne": True}},
+                    {"user_id": 1, "theme_id": 1, "count": 1, "last_failed_at": 1}
+                ).limit(batch_size)
+            )
+            if not buckets:
+                return compacted
+            
+            operations = [
+                UpdateOne(
+                    {"user_id": b["user_id"], "theme_id": b["theme_id"], "month": None},
+                    {
+                        "$inc": {"count": b["count"]},
+                        "$max": {"last_failed_at": b["last_failed_at"]},
+                        "$set": {"compacted": True}
+                    },
+                    upsert=True
+                )
+                for b in buckets
+            ]
+            self.failures_collection.bulk_write(operations, ordered=False)
+            self.failures_collection.delete_many({"_id": {"$in": [b["_id"] for b in buckets]}})
+            compacted += len(buckets)
+    
+    @traced
+    def get_failure_analytics(self, user_id: str, theme_id: Optional[str] = None,
+                              limit: int = 10) -> List[Dict]:
+        """
+        Worst-accuracy themes for a user joined with theme info and last failure date.
+        Limit is applied before the joins, and failure_count comes from the stats
+        counters, so cost does not grow with the size of the failure history.
+        """
+        match = {"user_id": user_id}
+        if theme_id:
+            match["theme_id"] = theme_id
+        
+        pipeline = [
+            {"$match": match},
+            {"$sort": {"accuracy_rate": 1}},
+            {"$limit": limit},
+            {
+                "$lookup": {
+                    "from": "themes",
+                    "localField": "theme_id",
+                    "foreignField": "id",
+                    "as": "theme"
+                }
+            },
+            {"$unwind": "$theme"},
+            {
+                "$lookup": {
+                    "from": self.failures_collection.name,
+                    "let": {"theme_id": "$theme_id"},
+                    "pipeline": [
+                        {
+                            "$match": {
+                                "user_id": user_id,
+                                "$expr": {"$eq": ["$theme_id", "$$theme_id"]}
+                            }
+                        },
+                        {"$sort": {"last_failed_at": -1}},
+                        {"$limit": 1},
+                        {"$project": {"_id": 0, "last_failed_at": 1}}
+                    ],
+                    "as": "last_failure"
+                }
+            },
+            {
+                "$project": {
+                    "_id": 0,
+                    "theme_id": 1,
+                    "theme_name": "$theme.name",
+                    "theme_code": "$theme.code",
+                    "failure_count": "$incorrect_answers",
+                    "total_attempts": "$total_questions_attempted",
+                    "accuracy_rate": 1,
+                    "last_failed_at": {"$ifNull": [{"$first": "$last_failure.last_failed_at"}, None]}
+                }
+            }
+        ]
+        
+        return list(self.stats_collection.aggregate(pipeline))
+    
+    @staticmethod
+    def _theme_stats_update(user_id: str, theme_id: str,
+                            correct: int, incorrect: int, unanswered: int) -> UpdateOne:
+        """
+        Upsert that adds the counters and recomputes accuracy on the server.
+        Pipeline updates cannot use $inc, so counters are added with $add over $ifNull,
+        which is equally atomic for a single document.
+        """
+        def add(field: str, value: int) -> dict:
+            return {"$add": [{"$ifNull": [f"${field}", 0]}, value]}
+        
+        pipeline = [
+            {
+                "$set": {
+                    "total_questions_attempted": add("total_questions_attempted", correct + incorrect + unanswered),
+                    "correct_answers": add("correct_answers", correct),
+                    "incorrect_answers": add("incorrect_answers", incorrect),
+                    "unanswered": add("unanswered", unanswered),
+                    "last_updated": "$$NOW"
+                }
+            },
+            {
+                "$set": {
+                    "accuracy_rate": {
+                        "$cond": [
+                            {"$gt": ["$total_questions_attempted", 0]},
+                            {"$round": [
+                                {"$multiply": [
+                                    {"$divide": ["$correct_answers", "$total_questions_attempted"]},
+                                    100
+                                ]},
+                                2
+                            ]},
+                            0.0
+                        ]
+                    }
+                }
+            }
+        ]
+        return UpdateOne({"user_id": user_id, "theme_id": theme_id}, pipeline, upsert=True)
+    
     def update_user_theme_stats(self, user_id: str, theme_id: str, 
                                 correct: int, incorrect: int, unanswered: int) -> None:
         """Update or create user theme statistics"""
-        existing_stats = self.stats_collection.find_one({
-            "user_id": user_id,
-            "theme_id": theme_id
+        self.bulk_update_user_theme_stats(user_id, {
+            theme_id: {"correct": correct, "incorrect": incorrect, "unanswered": unanswered}
         })
+    
+    @traced
+    def bulk_update_user_theme_stats(self, user_id: str, theme_stats: Dict[str, Dict[str, int]]) -> Dict[str, dict]:
+        """
+        Apply per-theme counter deltas ({theme_id: {correct, incorrect, unanswered}}) in one round trip.
+        Returns the touched themes' counters from before the update (absent for first-time themes),
+        read with one bounded $in, so the user summary can keep its theme averages incrementally.
+        """
+        if not theme_stats:
+            return {}
         
-        if existing_stats:
-            # Update existing stats
-            new_total = existing_stats["total_questions_attempted"] + correct + incorrect + unanswered
-            new_correct = existing_stats["correct_answers"] + correct
-            new_incorrect = existing_stats["incorrect_answers"] + incorrect
-            new_unanswered = existing_stats["unanswered"] + unanswered
-            
-            accuracy = (new_correct / new_total * 100) if new_total > 0 else 0.0
-            
-            self.stats_collection.update_one(
-                {"user_id": user_id, "theme_id": theme_id},
-                {
-                    "$set": {
-                        "total_questions_attempted": new_total,
-                        "correct_answers": new_correct,
-                        "incorrect_answers": new_incorrect,
-                        "unanswered": new_unanswered,
-                        "accuracy_rate": round(accuracy, 2),
-                        "last_updated": datetime.utcnow()
-                    }
-                }
+        previous = {
+            doc["theme_id"]: doc
+            for doc in self.stats_collection.find(
+                {"user_id": user_id, "theme_id": {"$in": list(theme_stats)}},
+                {"_id": 0, "theme_id": 1, "total_questions_attempted": 1, "correct_answers": 1}
             )
-        else:
-            # Create new stats
-            total = correct + incorrect + unanswered
-            accuracy = (correct / total * 100) if total > 0 else 0.0
-            
-            stats = UserThemeStats(
-                user_id=user_id,
-                theme_id=theme_id,
-                total_questions_attempted=total,
-                correct_answers=correct,
-                incorrect_answers=incorrect,
-                unanswered=unanswered,
-                accuracy_rate=round(accuracy, 2)
-            )
-            
-            self.stats_collection.insert_one(stats.model_dump())
+        }
+        
+        operations = [
+            self._theme_stats_update(user_id, theme_id, stats["correct"], stats["incorrect"], stats["unanswered"])
+            for theme_id, stats in theme_stats.items()
+        ]
         
-        logger.info(f"Updated stats for user {user_id} on theme {theme_id}")
+        try:
+            self.stats_collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            # Two first-time upserts for the same theme can race on the unique index;
+            # the loser's retry finds the winner's document and updates it
+            failed = [err["index"] for err in e.details.get("writeErrors", []) if err.get("code") == 11000]
+            if len(failed) != len(e.details.get("writeErrors", [])):
+                raise
+            self.stats_collection.bulk_write([operations[i] for i in failed], ordered=False)
+        
+        logger.info(f"Updated stats for user {user_id} on {len(operations)} themes")
+        return previous
+    
+    # Daily progress rollups
+    @staticmethod
+    def daily_progress_update(user_id: str, theme_id: Optional[str], day: datetime,
+                              correct: int, incorrect: int, unanswered: int) -> UpdateOne:
+        """$inc upsert of one (user, theme, day) bucket; day must be a UTC midnight"""
+        return UpdateOne(
+            {"user_id": user_id, "theme_id": theme_id, "day": day},
+            {
+                "$inc": {
+                    "answered": correct + incorrect,
+                    "correct": correct,
+                    "incorrect": incorrect,
+                    "unanswered": unanswered,
+                    "score_sum": correct * 1.0 + incorrect * -0.25,
+                    "attempt_count": 1
+                }
+            },
+            upsert=True
+        )
+    
+    @staticmethod
+    def day_bucket(moment: datetime) -> datetime:
+        if moment.tzinfo is not None:
+            moment = moment.astimezone(timezone.utc)
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+    
+    def daily_progress_updates(self, user_id: str, finished_at: datetime,
+                               theme_stats: Dict[str, Dict[str, int]]) -> List[UpdateOne]:
+        """
+        Operations adding one finished attempt to its day's rollups: one bucket per theme
+        plus an all-themes bucket (theme_id None) so unfiltered charts need no $group
+        """
+        if not theme_stats:
+            return []
+        day = self.day_bucket(finished_at)
+        totals = {
+            key: sum(stats[key] for stats in theme_stats.values())
+            for key in ("correct", "incorrect", "unanswered")
+        }
+        operations = [
+            self.daily_progress_update(user_id, theme_id, day,
+                                       stats["correct"], stats["incorrect"], stats["unanswered"])
+            for theme_id, stats in theme_stats.items()
+        ]
+        operations.append(
+            self.daily_progress_update(user_id, None, day,
+                                       totals["correct"], totals["incorrect"], totals["unanswered"])
+        )
+        return operations
+    
+    @traced
+    def bulk_update_daily_progress(self, user_id: str, finished_at: datetime,
+                                   theme_stats: Dict[str, Dict[str, int]]) -> None:
+        operations = self.daily_progress_updates(user_id, finished_at, theme_stats)
+        if operations:
+            self.daily_collection.bulk_write(operations, ordered=False)
+    
+    def get_daily_progress(self, user_id: str, start_day: datetime, end_day: datetime,
+                           theme_id: Optional[str] = None) -> List[dict]:
+        """Rollups in [start_day, end_day] for a theme, or the all-themes totals"""
+        return list(
+            self.daily_collection.find(
+                {
+                    "user_id": user_id,
+                    "theme_id": theme_id,
+                    "day": {"$gte": self.day_bucket(start_day), "$lte": self.day_bucket(end_day)}
+                },
+                {"_id": 0, "user_id": 0}
+            ).sort("day", 1)
+        )
     
     def get_user_theme_stats(self, user_id: str, theme_id: Optional[str] = None) -> List[dict]:
         """Get user's statistics by theme"""
@@ -151,3 +406,175 @@ class AnalyticsRepository:
             "total_unanswered": 0,
             "avg_accuracy": 0.0
         }
+    
+    # User summary
+    def get_user_summary(self, user_id: str) -> Optional[dict]:
+        return self.summary_collection.find_one({"user_id": user_id}, {"_id": 0})
+    
+    def get_stats_version(self, user_id: str) -> int:
+        doc = self.summary_collection.find_one({"user_id": user_id}, {"_id": 0, "stats_version": 1})
+        return doc.get("stats_version", 0) if doc else 0
+    
+    def bump_stats_version(self, user_id: str) -> None:
+        # No upsert: a bare version document would pass for a complete summary
+        self.summary_collection.update_one({"user_id": user_id}, {"$inc": {"stats_version": 1}})
+    
+    def _get_theme_summary(self, user_id: str, weak_threshold: float) -> Dict:
+        """Theme-derived summary fields; a user has at most one stats row per theme"""
+        pipeline = [
+            {"$match": {"user_id": user_id}},
+            {
+                "$group": {
+                    "_id": None,
+                    "theme_count": {"$sum": 1},
+                    "accuracy_sum": {"$sum": "$accuracy_rate"},
+                    "weak_themes_count": {
+                        "$sum": {
+                            "$cond": [
+                                {"$and": [
+                                    {"$lt": ["$accuracy_rate", weak_threshold]},
+                                    {"$gte": ["$total_questions_attempted", 3]}
+                                ]},
+                                1,
+                                0
+                            ]
+                        }
+                    }
+                }
+            }
+        ]
+        result = list(self.stats_collection.aggregate(pipeline))
+        if not result:
+            return {"theme_count": 0, "accuracy_sum": 0.0, "avg_theme_accuracy": 0.0, "weak_themes_count": 0}
+        theme_count = result[0]["theme_count"]
+        accuracy_sum = result[0]["accuracy_sum"] or 0.0
+        return {
+            "theme_count": theme_count,
+            "accuracy_sum": accuracy_sum,
+            "avg_theme_accuracy": round(accuracy_sum / theme_count, 2) if theme_count else 0.0,
+            "weak_themes_count": result[0]["weak_themes_count"]
+        }
+    
+    @staticmethod
+    def _theme_summary_delta(theme_stats: Dict[str, Dict[str, int]], previous: Dict[str, dict],
+                             weak_threshold: float) -> Dict:
+        """
+        Change in theme count, accuracy sum and weak themes caused by applying theme_stats
+        on top of the previous counters; mirrors the accuracy formula of _theme_stats_update.
+        """
+        def accuracy(total: int, correct: int) -> float:
+            return round(correct / total * 100, 2) if total > 0 else 0.0
+        
+        def is_weak(total: int, rate: float) -> int:
+            return int(rate < weak_threshold and total >= 3)
+        
+        delta = {"theme_count": 0, "accuracy_sum": 0.0, "weak_themes_count": 0}
+        for theme_id, stats in theme_stats.items():
+            before = previous.get(theme_id)
+            old_total = before.get("total_questions_attempted", 0) if before else 0
+            old_correct = before.get("correct_answers", 0) if before else 0
+            new_total = old_total + stats["correct"] + stats["incorrect"] + stats["unanswered"]
+            new_correct = old_correct + stats["correct"]
+            old_rate = accuracy(old_total, old_correct)
+            new_rate = accuracy(new_total, new_correct)
+            
+            if before is None:
+                delta["theme_count"] += 1
+            delta["accuracy_sum"] += new_rate - old_rate
+            delta["weak_themes_count"] += is_weak(new_total, new_rate) - is_weak(old_total, old_rate)
+        return delta
+    
+    @traced
+    def update_user_summary(self, user_id: str, score: Optional[float], theme_stats: Dict[str, Dict[str, int]],
+                            previous_theme_stats: Dict[str, dict], weak_threshold: float = 70.0) -> None:
+        """
+        Apply one finished attempt to the user's summary document in a single write.
+        Theme averages are kept incrementally from the theme counters before and after
+        this attempt (see bulk_update_user_theme_stats), so no theme stats are re-aggregated.
+        Call after the attempt and its theme stats are written, so a rebuild includes them.
+        """
+        def add(field: str, value) -> dict:
+            return {"$add": [{"$ifNull": [f"${field}", 0]}, value]}
+        
+        theme_delta = self._theme_summary_delta(theme_stats, previous_theme_stats, weak_threshold)
+        correct = sum(stats["correct"] for stats in theme_stats.values())
+        incorrect = sum(stats["incorrect"] for stats in theme_stats.values())
+        unanswered = sum(stats["unanswered"] for stats in theme_stats.values())
+        
+        totals = {
+            "exams_completed": add("exams_completed", 1),
+            "total_questions": add("total_questions", correct + incorrect + unanswered),
+            "total_correct": add("total_correct", correct),
+            "total_incorrect": add("total_incorrect", incorrect),
+            "total_unanswered": add("total_unanswered", unanswered),
+            "theme_count": add("theme_count", theme_delta["theme_count"]),
+            "accuracy_sum": add("accuracy_sum", theme_delta["accuracy_sum"]),
+            "weak_themes_count": add("weak_themes_count", theme_delta["weak_themes_count"]),
+            "stats_version": add("stats_version", 1),
+            "last_updated": datetime.utcnow()
+        }
+        if score is not None:
+            totals["scored_exams"] = add("scored_exams", 1)
+            totals["score_sum"] = add("score_sum", score)
+            totals["best_score"] = {"$max": [{"$ifNull": ["$best_score", score]}, score]}
+        
+        pipeline = [
+            {"$set": totals},
+            {"$set": {
+                "avg_theme_accuracy": {
+                    "$cond": [
+                        {"$gt": ["$theme_count", 0]},
+                        {"$round": [{"$divide": ["$accuracy_sum", "$theme_count"]}, 2]},
+                        0.0
+                    ]
+                }
+            }}
+        ]
+        
+        # Summaries written before theme counts were kept are rebuilt rather than incremented
+        result = self.summary_collection.update_one(
+            {"user_id": user_id, "theme_count": {"$exists": True}}, pipeline
+        )
+        if result.matched_count == 0:
+            # First finish since summaries exist: incrementing from zero would drop earlier
+            # history, so build the summary from attempts and theme stats, this attempt included
+            self.rebuild_user_summary(user_id, weak_threshold)
+    
+    def rebuild_user_summary(self, user_id: str, weak_threshold: float = 70.0) -> dict:
+        """Recompute the user's summary from attempts and theme stats"""
+        attempt_pipeline = [
+            {"$match": {"user_id": user_id, "finished_at": {"$ne": None}}},
+            {
+                "$group": {
+                    "_id": None,
+                    "exams_completed": {"$sum": 1},
+                    "scored_exams": {"$sum": {"$cond": [{"$isNumber": "$score"}, 1, 0]}},
+                    "score_sum": {"$sum": "$score"},
+                    "best_score": {"$max": "$score"}
+                }
+            }
+        ]
+        attempt_totals = next(self.attempt_collection.aggregate(attempt_pipeline), {})
+        theme_totals = self.get_overall_stats(user_id)
+        
+        summary = UserSummary(
+            user_id=user_id,
+            exams_completed=attempt_totals.get("exams_completed", 0),
+            scored_exams=attempt_totals.get("scored_exams", 0),
+            score_sum=attempt_totals.get("score_sum") or 0.0,
+            best_score=attempt_totals.get("best_score") or 0.0,
+            total_questions=theme_totals.get("total_questions", 0),
+            total_correct=theme_totals.get("total_correct", 0),
+            total_incorrect=theme_totals.get("total_incorrect", 0),
+            total_unanswered=theme_totals.get("total_unanswered", 0),
+            **self._get_theme_summary(user_id, weak_threshold)
+        )
+        summary_dict = summary.model_dump(exclude={"stats_version"})
+        doc = self.summary_collection.find_one_and_update(
+            {"user_id": user_id},
+            {"$set": summary_dict, "$inc": {"stats_version": 1}},
+            projection={"_id": 0},
+            upsert=True,
+            return_document=True
+        )
+        return doc
@@ -0,0 +1,49 @@
+from config.settings import settings
+from bson import json_util
+from typing import List, Tuple
+from datetime import datetime
+import gzip
+import os
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+class AttemptArchiveRepository:
+    """
+    Cold storage for finished attempts: gzip-compressed NDJSON segment files on local disk.
+    Every attempt is its own gzip member, so a segment is still a valid .ndjson.gz file
+    while a single attempt can be read back from its (segment, offset, length).
+    """
+    
+    def __init__(self, archive_dir: str = None):
+        self.archive_dir = archive_dir or settings.attempt_archive_dir
+    
+    def write_segment(self, attempts: List[dict]) -> Tuple[str, List[dict]]:
+        """Write attempts to a new segment; returns its name and each attempt's location"""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        segment = f"attempts-{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}.ndjson.gz"
+        path = os.path.join(self.archive_dir, segment)
+        
+        locations = []
+        offset = 0
+        with open(path + ".tmp", "wb") as f:
+            for attempt in attempts:
+                line = json_util.dumps(attempt, json_options=json_util.RELAXED_JSON_OPTIONS) + "\n"
+                member = gzip.compress(line.encode("utf-8"))
+                f.write(member)
+                locations.append({"segment": segment, "offset": offset, "length": len(member)})
+                offset += len(member)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+        
+        logger.info(f"Archived {len(attempts)} attempts to {segment} ({offset} bytes)")
+        return segment, locations
+    
+    def read(self, location: dict) -> dict:
+        path = os.path.join(self.archive_dir, location["segment"])
+        with open(path, "rb") as f:
+            f.seek(location["offset"])
+            member = f.read(location["length"])
+        return json_util.loads(gzip.decompress(member).decode("utf-8"))
@@ -1,6 +1,8 @@
 from config.database import get_database
 from models.exam import ExamInDB, AttemptInDB
-from typing import List, Optional
+from pymongo import UpdateOne
+from typing import List, Optional, Tuple
+from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,6 +22,10 @@ class ExamRepository:
     def get_exam_by_id(self, exam_id: str) -> Optional[dict]:
         return self.exam_collection.find_one({"id": exam_id}, {"_id": 0})
     
+    def get_exams_by_ids(self, exam_ids: List[str]) -> dict:
+        cursor = self.exam_collection.find({"id": {"$in": exam_ids}}, {"_id": 0})
+        return {exam["id"]: exam for exam in cursor}
+    
     def get_exams_by_user(self, user_id: str, limit: int = 50) -> List[dict]:
         return list(
             self.exam_collection.find({"created_by": user_id}, {"_id": 0})
@@ -59,6 +65,96 @@ class ExamRepository:
             .limit(limit)
         )
     
+    def get_latest_finished_attempt(self, user_id: str, exam_type: str) -> Optional[dict]:
+        """Latest finished attempt of a given exam type (score and dates only)"""
+        return self.attempt_collection.find_one(
+            {"user_id": user_id, "finished_at": {"$ne": None}, "details.exam_type": exam_type},
+            {"_id": 0, "id": 1, "score": 1, "finished_at": 1},
+            sort=[("finished_at", -1)]
+        )
+    
+    # Archival
+    def get_archivable_attempts(self, finished_before: datetime, limit: int) -> List[dict]:
+        return list(
+            self.attempt_collection.find(
+                {"finished_at": {"$lt": finished_before}, "archive": None},
+                {"_id": 0}
+            ).sort("finished_at", 1).limit(limit)
+        )
+    
+    def get_exam_summaries(self, exam_ids: List[str]) -> dict:
+        cursor = self.exam_collection.find(
+            {"id": {"$in": exam_ids}},
+            {"_id": 0, "id": 1, "name": 1, "type": 1}
+        )
+        return {exam["id"]: exam for exam in cursor}
+    
+    def mark_archived(self, stubs: List[dict]) -> None:
+        """
+        Replace archived attempts by slim stubs: answers and per-question results are
+        dropped, score, dates and the details counters stay queryable.
+        """
+        operations = [
+            UpdateOne(
+                {"id": stub["id"]},
+                {
+                    "$set": {
+                        "archive": stub["archive"],
+                        "exam_name": stub.get("exam_name"),
+                        "exam_type": stub.get("exam_type")
+                    },
+                    "$unset": {"answers": "", "details.results": ""}
+                }
+            )
+            for stub in stubs
+        ]
+        if operations:
+            self.attempt_collection.bulk_write(operations, ordered=False)
+    
+    # Cleanup
+    def find_abandoned_attempts(self, started_before: datetime, limit: int) -> List[dict]:
+        """Unfinished attempts started before the cutoff, with their stored size"""
+        pipeline = [
+            {"$match": {"finished_at": None, "abandoned_at": None, "started_at": {"$lt": started_before}}},
+            {"$limit": limit},
+            {"$project": {"_id": 0, "id": 1, "exam_id": 1, "answers": 1, "size": {"$bsonSize": "$$ROOT"}}}
+        ]
+        return list(self.attempt_collection.aggregate(pipeline))
+    
+    def find_exams_created_before(self, created_before: datetime, after: Optional[Tuple[datetime, str]],
+                                  limit: int) -> List[dict]:
+        """
+        Exams created before the cutoff with their stored size, paged by a (created_at, id)
+        cursor so each batch is a range scan on the (created_at, id) index.
+        """
+        match = {"created_at": {"$lt": created_before}}
+        if after:
+            after_created_at, after_id = after
+            match["$or"] = [
+                {"created_at": {"$gt": after_created_at}},
+                {"created_at": after_created_at, "id": {"$gt": after_id}}
+            ]
+        pipeline = [
+            {"$match": match},
+            {"$sort": {"created_at": 1, "id": 1}},
+            {"$limit": limit},
+            {"$project": {"_id": 0, "id": 1, "created_at": 1, "size": {"$bsonSize": "$$ROOT"}}}
+        ]
+        return list(self.exam_collection.aggregate(pipeline))
+    
+    def get_referenced_exam_ids(self, exam_ids: List[str]) -> set:
+        return set(self.attempt_collection.distinct("exam_id", {"exam_id": {"$in": exam_ids}}))
+    
+    def delete_attempts(self, attempt_ids: List[str]) -> int:
+        if not attempt_ids:
+            return 0
+        return self.attempt_collection.delete_many({"id": {"$in": attempt_ids}}).deleted_count
+    
+    def delete_exams(self, exam_ids: List[str]) -> int:
+        if not exam_ids:
+            return 0
+        return self.exam_collection.delete_many({"id": {"$in": exam_ids}}).deleted_count
+    
     def get_user_attempts(self, user_id: str) -> List[dict]:
         """Get all attempts for a user (for analytics)"""
         return list(
@@ -1,58 +1,208 @@
 from config.database import get_database
-from models.user_progress import UserQuestionHistory, OutcomeType
-from typing import List, Dict
+from config.settings import settings
+from repositories.packed_history_repository import PackedHistoryRepository, to_epoch
+from models.user_progress import UserQuestionHistory, OutcomeType, LEITNER_INTERVAL_DAYS
+from utils.tracing import traced
+from pymongo import UpdateOne
+from typing import List, Dict, Set, Tuple
 from datetime import datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
+MILLISECONDS_PER_DAY = 24 * 60 * 60 * 1000
+
 class HistoryRepository:
+    """
+    User question history. settings.question_history_mode selects the storage:
+    "legacy" (one document per user and question), "packed" (one per user and theme)
+    or "dual", which writes both and reads packed documents for themes the pack job
+    has converted, and legacy documents for every other theme.
+    """
+    
     def __init__(self):
         self.db = get_database()
         self.collection = self.db.user_question_history
-        # Ensure indexes for performance
-        self.collection.create_index([("user_id", 1), ("theme_id", 1)])
-        self.collection.create_index([("user_id", 1), ("question_id", 1)], unique=True)
+        self.mode = settings.question_history_mode
+        self.packed = PackedHistoryRepository()
+        self._entries_cache: Dict[tuple, List[dict]] = {}
     
-    def upsert_interaction(self, user_id: str, question_id: str, theme_id: str, outcome: OutcomeType) -> None:
+    @staticmethod
+    def _interaction_update(user_id: str, question_id: str, theme_id: str,
+                            outcome: OutcomeType, now: datetime) -> UpdateOne:
         """
-        Update or insert a record of a user answering a question.
-        Increments times_answered and updates last_seen/outcome.
+        Leitner-style scheduling in a single pipeline upsert: a correct answer moves the
+        question up one box, anything else sends it back to box 1, and next_due is
+        now plus the interval of the new box.
         """
-        now = datetime.utcnow()
+        outcome_value = outcome.value if isinstance(outcome, OutcomeType) else outcome
+        current_box = {"$ifNull": ["$box", 0]}
+        if outcome_value == OutcomeType.CORRECT.value:
+            new_box = {"$min": [{"$add": [current_box, 1]}, len(LEITNER_INTERVAL_DAYS)]}
+        else:
+            new_box = 1
         
-        # Use find_one_and_update for atomic operation
-        result = self.collection.find_one_and_update(
-            {"user_id": user_id, "question_id": question_id},
+        pipeline = [
             {
                 "$set": {
                     "theme_id": theme_id,
                     "last_seen": now,
-                    "outcome": outcome
-                },
-                "$inc": {"times_answered": 1},
-                "$setOnInsert": {
-                    # id is generated by model usually, but here we let mongo handle _id 
-                    # or we could generate a UUID if we strictly need the 'id' field from our model
-                    # For simplicity in this upsert, we might rely on mongo's _id or add one if needed by app logic
-                    # Let's just rely on the fields we use.
+                    "outcome": outcome_value,
+                    "times_answered": {"$add": [{"$ifNull": ["$times_answered", 0]}, 1]},
+                    "box": new_box
                 }
             },
-            upsert=True,
-            return_document=True
-        )
-        # Note: $setOnInsert doesn't work well for 'id' UUID generation inside mongo. 
-        # If we really need a UUID 'id' for every doc, we might need a two-step process or client-side check.
-        # However, for this look-up table, _id is sufficient or we can ignore the 'id' field requirement if purely internal.
-        # To be safe with our Pydantic model which puts a default UUID, let's just do a check or accept that 
-        # created docs via upsert might miss the explicit 'id' string field unless we provide it.
-        # Given this is a join/history table, maybe we don't strictly need a public ID for the record itself yet.
+            {
+                "$set": {
+                    "next_due": {
+                        "$add": [
+                            now,
+                            {"$multiply": [
+                                {"$arrayElemAt": [LEITNER_INTERVAL_DAYS, {"$subtract": ["$box", 1]}]},
+                                MILLISECONDS_PER_DAY
+                            ]}
+                        ]
+                    }
+                }
+            }
+        ]
+        return UpdateOne({"user_id": user_id, "question_id": question_id}, pipeline, upsert=True)
+    
+    def upsert_interaction(self, user_id: str, question_id: str, theme_id: str, outcome: OutcomeType) -> None:
+        """
+        Update or insert a record of a user answering a question.
+        Increments times_answered, updates last_seen/outcome and reschedules next_due.
+        """
+        self.bulk_upsert_interactions(user_id, [(question_id, theme_id, outcome)])
+    
+    @property
+    def reads_packed(self) -> bool:
+        return self.mode in ("packed", "dual")
+    
+    @traced
+    def bulk_upsert_interactions(self, user_id: str, interactions: List[Tuple[str, str, OutcomeType]]) -> None:
+        """Record (question_id, theme_id, outcome) interactions in one round trip"""
+        if not interactions:
+            return
+        self._entries_cache.clear()
+        if self.mode in ("packed", "dual"):
+            self.packed.bulk_upsert_interactions(user_id, interactions)
+        if self.mode in ("legacy", "dual"):
+            self._legacy_bulk_upsert(user_id, interactions)
+    
+    def _legacy_bulk_upsert(self, user_id: str, interactions: List[Tuple[str, str, OutcomeType]]) -> None:
+        now = datetime.utcnow()
+        operations = [
+            self._interaction_update(user_id, question_id, theme_id, outcome, now)
+            for question_id, theme_id, outcome in interactions
+        ]
+        self.collection.bulk_write(operations, ordered=False)
+    
+    def _read_entries(self, user_id: str, theme_ids: List[str]) -> List[dict]:
+        """
+        Packed history entries, plus legacy ones for unconverted themes in dual mode.
+        Dual writes keep legacy documents complete, so an unconverted theme reads only those,
+        whatever packed writes it has received since the switch.
+        """
+        key = (user_id, tuple(sorted(theme_ids)))
+        if key not in self._entries_cache:
+            dual = self.mode == "dual"
+            entries, packed_themes = self.packed.get_entries(user_id, theme_ids, converted_only=dual)
+            if dual:
+                packed_set = set(packed_themes)
+                legacy_themes = [t for t in theme_ids if t not in packed_set]
+                if legacy_themes:
+                    entries.extend(self.collection.find(
+                        {"user_id": user_id, "theme_id": {"$in": legacy_themes}},
+                        {"_id": 0}
+                    ))
+            self._entries_cache[key] = entries
+        return self._entries_cache[key]
+    
+    @traced
+    def filter_seen(self, user_id: str, question_themes: Dict[str, str]) -> Set[str]:
+        """
+        Which of the given questions (question_id -> theme_id) the user has answered.
+        Checks only those ids, with one $in, instead of loading the user's history.
+        """
+        seen: Set[str] = set()
+        legacy_ids = list(question_themes) if self.mode == "legacy" else []
+        
+        if self.reads_packed:
+            by_theme: Dict[str, List[str]] = {}
+            for question_id, theme_id in question_themes.items():
+                by_theme.setdefault(theme_id, []).append(question_id)
+            positions = {
+                theme_id: self.packed.question_index.find_positions(theme_id, question_ids)
+                for theme_id, question_ids in by_theme.items()
+            }
+            docs = self.packed.get_seen_positions(
+                user_id, {theme_id: list(p.values()) for theme_id, p in positions.items() if p}
+            )
+            for theme_id, question_ids in by_theme.items():
+                converted, seen_positions = docs.get(theme_id, (False, set()))
+                if self.mode == "dual" and not converted:
+                    legacy_ids.extend(question_ids)
+                    continue
+                seen.update(q_id for q_id, pos in positions[theme_id].items() if pos in seen_positions)
+        
+        if legacy_ids:
+            cursor = self.collection.find(
+                {"user_id": user_id, "question_id": {"$in": legacy_ids}},
+                {"_id": 0, "question_id": 1}
+            )
+            seen.update(doc["question_id"] for doc in cursor)
+        return seen
+    
+    @traced
+    def get_due_question_ids(self, user_id: str, theme_ids: List[str], limit: int) -> List[str]:
+        """
+        Seen questions to review: lowest Leitner box first, so just-failed questions (box 1)
+        come before ones answered right, then most overdue next_due. Records from before
+        scheduling existed have no box or next_due and sort first.
+        Bounded sort+limit on (user_id, theme_id, box, next_due), or a server-side top-k over packed documents.
+        """
+        candidates: List[Tuple[int, int, str]] = []
+        legacy_themes = theme_ids if self.mode == "legacy" else []
+        
+        if self.reads_packed:
+            packed_themes = theme_ids
+            if self.mode == "dual":
+                packed_themes = self.packed.get_converted_theme_ids(user_id, theme_ids)
+                legacy_themes = [t for t in theme_ids if t not in set(packed_themes)]
+            if packed_themes:
+                due = self.packed.get_due_positions(user_id, packed_themes, limit)
+                by_theme: Dict[str, List[int]] = {}
+                for theme_id, position, _, _ in due:
+                    by_theme.setdefault(theme_id, []).append(position)
+                resolved = {
+                    theme_id: dict(zip(positions, self.packed.question_index.resolve(theme_id, positions)))
+                    for theme_id, positions in by_theme.items()
+                }
+                candidates.extend((box, due_epoch, resolved[theme_id][position])
+                                  for theme_id, position, box, due_epoch in due)
+        
+        if legacy_themes:
+            cursor = self.collection.find(
+                {"user_id": user_id, "theme_id": {"$in": legacy_themes}},
+                {"_id": 0, "question_id": 1, "box": 1, "next_due": 1}
+            ).sort([("box", 1), ("next_due", 1)]).limit(limit)
+            candidates.extend(
+                (doc.get("box") or 0, to_epoch(doc["next_due"]) if doc.get("next_due") else 0, doc["question_id"])
+                for doc in cursor
+            )
+        
+        candidates.sort(key=lambda c: (c[0], c[1]))
+        return [question_id for _, _, question_id in candidates[:limit]]
     
     def get_user_history_by_themes(self, user_id: str, theme_ids: List[str]) -> Dict[str, dict]:
         """
         Get history for a user filtered by themes.
         Returns a dict mapping question_id -> history_data
         """
+        if self.reads_packed:
+            return {entry["question_id"]: entry for entry in self._read_entries(user_id, theme_ids)}
+        
         cursor = self.collection.find(
             {
                 "user_id": user_id,
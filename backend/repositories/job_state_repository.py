@@ -0,0 +1,21 @@
+from config.database import get_database
+from typing import Optional
+from datetime import datetime
+
+class JobStateRepository:
+    """Watermarks of incremental batch jobs"""
+    
+    def __init__(self):
+        self.db = get_database()
+        self.collection = self.db.job_state
+    
+    def get_watermark(self, job_name: str) -> Optional[datetime]:
+        state = self.collection.find_one({"job": job_name}, {"_id": 0, "watermark": 1})
+        return state.get("watermark") if state else None
+    
+    def set_watermark(self, job_name: str, watermark: datetime) -> None:
+        self.collection.update_one(
+            {"job": job_name},
+            {"$set": {"watermark": watermark, "updated_at": datetime.utcnow()}},
+            upsert=True
+        )
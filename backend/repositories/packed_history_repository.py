@@ -0,0 +1,199 @@
+from config.database import get_database
+from repositories.question_index_repository import QuestionIndexRepository
+from models.user_progress import (
+    OutcomeType, PackedThemeHistory, LEITNER_INTERVAL_DAYS,
+    OUTCOME_CODES, OUTCOMES_BY_CODE
+)
+from pymongo import ReplaceOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from typing import Dict, List, Set, Tuple
+from datetime import datetime, timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_DAY = 24 * 60 * 60
+MAX_WRITE_RETRIES = 5
+
+def to_epoch(moment: datetime) -> int:
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+def from_epoch(seconds: int) -> datetime:
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).replace(tzinfo=None)
+
+class PackedHistoryRepository:
+    """
+    User question history packed as one document per user and theme
+    (see PackedThemeHistory), so a user's whole history for a simulacro
+    is at most one document per theme.
+    """
+    
+    def __init__(self):
+        self.db = get_database()
+        self.collection = self.db.user_question_history_packed
+        self.question_index = QuestionIndexRepository()
+    
+    def get_theme_docs(self, user_id: str, theme_ids: List[str]) -> Dict[str, dict]:
+        cursor = self.collection.find(
+            {"user_id": user_id, "theme_id": {"$in": theme_ids}},
+            {"_id": 0}
+        )
+        return {doc["theme_id"]: doc for doc in cursor}
+    
+    @staticmethod
+    def apply_interaction(doc: dict, position: int, outcome: OutcomeType, now_epoch: int,
+                          times_answered: int = 1) -> None:
+        """Apply one answer to a packed document in place, with the same Leitner rules as upsert_interaction"""
+        outcome = OutcomeType(outcome)
+        try:
+            i = doc["q"].index(position)
+        except ValueError:
+            for field in ("q", "o", "t", "n", "b", "d"):
+                doc[field].append(0)
+            i = len(doc["q"]) - 1
+            doc["q"][i] = position
+        
+        box = min(doc["b"][i] + 1, len(LEITNER_INTERVAL_DAYS)) if outcome == OutcomeType.CORRECT else 1
+        doc["o"][i] = OUTCOME_CODES[outcome]
+        doc["t"][i] = now_epoch
+        doc["n"][i] += times_answered
+        doc["b"][i] = box
+        doc["d"][i] = now_epoch + LEITNER_INTERVAL_DAYS[box - 1] * SECONDS_PER_DAY
+    
+    def bulk_upsert_interactions(self, user_id: str, interactions: List[Tuple[str, str, OutcomeType]]) -> None:
+        """Record (question_id, theme_id, outcome) interactions with one read and one write per theme"""
+        by_theme: Dict[str, List[Tuple[str, OutcomeType]]] = {}
+        for question_id, theme_id, outcome in interactions:
+            by_theme.setdefault(theme_id, []).append((question_id, outcome))
+        if not by_theme:
+            return
+        
+        positions = {
+            theme_id: self.question_index.get_positions(theme_id, [q_id for q_id, _ in answers])
+            for theme_id, answers in by_theme.items()
+        }
+        now_epoch = to_epoch(datetime.now(timezone.utc))
+        pending = list(by_theme)
+        
+        for _ in range(MAX_WRITE_RETRIES):
+            docs = self.get_theme_docs(user_id, pending)
+            operations = []
+            for theme_id in pending:
+                doc = docs.get(theme_id) or PackedThemeHistory(user_id=user_id, theme_id=theme_id).model_dump()
+                version = doc["v"]
+                for question_id, outcome in by_theme[theme_id]:
+                    self.apply_interaction(doc, positions[theme_id][question_id], outcome, now_epoch)
+                doc["v"] = version + 1
+                # A version mismatch turns into a failed insert on the unique (user_id, theme_id) index
+                operations.append(ReplaceOne(
+                    {"user_id": user_id, "theme_id": theme_id, "v": version}, doc, upsert=True
+                ))
+            
+            try:
+                self.collection.bulk_write(operations, ordered=False)
+                return
+            except BulkWriteError as e:
+                errors = e.details.get("writeErrors", [])
+                if any(err.get("code") != 11000 for err in errors):
+                    raise
+                pending = [pending[err["index"]] for err in errors]
+        
+        raise RuntimeError(f"Concurrent history updates for user {user_id} kept conflicting")
+    
+    def get_entries(self, user_id: str, theme_ids: List[str],
+                    converted_only: bool = False) -> Tuple[List[dict], List[str]]:
+        """
+        Decoded history entries for the themes, plus the themes they came from.
+        converted_only skips documents the pack job has not converted yet.
+        """
+        docs = self.get_theme_docs(user_id, theme_ids)
+        if converted_only:
+            docs = {theme_id: doc for theme_id, doc in docs.items() if doc.get("converted")}
+        entries = []
+        for theme_id, doc in docs.items():
+            question_ids = self.question_index.resolve(theme_id, doc["q"])
+            for i, question_id in enumerate(question_ids):
+                entries.append({
+                    "question_id": question_id,
+                    "theme_id": theme_id,
+                    "outcome": OUTCOMES_BY_CODE[doc["o"][i]],
+                    "last_seen": from_epoch(doc["t"][i]),
+                    "times_answered": doc["n"][i],
+                    "box": doc["b"][i],
+                    "next_due": from_epoch(doc["d"][i])
+                })
+        return entries, list(docs)
+    
+    def get_converted_theme_ids(self, user_id: str, theme_ids: List[str]) -> List[str]:
+        return [
+            doc["theme_id"]
+            for doc in self.collection.find(
+                {"user_id": user_id, "theme_id": {"$in": theme_ids}, "converted": True},
+                {"_id": 0, "theme_id": 1}
+            )
+        ]
+    
+    def get_seen_positions(self, user_id: str,
+                           positions_by_theme: Dict[str, List[int]]) -> Dict[str, Tuple[bool, Set[int]]]:
+        """
+        Which of the given positions each theme document holds, with its converted flag.
+        The intersection runs server side, so only the matches come back.
+        """
+        if not positions_by_theme:
+            return {}
+        candidates = {
+            "$switch": {
+                "branches": [
+                    {"case": {"$eq": ["$theme_id", theme_id]}, "then": {"$literal": positions}}
+                    for theme_id, positions in positions_by_theme.items()
+                ],
+                "default": []
+            }
+        }
+        pipeline = [
+            {"$match": {"user_id": user_id, "theme_id": {"$in": list(positions_by_theme)}}},
+            {"$project": {
+                "_id": 0,
+                "theme_id": 1,
+                "converted": {"$ifNull": ["$converted", False]},
+                "seen": {"$setIntersection": ["$q", candidates]}
+            }}
+        ]
+        return {
+            doc["theme_id"]: (doc["converted"], set(doc["seen"]))
+            for doc in self.collection.aggregate(pipeline)
+        }
+    
+    def get_due_positions(self, user_id: str, theme_ids: List[str], limit: int) -> List[Tuple[str, int, int, int]]:
+        """
+        (theme_id, position, box, next_due epoch) of the entries to review first: lowest box,
+        then most overdue. Sorted and limited server side so only `limit` entries come back.
+        """
+        pipeline = [
+            {"$match": {"user_id": user_id, "theme_id": {"$in": theme_ids}}},
+            {"$project": {"_id": 0, "theme_id": 1, "entry": {"$zip": {"inputs": ["$q", "$b", "$d"]}}}},
+            {"$unwind": "$entry"},
+            {"$project": {
+                "theme_id": 1,
+                "q": {"$arrayElemAt": ["$entry", 0]},
+                "b": {"$arrayElemAt": ["$entry", 1]},
+                "d": {"$arrayElemAt": ["$entry", 2]}
+            }},
+            {"$sort": {"b": 1, "d": 1}},
+            {"$limit": limit}
+        ]
+        return [(doc["theme_id"], doc["q"], doc["b"], doc["d"]) for doc in self.collection.aggregate(pipeline)]
+    
+    def replace_theme_history(self, user_id: str, theme_id: str, doc: dict, expected_version: int) -> bool:
+        """Write a fully built packed document if nobody changed it meanwhile"""
+        try:
+            self.collection.replace_one(
+                {"user_id": user_id, "theme_id": theme_id, "v": expected_version},
+                {**doc, "v": expected_version + 1},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
@@ -1,14 +1,81 @@
 from config.database import get_database
 from models.practical_set import PracticalSetInDB, PracticalSetCreate, PracticalSetQuestionInDB
-from typing import List, Optional
+from typing import List, Optional, Set
 import logging
+import random
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+# Reload the pool periodically so soft-deletes done by other workers are picked up
+ACTIVE_POOL_TTL_SECONDS = 300
+
+class _ActivePracticalSetPool:
+    """In-memory pool of active practical set ids for O(1) random selection"""
+    ids: List[str] = []
+    positions: dict = {}
+    loaded_at: Optional[float] = None
+    lock = threading.Lock()
+
+    @classmethod
+    def is_stale(cls) -> bool:
+        return cls.loaded_at is None or time.monotonic() - cls.loaded_at > ACTIVE_POOL_TTL_SECONDS
+
+    @classmethod
+    def load(cls, ids: List[str]) -> None:
+        with cls.lock:
+            cls.ids = list(ids)
+            cls.positions = {set_id: idx for idx, set_id in enumerate(cls.ids)}
+            cls.loaded_at = time.monotonic()
+
+    @classmethod
+    def add(cls, set_id: str) -> None:
+        with cls.lock:
+            if cls.loaded_at is None or set_id in cls.positions:
+                return
+            cls.positions[set_id] = len(cls.ids)
+            cls.ids.append(set_id)
+
+    @classmethod
+    def remove(cls, set_id: str) -> None:
+        """Swap-remove so deletion stays O(1)"""
+        with cls.lock:
+            idx = cls.positions.pop(set_id, None)
+            if idx is None:
+                return
+            last = cls.ids.pop()
+            if idx < len(cls.ids):
+                cls.ids[idx] = last
+                cls.positions[last] = idx
+
+    @classmethod
+    def sample(cls, count: int, exclude: Optional[Set[str]] = None) -> List[str]:
+        with cls.lock:
+            if not exclude:
+                return random.sample(cls.ids, min(count, len(cls.ids)))
+            # Rejection sampling stays O(1) while most sets are still available
+            picked = []
+            for _ in range(count * 8):
+                if len(picked) == count or not cls.ids:
+                    break
+                candidate = random.choice(cls.ids)
+                if candidate not in exclude and candidate not in picked:
+                    picked.append(candidate)
+            if len(picked) < count:
+                remaining = [i for i in cls.ids if i not in exclude and i not in picked]
+                picked.extend(random.sample(remaining, min(count - len(picked), len(remaining))))
+            return picked
+
 class PracticalSetRepository:
     def __init__(self):
         self.db = get_database()
         self.collection = self.db.practical_sets
+        self.attempt_collection = self.db.attempts
+    
+    @staticmethod
+    def is_active_pool_warm() -> bool:
+        return _ActivePracticalSetPool.loaded_at is not None
     
     def create(self, practical_set_data: PracticalSetCreate, created_by: str) -> PracticalSetInDB:
         """Create a new practical set"""
@@ -28,6 +95,7 @@ class PracticalSetRepository:
         
         practical_set_dict = practical_set.model_dump()
         self.collection.insert_one(practical_set_dict)
+        _ActivePracticalSetPool.add(practical_set.id)
         logger.info(f"Practical set created: {practical_set.id}")
         return practical_set
     
@@ -58,16 +126,46 @@ class PracticalSetRepository:
         )
         return practical_sets
     
-    def get_random(self, count: int = 1) -> List[dict]:
-        """Get random practical sets"""
-        pipeline = [
-            {"$match": {"is_active": True}},
-            {"$sample": {"size": count}},
-            {"$project": {"_id": 0}}
-        ]
-        practical_sets = list(self.collection.aggregate(pipeline))
+    def _ensure_pool(self) -> None:
+        if _ActivePracticalSetPool.is_stale():
+            ids = self.collection.distinct("id", {"is_active": True})
+            _ActivePracticalSetPool.load(ids)
+            logger.info(f"Loaded {len(ids)} active practical set ids into pool")
+    
+    def get_random(self, count: int = 1, exclude_ids: Optional[Set[str]] = None) -> List[dict]:
+        """Get random practical sets, picked from the in-memory pool of active ids"""
+        self._ensure_pool()
+        practical_sets: List[dict] = []
+        excluded = set(exclude_ids or ())
+        
+        # Re-sample when picked ids were deactivated by another worker since the pool was loaded
+        while len(practical_sets) < count:
+            picked_ids = _ActivePracticalSetPool.sample(count - len(practical_sets), excluded)
+            if not picked_ids:
+                break
+            
+            found = list(
+                self.collection.find({"id": {"$in": picked_ids}, "is_active": True}, {"_id": 0})
+            )
+            found_ids = {ps["id"] for ps in found}
+            for set_id in picked_ids:
+                if set_id not in found_ids:
+                    _ActivePracticalSetPool.remove(set_id)
+            
+            practical_sets.extend(found)
+            excluded.update(picked_ids)
+        
         return practical_sets
     
+    def get_attempted_ids(self, user_id: str) -> Set[str]:
+        """Get ids of practical sets the user has already attempted"""
+        return set(
+            self.attempt_collection.distinct(
+                "practical_set_id",
+                {"user_id": user_id, "practical_set_id": {"$ne": None}}
+            )
+        )
+    
     def update(self, practical_set_id: str, update_data: dict) -> bool:
         """Update a practical set"""
         result = self.collection.update_one(
@@ -82,6 +180,7 @@ class PracticalSetRepository:
             {"id": practical_set_id},
             {"$set": {"is_active": False}}
         )
+        _ActivePracticalSetPool.remove(practical_set_id)
         return result.modified_count > 0
     
     def count(self) -> int:
@@ -0,0 +1,76 @@
+from config.database import get_database
+from typing import Dict, List
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# How often a lookup that misses may reload a theme's index to pick up other workers' appends
+INDEX_REFRESH_SECONDS = 60
+
+class _QuestionIndexCache:
+    """theme_id -> question ids in index order; positions only ever get appended"""
+    themes: Dict[str, List[str]] = {}
+    loaded_at: Dict[str, float] = {}
+    lock = threading.Lock()
+
+class QuestionIndexRepository:
+    """
+    Stable small-integer positions for question ids, one ordered list per theme.
+    Packed per-user history stores these positions instead of UUID strings.
+    """
+    
+    def __init__(self):
+        self.db = get_database()
+        self.collection = self.db.question_index
+    
+    def _load(self, theme_ids: List[str]) -> None:
+        for doc in self.collection.find({"theme_id": {"$in": theme_ids}}, {"_id": 0}):
+            with _QuestionIndexCache.lock:
+                _QuestionIndexCache.themes[doc["theme_id"]] = doc["question_ids"]
+                _QuestionIndexCache.loaded_at[doc["theme_id"]] = time.monotonic()
+    
+    def get_question_ids(self, theme_id: str) -> List[str]:
+        """Question ids of a theme in index order"""
+        if theme_id not in _QuestionIndexCache.themes:
+            self._load([theme_id])
+        return _QuestionIndexCache.themes.get(theme_id, [])
+    
+    def resolve(self, theme_id: str, positions: List[int]) -> List[str]:
+        question_ids = self.get_question_ids(theme_id)
+        if positions and max(positions) >= len(question_ids):
+            # Another worker appended questions since this theme was cached
+            self._load([theme_id])
+            question_ids = _QuestionIndexCache.themes.get(theme_id, [])
+        return [question_ids[p] for p in positions]
+    
+    def find_positions(self, theme_id: str, question_ids: List[str]) -> Dict[str, int]:
+        """Positions of the given questions that are already indexed; unlike get_positions it never writes"""
+        position_map = {q_id: idx for idx, q_id in enumerate(self.get_question_ids(theme_id))}
+        stale = time.monotonic() - _QuestionIndexCache.loaded_at.get(theme_id, 0) > INDEX_REFRESH_SECONDS
+        if stale and any(q_id not in position_map for q_id in question_ids):
+            self._load([theme_id])
+            position_map = {q_id: idx for idx, q_id in enumerate(_QuestionIndexCache.themes.get(theme_id, []))}
+        return {q_id: position_map[q_id] for q_id in question_ids if q_id in position_map}
+    
+    def get_positions(self, theme_id: str, question_ids: List[str]) -> Dict[str, int]:
+        """Positions of the given questions, appending the ones not indexed yet"""
+        indexed = self.get_question_ids(theme_id)
+        indexed_set = set(indexed)
+        missing = [q_id for q_id in question_ids if q_id not in indexed_set]
+        if missing:
+            doc = self.collection.find_one_and_update(
+                {"theme_id": theme_id},
+                {"$addToSet": {"question_ids": {"$each": missing}}},
+                upsert=True,
+                return_document=True,
+                projection={"_id": 0}
+            )
+            indexed = doc["question_ids"]
+            with _QuestionIndexCache.lock:
+                _QuestionIndexCache.themes[theme_id] = indexed
+                _QuestionIndexCache.loaded_at[theme_id] = time.monotonic()
+        
+        position_map = {q_id: idx for idx, q_id in enumerate(indexed)}
+        return {q_id: position_map[q_id] for q_id in question_ids}
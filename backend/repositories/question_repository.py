@@ -1,6 +1,6 @@
 from config.database import get_database
 from models.question import QuestionInDB, QuestionCreate
-from typing import List, Optional
+from typing import List, Optional, Set
 import logging
 import random
 
@@ -51,10 +51,14 @@ class QuestionRepository:
         result = self.collection.delete_many({"id": {"$in": question_ids}})
         return result.deleted_count
     
-    def get_random_by_themes(self, theme_ids: List[str], count: int) -> List[dict]:
+    def get_random_by_themes(self, theme_ids: List[str], count: int,
+                             exclude_ids: Optional[Set[str]] = None) -> List[dict]:
         """Get random questions from specified themes"""
+        match = {"theme_id": {"$in": theme_ids}}
+        if exclude_ids:
+            match["id"] = {"$nin": list(exclude_ids)}
         pipeline = [
-            {"$match": {"theme_id": {"$in": theme_ids}}},
+            {"$match": match},
             {"$sample": {"size": count}},
             {"$project": {"_id": 0}}
         ]
@@ -69,6 +73,14 @@ class QuestionRepository:
         ))
         return questions
     
+    def get_by_ids(self, question_ids: List[str]) -> List[dict]:
+        """Get questions by ID, in the order the IDs are given"""
+        questions = {
+            q["id"]: q
+            for q in self.collection.find({"id": {"$in": question_ids}}, {"_id": 0})
+        }
+        return [questions[q_id] for q_id in question_ids if q_id in questions]
+    
     def bulk_create(self, questions: List[QuestionInDB]):
         """Bulk insert questions"""
         if questions:
@@ -0,0 +1,44 @@
+from config.database import get_database
+from pymongo import UpdateOne
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class QuestionStatsRepository:
+    def __init__(self):
+        self.db = get_database()
+        self.collection = self.db.question_stats
+    
+    def get_by_question_id(self, question_id: str) -> Optional[dict]:
+        return self.collection.find_one({"question_id": question_id}, {"_id": 0, "sums": 0})
+    
+    def get_by_question_ids(self, question_ids: List[str]) -> Dict[str, dict]:
+        cursor = self.collection.find(
+            {"question_id": {"$in": question_ids}},
+            {"_id": 0, "sums": 0}
+        )
+        return {doc["question_id"]: doc for doc in cursor}
+    
+    def get_sums(self, question_ids: List[str]) -> List[dict]:
+        return list(self.collection.find(
+            {"question_id": {"$in": question_ids}},
+            {"_id": 0, "question_id": 1, "sums": 1}
+        ))
+    
+    def add_sums(self, increments: Dict[str, dict]) -> None:
+        """$inc sufficient statistics ({question_id: {field: delta}}) in one bulk write"""
+        operations = [
+            UpdateOne({"question_id": question_id}, {"$inc": fields}, upsert=True)
+            for question_id, fields in increments.items()
+        ]
+        if operations:
+            self.collection.bulk_write(operations, ordered=False)
+    
+    def set_derived(self, derived: Dict[str, dict]) -> None:
+        operations = [
+            UpdateOne({"question_id": question_id}, {"$set": fields})
+            for question_id, fields in derived.items()
+        ]
+        if operations:
+            self.collection.bulk_write(operations, ordered=False)
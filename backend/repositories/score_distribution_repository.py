@@ -0,0 +1,40 @@
+from config.database import get_database
+from typing import Dict, List
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ScoreDistributionRepository:
+    def __init__(self):
+        self.db = get_database()
+        self.collection = self.db.score_distributions
+    
+    def get_all(self) -> List[dict]:
+        return list(self.collection.find({}, {"_id": 0}))
+    
+    def add_counts(self, exam_type: str, scale: float, bin_width: float, counts: Dict[int, int]) -> None:
+        """Merge bin counts into the persisted distribution of an exam type"""
+        if not counts:
+            return
+        self.collection.update_one(
+            {"exam_type": exam_type},
+            {
+                "$inc": {f"counts.{bin_index}": count for bin_index, count in counts.items()},
+                "$set": {"scale": scale, "bin_width": bin_width, "updated_at": datetime.utcnow()}
+            },
+            upsert=True
+        )
+    
+    def replace(self, exam_type: str, scale: float, bin_width: float, counts: Dict[int, int]) -> None:
+        self.collection.replace_one(
+            {"exam_type": exam_type},
+            {
+                "exam_type": exam_type,
+                "scale": scale,
+                "bin_width": bin_width,
+                "counts": {str(bin_index): count for bin_index, count in counts.items()},
+                "updated_at": datetime.utcnow()
+            },
+            upsert=True
+        )
@@ -28,6 +28,10 @@ class ThemeRepository:
     def get_by_id(self, theme_id: str) -> Optional[dict]:
         return self.collection.find_one({"id": theme_id}, {"_id": 0})
     
+    def get_by_ids(self, theme_ids: List[str]) -> dict:
+        cursor = self.collection.find({"id": {"$in": theme_ids}}, {"_id": 0})
+        return {theme["id"]: theme for theme in cursor}
+    
     def get_by_code(self, code: str) -> Optional[dict]:
         return self.collection.find_one({"code": code}, {"_id": 0})
     
@@ -0,0 +1,37 @@
+from config.database import get_database
+from typing import List, Optional
+from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TokenRevocationRepository:
+    """
+    Auth-relevant changes per user (minimum valid token version, role, active flag).
+    Workers mirror this small collection in memory to validate tokens without user reads.
+    """
+    
+    def __init__(self):
+        self.db = get_database()
+        self.collection = self.db.token_revocations
+    
+    def upsert(self, user_id: str, token_version: int, role: str, is_active: bool) -> None:
+        self.collection.update_one(
+            {"user_id": user_id},
+            {
+                "$set": {
+                    "token_version": token_version,
+                    "role": role,
+                    "is_active": is_active
+                },
+                # Server time, so workers with skewed clocks agree on the order of changes
+                "$currentDate": {"updated_at": True}
+            },
+            upsert=True
+        )
+        logger.info(f"Token revocation entry updated for user {user_id}")
+    
+    def get_changed_since(self, since: Optional[datetime]) -> List[dict]:
+        """Entries updated at or after `since`, or all of them when it is None"""
+        query = {"updated_at": {"$gte": since}} if since else {}
+        return list(self.collection.find(query, {"_id": 0}).sort("updated_at", 1))
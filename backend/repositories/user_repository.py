@@ -1,6 +1,5 @@
 from config.database import get_database
 from models.user import UserInDB, UserCreate
-from utils.security import get_password_hash
 from typing import Optional
 import logging
 
@@ -11,12 +10,12 @@ class UserRepository:
         self.db = get_database()
         self.collection = self.db.users
     
-    def create(self, user_data: UserCreate) -> UserInDB:
+    def create(self, user_data: UserCreate, hashed_password: str) -> UserInDB:
         user = UserInDB(
             email=user_data.email,
             display_name=user_data.display_name,
             role=user_data.role,
-            hashed_password=get_password_hash(user_data.password)
+            hashed_password=hashed_password
         )
         
         user_dict = user.model_dump()
@@ -30,5 +29,25 @@ class UserRepository:
     def get_by_id(self, user_id: str) -> Optional[dict]:
         return self.collection.find_one({"id": user_id}, {"_id": 0})
     
+    def update_password_hash(self, user_id: str, hashed_password: str) -> None:
+        self.collection.update_one({"id": user_id}, {"$set": {"hashed_password": hashed_password}})
+    
+    def update_auth_fields(self, user_id: str, update_data: dict) -> Optional[dict]:
+        """Update role/is_active and return the updated user"""
+        return self.collection.find_one_and_update(
+            {"id": user_id},
+            {"$set": update_data},
+            projection={"_id": 0},
+            return_document=True
+        )
+    
+    def bump_token_version(self, user_id: str) -> Optional[dict]:
+        return self.collection.find_one_and_update(
+            {"id": user_id},
+            {"$inc": {"token_version": 1}},
+            projection={"_id": 0},
+            return_document=True
+        )
+    
     def email_exists(self, email: str) -> bool:
         return self.collection.find_one({"email": email}) is not None
\ No newline at end of file
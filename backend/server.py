@@ -1,9 +1,24 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from config.database import connect_to_mongo, close_mongo_connection
 from services.theme_service import ThemeService
-from api import auth, themes, questions, exams, practical_sets, analytics
+from services.score_distribution_service import ScoreDistributionService
+from services.janitor_service import JanitorService
+from services.readiness_service import ReadinessService
+from middleware.revocation_filter import RevocationFilter
+from utils.security import PasswordPool
+from utils.metrics import render_prometheus
+from utils.loop_monitor import LoopLagMonitor
+from utils.tracing import TraceExporter
+from middleware.metrics import MetricsMiddleware
+from middleware.request_context import RequestContextMiddleware
+from middleware.db_budget import DbBudgetMiddleware
+from middleware.tracing import TracingMiddleware
+from config.settings import settings
+from starlette.concurrency import run_in_threadpool
+import asyncio
+from api import auth, themes, questions, exams, practical_sets, analytics, system, profiling
 import logging
 
 # Configure logging
@@ -27,11 +42,46 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+if settings.db_budget_mode != "off":
+    app.add_middleware(DbBudgetMiddleware)
+if settings.tracing_mode != "off":
+    app.add_middleware(TracingMiddleware)
+app.add_middleware(RequestContextMiddleware)
+
+async def janitor_loop():
+    """Periodic cleanup of abandoned attempts and orphan exams"""
+    while True:
+        await asyncio.sleep(settings.janitor_interval_minutes * 60)
+        try:
+            await run_in_threadpool(JanitorService().run)
+        except Exception as e:
+            logger.error(f"Janitor run failed: {e}")
+
+async def revocation_sync_loop():
+    """Keep the in-memory token revocation filter in sync with Mongo"""
+    while True:
+        try:
+            await run_in_threadpool(RevocationFilter.sync)
+        except Exception as e:
+            logger.error(f"Token revocation sync failed: {e}")
+        await asyncio.sleep(settings.auth_revocation_sync_seconds)
+
+async def score_distribution_flush_loop():
+    """Persist buffered scores and pick up other workers' counts off the request path"""
+    while True:
+        try:
+            await run_in_threadpool(ScoreDistributionService().flush)
+        except Exception as e:
+            logger.error(f"Score distribution flush failed: {e}")
+        await asyncio.sleep(settings.score_distribution_flush_seconds)
 
 # Startup and shutdown events
 @app.on_event("startup")
 async def startup_event():
     logger.info("Starting up application...")
+    if settings.loop_monitor_enabled:
+        LoopLagMonitor.start()
     connect_to_mongo()
     
     # Seed initial themes
@@ -41,10 +91,22 @@ async def startup_event():
         logger.info("Initial themes seeded successfully")
     except Exception as e:
         logger.error(f"Error seeding themes: {e}")
+    
+    await asyncio.get_running_loop().run_in_executor(PasswordPool.executor, PasswordPool.calibrate)
+    asyncio.create_task(revocation_sync_loop())
+    asyncio.create_task(score_distribution_flush_loop())
+    
+    if settings.janitor_interval_minutes > 0:
+        asyncio.create_task(janitor_loop())
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down application...")
+    try:
+        ScoreDistributionService().flush()
+    except Exception as e:
+        logger.error(f"Error flushing score distributions: {e}")
+    TraceExporter.close()
     close_mongo_connection()
 
 # Health check
@@ -52,6 +114,20 @@ async def shutdown_event():
 async def health_check():
     return {"status": "healthy", "service": "opositores-api"}
 
+# Readiness check for load balancers
+@app.get("/api/ready")
+async def readiness_check():
+    readiness_service = ReadinessService()
+    ping_seconds = await readiness_service.ping()
+    report = readiness_service.evaluate(ping_seconds)
+    status_code = 200 if report["status"] == "ready" else 503
+    return JSONResponse(status_code=status_code, content=report)
+
+# Prometheus scrape endpoint
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
 # Global exception handler
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -68,6 +144,8 @@ app.include_router(questions.router)
 app.include_router(exams.router)
 app.include_router(practical_sets.router)
 app.include_router(analytics.router)
+app.include_router(system.router)
+app.include_router(profiling.router)
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,25 +1,35 @@
 from repositories.analytics_repository import AnalyticsRepository
 from repositories.theme_repository import ThemeRepository
-from repositories.exam_repository import ExamRepository
 from models.analytics import (
     FailureRecord, FailureAnalytics, StudyPlanItem, 
-    StudyPlanResponse, OverallStats
+    StudyPlanResponse, OverallStats, DailyProgress
 )
-from typing import List, Optional
+from utils.cache import TTLCache
+from config.settings import settings
+from utils.tracing import traced
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException, status
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Analytics responses only change when the user finishes an attempt, so they are cached
+# per user under the stats_version of their user_summary document, which every finish
+# increments. Reading the version costs one indexed lookup and is shared by all workers.
+_analytics_cache = TTLCache(
+    max_entries=settings.analytics_cache_max_entries,
+    ttl_seconds=settings.analytics_cache_ttl_seconds
+)
+
 class AnalyticsService:
     def __init__(self):
         self.analytics_repo = AnalyticsRepository()
         self.theme_repo = ThemeRepository()
-        self.exam_repo = ExamRepository()
     
-    def record_attempt_results(self, attempt_id: str, user_id: str, results: List[dict]) -> None:
-        """Process attempt results and record failures and stats"""
-        # Group results by theme
+    @staticmethod
+    def count_results_by_theme(results: List[dict]) -> Dict[str, Dict[str, int]]:
+        """Group attempt results into per-theme correct/incorrect/unanswered counters"""
         theme_stats = {}
         
         for result in results:
@@ -34,69 +44,88 @@ class AnalyticsService:
                     "unanswered": 0
                 }
             
-            # Record failure if incorrect
-            if result["status"] == "incorrect":
-                failure = FailureRecord(
-                    user_id=user_id,
-                    question_id=result["question_id"],
-                    theme_id=theme_id,
-                    attempt_id=attempt_id,
-                    selected_answer=result.get("selected_answer"),
-                    correct_answer=result["correct_answer"]
-                )
-                self.analytics_repo.record_failure(failure)
-                theme_stats[theme_id]["incorrect"] += 1
-            elif result["status"] == "correct":
-                theme_stats[theme_id]["correct"] += 1
-            elif result["status"] == "unanswered":
-                theme_stats[theme_id]["unanswered"] += 1
+            if result["status"] in theme_stats[theme_id]:
+                theme_stats[theme_id][result["status"]] += 1
+        
+        return theme_stats
+    
+    @traced
+    def record_attempt_results(self, attempt_id: str, user_id: str, results: List[dict],
+                               score: Optional[float] = None,
+                               finished_at: Optional[datetime] = None) -> None:
+        """Process attempt results and record failures and stats"""
+        theme_stats = self.count_results_by_theme(results)
         
-        # Update stats for each theme
-        for theme_id, stats in theme_stats.items():
-            self.analytics_repo.update_user_theme_stats(
+        # Record failures into their monthly buckets in one round trip
+        failures = [
+            FailureRecord(
                 user_id=user_id,
-                theme_id=theme_id,
-                correct=stats["correct"],
-                incorrect=stats["incorrect"],
-                unanswered=stats["unanswered"]
+                question_id=result["question_id"],
+                theme_id=result["theme_id"],
+                attempt_id=attempt_id,
+                selected_answer=result.get("selected_answer"),
+                correct_answer=result["correct_answer"]
             )
+            for result in results
+            if result.get("theme_id") and result["status"] == "incorrect"
+        ]
+        self.analytics_repo.record_failures(failures)
+        
+        # Update stats for all themes in one round trip
+        previous_theme_stats = self.analytics_repo.bulk_update_user_theme_stats(user_id, theme_stats)
+        
+        self.analytics_repo.bulk_update_daily_progress(
+            user_id, finished_at or datetime.now(timezone.utc), theme_stats
+        )
+        
+        self.analytics_repo.update_user_summary(
+            user_id=user_id,
+            score=score,
+            theme_stats=theme_stats,
+            previous_theme_stats=previous_theme_stats
+        )
         
         logger.info(f"Recorded results for attempt {attempt_id}, user {user_id}")
     
+    def bump_stats_version(self, user_id: str) -> None:
+        """Invalidate the user's cached analytics on every worker"""
+        self.analytics_repo.bump_stats_version(user_id)
+    
+    @staticmethod
+    def get_cache_stats() -> dict:
+        return _analytics_cache.stats()
+    
+    def _cached(self, name: str, user_id: str, params: tuple, compute):
+        key = (name, user_id, self.analytics_repo.get_stats_version(user_id), params)
+        found, value = _analytics_cache.get(key)
+        if found:
+            return value
+        value = compute()
+        _analytics_cache.set(key, value)
+        return value
+    
+    @traced
     def get_failure_analytics(self, user_id: str, theme_id: Optional[str] = None, 
                             top: int = 10) -> List[FailureAnalytics]:
         """Get failure analytics for a user"""
-        # Get theme stats
-        theme_stats = self.analytics_repo.get_user_theme_stats(user_id, theme_id)
-        
-        # Get failure counts
-        failure_stats = self.analytics_repo.get_failure_stats_by_theme(user_id)
-        failure_map = {stat["_id"]: stat for stat in failure_stats}
-        
-        analytics = []
-        
-        for stat in theme_stats[:top]:
-            theme = self.theme_repo.get_by_id(stat["theme_id"])
-            if not theme:
-                continue
-            
-            failure_info = failure_map.get(stat["theme_id"], {})
-            
-            analytics.append(FailureAnalytics(
-                theme_id=stat["theme_id"],
-                theme_name=theme["name"],
-                theme_code=theme["code"],
-                failure_count=failure_info.get("failure_count", 0),
-                total_attempts=stat["total_questions_attempted"],
-                accuracy_rate=stat["accuracy_rate"],
-                last_failed_at=failure_info.get("last_failed_at")
-            ))
-        
-        return analytics
+        return self._cached(
+            "failures", user_id, (theme_id, top),
+            lambda: [
+                FailureAnalytics(**row)
+                for row in self.analytics_repo.get_failure_analytics(user_id, theme_id, top)
+            ]
+        )
     
+    @traced
     def generate_study_plan(self, user_id: str, threshold: float = 70.0, 
                           max_themes: int = 10) -> StudyPlanResponse:
         """Generate a personalized study plan based on weak areas"""
+        return self._cached(
+            "study_plan", user_id, (threshold, max_themes),
+            lambda: self._build_study_plan(user_id, threshold, max_themes)
+        )
+    
+    def _build_study_plan(self, user_id: str, threshold: float, max_themes: int) -> StudyPlanResponse:
         # Get weak themes
         weak_themes = self.analytics_repo.get_weak_themes(user_id, threshold, max_themes)
         
@@ -104,10 +133,12 @@ class AnalyticsService:
         failure_stats = self.analytics_repo.get_failure_stats_by_theme(user_id)
         failure_map = {stat["_id"]: stat for stat in failure_stats}
         
+        themes = self.theme_repo.get_by_ids([wt["theme_id"] for wt in weak_themes])
+        
         study_items = []
         
         for idx, weak_theme in enumerate(weak_themes, 1):
-            theme = self.theme_repo.get_by_id(weak_theme["theme_id"])
+            theme = themes.get(weak_theme["theme_id"])
             if not theme:
                 continue
             
@@ -141,29 +172,37 @@ class AnalyticsService:
             total_weak_areas=len(study_items)
         )
     
+    @traced
     def get_overall_stats(self, user_id: str) -> OverallStats:
-        """Get overall statistics for a user"""
-        # Get theme-level stats
-        theme_level_stats = self.analytics_repo.get_overall_stats(user_id)
-        
-        # Get exam-level stats
-        attempts = self.exam_repo.get_user_attempts(user_id)
-        
-        completed_attempts = [a for a in attempts if a.get("finished_at")]
-        scores = [a["score"] for a in completed_attempts if a.get("score") is not None]
+        """Get overall statistics for a user from their materialized summary"""
+        return self._cached("overall_stats", user_id, (), lambda: self._build_overall_stats(user_id))
+    
+    def _build_overall_stats(self, user_id: str) -> OverallStats:
+        summary = self.analytics_repo.get_user_summary(user_id)
+        if summary is None:
+            # Users who finished attempts before summaries existed
+            summary = self.analytics_repo.rebuild_user_summary(user_id)
         
-        # Get weak themes count
-        weak_themes = self.analytics_repo.get_weak_themes(user_id, threshold=70.0)
+        scored_exams = summary.get("scored_exams", 0)
         
         return OverallStats(
             user_id=user_id,
-            total_exams_completed=len(completed_attempts),
-            total_questions_answered=theme_level_stats.get("total_questions", 0),
-            total_correct=theme_level_stats.get("total_correct", 0),
-            total_incorrect=theme_level_stats.get("total_incorrect", 0),
-            total_unanswered=theme_level_stats.get("total_unanswered", 0),
-            overall_accuracy=round(theme_level_stats.get("avg_accuracy", 0.0), 2),
-            average_score=round(sum(scores) / len(scores), 2) if scores else 0.0,
-            best_score=round(max(scores), 2) if scores else 0.0,
-            weak_themes_count=len(weak_themes)
+            total_exams_completed=summary.get("exams_completed", 0),
+            total_questions_answered=summary.get("total_questions", 0),
+            total_correct=summary.get("total_correct", 0),
+            total_incorrect=summary.get("total_incorrect", 0),
+            total_unanswered=summary.get("total_unanswered", 0),
+            overall_accuracy=round(summary.get("avg_theme_accuracy", 0.0), 2),
+            average_score=round(summary.get("score_sum", 0.0) / scored_exams, 2) if scored_exams else 0.0,
+            best_score=round(summary.get("best_score", 0.0), 2),
+            weak_themes_count=summary.get("weak_themes_count", 0)
         )
+    
+    @traced
+    def get_daily_progress(self, user_id: str, days: int = 30,
+                           theme_id: Optional[str] = None) -> List[DailyProgress]:
+        """Get per-day progress for the last N days (today included)"""
+        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        start_day = today - timedelta(days=days - 1)
+        rows = self.analytics_repo.get_daily_progress(user_id, start_day, today, theme_id)
+        return [DailyProgress(**row) for row in rows]
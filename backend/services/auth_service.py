@@ -1,9 +1,12 @@
 from repositories.user_repository import UserRepository
-from models.user import UserCreate, UserLogin, UserInDB, Token
-from utils.security import verify_password, create_access_token
+from repositories.token_revocation_repository import TokenRevocationRepository
+from models.user import UserCreate, UserLogin, UserInDB, Token, UserAdminUpdate
+from utils.security import verify_password_async, get_password_hash_async, needs_rehash, create_access_token
+from middleware.revocation_filter import RevocationFilter
 from fastapi import HTTPException, status
 from datetime import timedelta
 from config.settings import settings
+from utils.tracing import traced
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,8 +14,10 @@ logger = logging.getLogger(__name__)
 class AuthService:
     def __init__(self):
         self.user_repo = UserRepository()
+        self.revocation_repo = TokenRevocationRepository()
     
-    def register(self, user_data: UserCreate) -> UserInDB:
+    @traced
+    async def register(self, user_data: UserCreate) -> UserInDB:
         # Check if email already exists
         if self.user_repo.email_exists(user_data.email):
             raise HTTPException(
@@ -20,13 +25,15 @@ class AuthService:
                 detail="Email already registered"
             )
         
-        user = self.user_repo.create(user_data)
+        hashed_password = await get_password_hash_async(user_data.password)
+        user = self.user_repo.create(user_data, hashed_password)
         return user
     
-    def login(self, credentials: UserLogin) -> Token:
+    @traced
+    async def login(self, credentials: UserLogin) -> Token:
         user = self.user_repo.get_by_email(credentials.email)
         
-        if not user or not verify_password(credentials.password, user["hashed_password"]):
+        if not user or not await verify_password_async(credentials.password, user["hashed_password"]):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password"
@@ -38,10 +45,67 @@ class AuthService:
                 detail="Inactive user"
             )
         
+        if needs_rehash(user["hashed_password"]):
+            hashed_password = await get_password_hash_async(credentials.password)
+            self.user_repo.update_password_hash(user["id"], hashed_password)
+            logger.info(f"Rehashed password for user {user['id']} at the current bcrypt cost")
+        
         access_token_expires = timedelta(minutes=settings.jwt_access_token_expire_minutes)
         access_token = create_access_token(
-            data={"sub": user["email"], "role": user["role"]},
+            data={
+                "sub": user["email"],
+                "uid": user["id"],
+                "role": user["role"],
+                "active": user.get("is_active", True),
+                "tv": user.get("token_version", 0)
+            },
             expires_delta=access_token_expires
         )
         
-        return Token(access_token=access_token, token_type="bearer")
\ No newline at end of file
+        return Token(access_token=access_token, token_type="bearer")
+    
+    def get_user(self, user_id: str) -> dict:
+        user = self.user_repo.get_by_id(user_id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        return user
+    
+    def _publish_auth_state(self, user: dict) -> None:
+        """Propagate role/active/token version changes to every worker's revocation filter"""
+        self.revocation_repo.upsert(
+            user_id=user["id"],
+            token_version=user.get("token_version", 0),
+            role=user["role"],
+            is_active=user.get("is_active", True)
+        )
+        # Apply it on this worker right away instead of at the next periodic sync
+        RevocationFilter.sync()
+    
+    def update_user_access(self, user_id: str, update: UserAdminUpdate) -> dict:
+        update_data = update.model_dump(exclude_none=True)
+        if not update_data:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Nothing to update"
+            )
+        user = self.user_repo.update_auth_fields(user_id, update_data)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        self._publish_auth_state(user)
+        return user
+    
+    def revoke_tokens(self, user_id: str) -> None:
+        """Invalidate every token issued to the user so far"""
+        user = self.user_repo.bump_token_version(user_id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
+            )
+        self._publish_auth_state(user)
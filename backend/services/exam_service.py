@@ -1,13 +1,17 @@
 from repositories.exam_repository import ExamRepository
 from repositories.question_repository import QuestionRepository
+from repositories.practical_set_repository import PracticalSetRepository
 from models.exam import (
     ExamCreate, ExamInDB, QuestionSnapshot, 
     AttemptStart, AttemptInDB, AnswerSubmit
 )
 from models.user_progress import OutcomeType
 from repositories.history_repository import HistoryRepository
-import random
-from typing import List, Dict, Any, Optional
+from repositories.attempt_archive_repository import AttemptArchiveRepository
+from services.score_distribution_service import ScoreDistributionService
+from utils.scoring import calculate_score
+from utils.tracing import traced
+from typing import List, Optional, Set
 from fastapi import HTTPException, status
 from datetime import datetime, timezone
 import logging
@@ -18,15 +22,24 @@ EXAM_NOT_FOUND_MESSAGE = "Exam not found"
 ATTEMPT_NOT_FOUND_MESSAGE = "Attempt not found"
 NOT_AUTHORIZED_MESSAGE = "Not authorized"
 
+# Unseen questions are sampled count * UNSEEN_BATCH_FACTOR at a time, for at most
+# UNSEEN_SAMPLE_ROUNDS rounds, before falling back to the review queue
+UNSEEN_BATCH_FACTOR = 3
+UNSEEN_SAMPLE_ROUNDS = 2
+
 class ExamService:
     def __init__(self):
         self.exam_repo = ExamRepository()
         self.question_repo = QuestionRepository()
+        self.practical_set_repo = PracticalSetRepository()
         self.history_repo = HistoryRepository()
+        self.archive_repo = AttemptArchiveRepository()
+        self.score_distribution_service = ScoreDistributionService()
         # Import here to avoid circular dependency
         from services.analytics_service import AnalyticsService
         self.analytics_service = AnalyticsService()
     
+    @traced
     def generate_exam(self, exam_data: ExamCreate, user_id: str) -> dict:
         """Generate an exam by selecting random questions from specified themes"""
         
@@ -41,6 +54,13 @@ class ExamService:
                 detail="At least one theme must be specified"
             )
         
+        # Only link exams to practical sets that exist and are still active
+        if exam_data.practical_set_id and not self.practical_set_repo.get_by_id(exam_data.practical_set_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Practical set not found"
+            )
+        
         # Get random questions from themes
         # Get questions using smart selection strategy
         questions = self._select_smart_questions(
@@ -73,6 +93,7 @@ class ExamService:
             name=exam_data.name,
             theme_ids=exam_data.theme_ids,
             questions=question_snapshots,
+            practical_set_id=exam_data.practical_set_id,
             created_by=user_id
         )
         
@@ -170,6 +191,7 @@ class ExamService:
             )
         return exam
     
+    @traced
     def start_attempt(self, exam_id: str, user_id: str) -> dict:
         """Start a new exam attempt"""
         exam = self.exam_repo.get_exam_by_id(exam_id)
@@ -181,7 +203,8 @@ class ExamService:
         
         attempt = AttemptInDB(
             exam_id=exam_id,
-            user_id=user_id
+            user_id=user_id,
+            practical_set_id=exam.get("practical_set_id")
         )
         
         created_attempt = self.exam_repo.create_attempt(attempt)
@@ -193,6 +216,7 @@ class ExamService:
             "exam": exam
         }
     
+    @traced
     def submit_answer(self, attempt_id: str, answer: AnswerSubmit, user_id: str) -> dict:
         """Submit an answer for a question in an attempt"""
         attempt = self.exam_repo.get_attempt_by_id(attempt_id)
@@ -214,6 +238,12 @@ class ExamService:
                 detail="Attempt already finished"
             )
         
+        if attempt.get("abandoned_at"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Attempt was closed after being abandoned"
+            )
+        
         # Update answers
         answers = attempt.get("answers", {})
         answers[answer.question_id] = answer.selected_answer
@@ -222,6 +252,7 @@ class ExamService:
         
         return {"message": "Answer recorded", "question_id": answer.question_id}
     
+    @traced
     def finish_attempt(self, attempt_id: str, user_id: str) -> dict:
         """Finish attempt and calculate score"""
         attempt = self.exam_repo.get_attempt_by_id(attempt_id)
@@ -243,6 +274,12 @@ class ExamService:
                 detail="Attempt already finished"
             )
         
+        if attempt.get("abandoned_at"):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Attempt was closed after being abandoned"
+            )
+        
         # Get exam
         exam = self.exam_repo.get_exam_by_id(attempt["exam_id"])
         if not exam:
@@ -252,7 +289,7 @@ class ExamService:
             )
         
         # Calculate score with exam type
-        score_result = self._calculate_score(exam["questions"], attempt.get("answers", {}), exam["type"])
+        score_result = calculate_score(exam["questions"], attempt.get("answers", {}), exam["type"])
         
         # Update attempt
         update_data = {
@@ -265,30 +302,42 @@ class ExamService:
         
         # Record analytics
         try:
+            self.score_distribution_service.record_score(
+                user_id=user_id,
+                exam_type=exam["type"],
+                score=score_result["final_score"],
+                scale=score_result["scale"]
+            )
+            
             self.analytics_service.record_attempt_results(
                 attempt_id=attempt_id,
                 user_id=user_id,
-                results=score_result["results"]
+                results=score_result["results"],
+                score=score_result["final_score"],
+                finished_at=update_data["finished_at"]
             )
             
             # Record question history
+            interactions = []
             for result in score_result["results"]:
                 outcome = OutcomeType.UNANSWERED
                 if result["status"] == "correct":
                     outcome = OutcomeType.CORRECT
                 elif result["status"] == "incorrect":
                     outcome = OutcomeType.INCORRECT
-                    
-                self.history_repo.upsert_interaction(
-                    user_id=user_id,
-                    question_id=result["question_id"],
-                    theme_id=result.get("theme_id", "unknown"),
-                    outcome=outcome
-                )
+                
+                interactions.append((result["question_id"], result.get("theme_id", "unknown"), outcome))
+            
+            self.history_repo.bulk_upsert_interactions(user_id, interactions)
                 
         except Exception as e:
             logger.error(f"Failed to record analytics: {e}")
-            # Don't fail the attempt if analytics fails
+            # Don't fail the attempt if analytics fails, but drop cached analytics that
+            # a partial recording may have outdated (a complete one bumps the version itself)
+            try:
+                self.analytics_service.bump_stats_version(user_id)
+            except Exception as e:
+                logger.error(f"Failed to invalidate cached analytics: {e}")
         
         return {
             "attempt_id": attempt_id,
@@ -296,64 +345,7 @@ class ExamService:
             "details": score_result
         }
     
-    def _calculate_score(self, questions: List[dict], answers: Dict[str, Any], exam_type: str = "THEORY") -> dict:
-        """Calculate exam score based on rules: +1 correct, -0.25 incorrect, 0 unanswered"""
-        total_questions = len(questions)
-        correct = 0
-        incorrect = 0
-        unanswered = 0
-        results = []
-        
-        for question in questions:
-            question_id = question["question_id"]
-            correct_answer = question["correct_answer"]
-            selected_answer = answers.get(question_id)
-            
-            is_correct = False
-            status = "unanswered"
-            
-            if selected_answer is None:
-                unanswered += 1
-            elif selected_answer == correct_answer:
-                correct += 1
-                is_correct = True
-                status = "correct"
-            else:
-                incorrect += 1
-                status = "incorrect"
-            
-            results.append({
-                "question_id": question_id,
-                "question_text": question["text"],
-                "choices": question.get("choices", []),
-                "theme_id": question.get("theme_id"),  # Include theme_id for analytics
-                "selected_answer": selected_answer,
-                "correct_answer": correct_answer,
-                "is_correct": is_correct,
-                "status": status
-            })
-        
-        # Calculate raw score
-        raw_score = (correct * 1.0) + (incorrect * -0.25)
-        raw_score = max(raw_score, 0)  # Non-negative
-        
-        # Scale based on exam type
-        # SIMULACRO: scale to 100, others: scale to 70
-        scale = 100 if exam_type == "SIMULACRO" else 70
-        final_score = (raw_score / total_questions) * scale if total_questions > 0 else 0
-        
-        return {
-            "total_questions": total_questions,
-            "correct": correct,
-            "incorrect": incorrect,
-            "unanswered": unanswered,
-            "raw_score": raw_score,
-            "final_score": round(final_score, 2),
-            "scale": scale,
-            "exam_type": exam_type,
-            "results": results
-        }
-    
+    @traced
     def get_attempt_results(self, attempt_id: str, user_id: str) -> dict:
         """Get attempt results"""
         attempt = self.exam_repo.get_attempt_by_id(attempt_id)
@@ -369,7 +361,19 @@ class ExamService:
                 detail=NOT_AUTHORIZED_MESSAGE
             )
         
+        if attempt.get("archive"):
+            attempt = self._rehydrate_attempt(attempt)
+        
         exam = self.exam_repo.get_exam_by_id(attempt["exam_id"])
+        if not exam and attempt.get("archive"):
+            # Archived attempts carry full results, the exam may have been cleaned up since
+            attempt["exam"] = {
+                "id": attempt["exam_id"],
+                "name": attempt.get("exam_name"),
+                "type": attempt.get("exam_type"),
+                "question_count": (attempt.get("details") or {}).get("total_questions", 0)
+            }
+            return attempt
         if not exam:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -381,13 +385,20 @@ class ExamService:
         attempt["exam"] = self._build_exam_summary(exam)
         return attempt
     
+    def _rehydrate_attempt(self, stub: dict) -> dict:
+        """Full attempt from cold storage, keeping the stub's archive metadata"""
+        archived = self.archive_repo.read(stub["archive"])
+        return {**archived, **stub, "answers": archived.get("answers", {}), "details": archived.get("details")}
+    
+    @traced
     def get_user_exam_history(self, user_id: str, limit: int = 50) -> List[dict]:
         """Get user's exam history"""
         attempts = self.exam_repo.get_attempts_by_user(user_id, limit)
+        exams = self.exam_repo.get_exam_summaries(list({a["exam_id"] for a in attempts}))
         
         history = []
         for attempt in attempts:
-            exam = self.exam_repo.get_exam_by_id(attempt["exam_id"])
+            exam = exams.get(attempt["exam_id"])
             
             history.append({
                 "attempt_id": attempt["id"],
@@ -406,7 +417,7 @@ class ExamService:
         details = attempt.get("details")
         if details:
             return self._enrich_details_with_exam(details, exam)
-        score_result = self._calculate_score(
+        score_result = calculate_score(
             exam.get("questions", []),
             attempt.get("answers", {}),
             exam.get("type", "THEORY")
@@ -453,58 +464,35 @@ class ExamService:
             "question_count": len(exam.get("questions", []))
         }
 
+    @traced
     def _select_smart_questions(self, theme_ids: List[str], count: int, user_id: str) -> List[dict]:
         """
         Select questions prioritizing:
         1. Never seen questions (random order among them)
-        2. Questions last answered incorrectly (oldest last_seen first)
-        3. Other seen questions (oldest last_seen first)
+        2. Seen questions by spaced-repetition schedule: failed ones (Leitner box 1) first,
+           then the most overdue next_due
         """
-        # Get all candidates
-        candidates = self.question_repo.get_by_themes(theme_ids)
-        
-        if not candidates:
-            return []
-            
-        # Get user history
-        history_map = self.history_repo.get_user_history_by_themes(user_id, theme_ids)
-        
-        unseen = []
-        seen = []
-        
-        for q in candidates:
-            q_id = q.get("id")
-            if q_id in history_map:
-                # Attach history info for sorting
-                q["_history"] = history_map[q_id]
-                seen.append(q)
-            else:
-                unseen.append(q)
-        
-        # Randomize unseen to avoid same order every time for new questions
-        random.shuffle(unseen)
-        
-        # Split seen into failed and others (correct/unanswered)
-        failed = []
-        others = []
-        
-        for q in seen:
-            outcome = q["_history"].get("outcome")
-            if outcome == OutcomeType.INCORRECT:
-                failed.append(q)
-            else:
-                others.append(q)
-        
-        # Sort both groups by last_seen ascending (oldest first)
-        failed.sort(key=lambda x: x["_history"].get("last_seen", datetime.min))
-        others.sort(key=lambda x: x["_history"].get("last_seen", datetime.min))
-        
-        # Combine: Unseen first, then Failed (oldest first), then Others (oldest first)
-        selected = (unseen + failed + others)[:count]
-        
-        # Cleanup internal field
-        for q in selected:
-            if "_history" in q:
-                del q["_history"]
-                
-        return selected
\ No newline at end of file
+        # Sample the bank in bounded batches and check only the sampled ids against history
+        selected: List[dict] = []
+        sampled_ids: Set[str] = set()
+        batch_size = count * UNSEEN_BATCH_FACTOR
+        for _ in range(UNSEEN_SAMPLE_ROUNDS):
+            batch = self.question_repo.get_random_by_themes(theme_ids, batch_size, exclude_ids=sampled_ids)
+            if not batch:
+                break
+            sampled_ids.update(q["id"] for q in batch)
+            seen_ids = self.history_repo.filter_seen(user_id, {q["id"]: q["theme_id"] for q in batch})
+            selected.extend(q for q in batch if q["id"] not in seen_ids)
+            if len(selected) >= count or len(batch) < batch_size:
+                break
+        selected = selected[:count]
+        
+        remaining = count - len(selected)
+        if remaining > 0:
+            # Over-fetch a little: history can point at questions deleted since
+            due_ids = self.history_repo.get_due_question_ids(user_id, theme_ids, remaining * 2)
+            picked_ids = {q["id"] for q in selected}
+            due_questions = self.question_repo.get_by_ids([q_id for q_id in due_ids if q_id not in picked_ids])
+            selected.extend(due_questions[:remaining])
+        
+        return selected
@@ -0,0 +1,98 @@
+from repositories.exam_repository import ExamRepository
+from config.settings import settings
+from utils.scoring import calculate_score
+from datetime import datetime, timedelta, timezone
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class JanitorService:
+    """Cleanup of abandoned attempts and of exams that no attempt references"""
+    
+    def __init__(self):
+        self.exam_repo = ExamRepository()
+    
+    def close_abandoned_attempts(self, older_than_hours: int, batch_size: int,
+                                 pause_seconds: float, delete_all: bool = False) -> dict:
+        """
+        Unfinished attempts started more than N hours ago are deleted when they have no
+        answers (or delete_all is set); otherwise they are scored and marked abandoned_at,
+        without counting towards analytics.
+        """
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=older_than_hours)
+        report = {"deleted": 0, "finalized": 0, "reclaimed_bytes": 0}
+        
+        while True:
+            attempts = self.exam_repo.find_abandoned_attempts(cutoff, batch_size)
+            if not attempts:
+                return report
+            
+            to_finalize = [] if delete_all else [a for a in attempts if a.get("answers")]
+            exams = self.exam_repo.get_exams_by_ids(list({a["exam_id"] for a in to_finalize}))
+            now = datetime.now(timezone.utc)
+            
+            finalized_ids = set()
+            for attempt in to_finalize:
+                exam = exams.get(attempt["exam_id"])
+                if not exam:
+                    continue
+                score_result = calculate_score(
+                    exam["questions"], attempt["answers"], exam["type"]
+                )
+                self.exam_repo.update_attempt(attempt["id"], {
+                    "abandoned_at": now,
+                    "score": score_result["final_score"],
+                    "details": score_result
+                })
+                finalized_ids.add(attempt["id"])
+            
+            to_delete = [a for a in attempts if a["id"] not in finalized_ids]
+            report["deleted"] += self.exam_repo.delete_attempts([a["id"] for a in to_delete])
+            report["reclaimed_bytes"] += sum(a["size"] for a in to_delete)
+            report["finalized"] += len(finalized_ids)
+            
+            time.sleep(pause_seconds)
+    
+    def delete_orphan_exams(self, older_than_hours: int, batch_size: int, pause_seconds: float) -> dict:
+        """Delete exams created more than N hours ago that no attempt references"""
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=older_than_hours)
+        report = {"deleted": 0, "reclaimed_bytes": 0}
+        after = None
+        
+        while True:
+            exams = self.exam_repo.find_exams_created_before(cutoff, after, batch_size)
+            if not exams:
+                return report
+            after = (exams[-1]["created_at"], exams[-1]["id"])
+            
+            referenced = self.exam_repo.get_referenced_exam_ids([e["id"] for e in exams])
+            orphans = [e for e in exams if e["id"] not in referenced]
+            report["deleted"] += self.exam_repo.delete_exams([e["id"] for e in orphans])
+            report["reclaimed_bytes"] += sum(e["size"] for e in orphans)
+            
+            time.sleep(pause_seconds)
+    
+    def run(self, delete_all_abandoned: bool = False) -> dict:
+        started = time.monotonic()
+        attempts_report = self.close_abandoned_attempts(
+            settings.janitor_abandoned_after_hours,
+            settings.janitor_batch_size,
+            settings.janitor_batch_pause_seconds,
+            delete_all_abandoned
+        )
+        # Runs second so exams of attempts deleted above are collected in the same run
+        exams_report = self.delete_orphan_exams(
+            settings.janitor_orphan_exam_after_hours,
+            settings.janitor_batch_size,
+            settings.janitor_batch_pause_seconds
+        )
+        report = {
+            "abandoned_attempts_deleted": attempts_report["deleted"],
+            "abandoned_attempts_finalized": attempts_report["finalized"],
+            "orphan_exams_deleted": exams_report["deleted"],
+            "reclaimed_bytes": attempts_report["reclaimed_bytes"] + exams_report["reclaimed_bytes"],
+            "duration_seconds": round(time.monotonic() - started, 2)
+        }
+        logger.info(f"Janitor run finished: {report}")
+        return report
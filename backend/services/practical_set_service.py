@@ -83,14 +83,15 @@ class PracticalSetService:
         
         return summaries
     
-    def get_random_practical_set(self) -> dict:
-        """Get a random practical set for exam"""
-        practical_sets = self.practical_set_repo.get_random(1)
+    def get_random_practical_set(self, user_id: Optional[str] = None) -> dict:
+        """Get a random practical set for exam, optionally one the user has not attempted yet"""
+        exclude_ids = self.practical_set_repo.get_attempted_ids(user_id) if user_id else None
+        practical_sets = self.practical_set_repo.get_random(1, exclude_ids)
         
         if not practical_sets:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
-                detail="No practical sets available"
+                detail="No unattempted practical sets available" if user_id else "No practical sets available"
             )
         
         return practical_sets[0]
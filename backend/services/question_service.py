@@ -1,9 +1,11 @@
 from repositories.question_repository import QuestionRepository
 from repositories.theme_repository import ThemeRepository
+from repositories.question_stats_repository import QuestionStatsRepository
 from models.question import (
     QuestionCreate, QuestionInDB, BulkQuestionsUpload,
     PracticalSetUpload, QuestionUploadItem
 )
+from utils.tracing import traced
 from typing import List, Optional
 from fastapi import HTTPException, status
 import logging
@@ -14,6 +16,7 @@ class QuestionService:
     def __init__(self):
         self.question_repo = QuestionRepository()
         self.theme_repo = ThemeRepository()
+        self.question_stats_repo = QuestionStatsRepository()
     
     @staticmethod
     def _normalize_upload_correct_answer(index: int) -> int:
@@ -68,6 +71,15 @@ class QuestionService:
             )
         return question
     
+    def get_question_stats(self, question_id: str) -> dict:
+        stats = self.question_stats_repo.get_by_question_id(question_id)
+        if not stats:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No statistics for this question yet"
+            )
+        return stats
+    
     def update_question(self, question_id: str, question_data: dict) -> dict:
         existing = self.question_repo.get_by_id(question_id)
         if not existing:
@@ -117,6 +129,7 @@ class QuestionService:
             "not_found": not_found
         }
     
+    @traced
     def upload_bulk_questions(self, upload_data_list: List[BulkQuestionsUpload], user_id: str) -> dict:
         """Upload multiple questions for multiple themes"""
         all_created_ids = []
@@ -182,6 +195,7 @@ class QuestionService:
             "error_details": all_errors
         }
     
+    @traced
     def upload_practical_set(self, upload_data: PracticalSetUpload, user_id: str) -> dict:
         """Upload a practical set (exactly 15 questions)"""
         if len(upload_data.questions) != 15:
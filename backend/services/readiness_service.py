@@ -0,0 +1,62 @@
+from config.database import ping_mongo, get_pool_stats
+from config.settings import settings
+from middleware.revocation_filter import RevocationFilter
+from repositories.practical_set_repository import PracticalSetRepository
+from services.score_distribution_service import ScoreDistributionService
+from utils.loop_monitor import LoopLagMonitor
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+import asyncio
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ReadinessService:
+    """Decides whether this worker should receive traffic"""
+    
+    async def ping(self) -> Optional[float]:
+        """Mongo ping RTT in seconds, or None on failure or timeout"""
+        try:
+            return await asyncio.wait_for(
+                run_in_threadpool(ping_mongo),
+                timeout=settings.ready_ping_timeout_ms / 1000
+            )
+        except Exception as e:
+            logger.warning(f"Readiness ping failed: {e}")
+            return None
+    
+    def evaluate(self, ping_seconds: Optional[float]) -> dict:
+        failures = []
+        
+        if ping_seconds is None:
+            failures.append("mongo_unreachable")
+        elif ping_seconds * 1000 > settings.ready_max_ping_ms:
+            failures.append("mongo_ping_slow")
+        
+        pool = get_pool_stats()
+        if pool["checked_out"] >= pool["max_pool_size"] * settings.ready_max_pool_utilization:
+            failures.append("mongo_pool_exhausted")
+        
+        lag_ms = LoopLagMonitor.recent_max_lag_seconds() * 1000
+        if lag_ms > settings.ready_max_loop_lag_ms:
+            failures.append("event_loop_lagging")
+        
+        synced_at = RevocationFilter.synced_at
+        revocation_age = None if synced_at is None else time.monotonic() - synced_at
+        # A stale filter would keep honoring revoked tokens
+        if revocation_age is None or revocation_age > settings.auth_revocation_sync_seconds * 3:
+            failures.append("revocation_filter_stale")
+        
+        return {
+            "status": "not_ready" if failures else "ready",
+            "failures": failures,
+            "mongo_ping_ms": None if ping_seconds is None else round(ping_seconds * 1000, 2),
+            "pool": pool,
+            "loop_lag_ms": round(lag_ms, 2),
+            "caches": {
+                "revocation_filter_age_seconds": None if revocation_age is None else round(revocation_age, 1),
+                "practical_set_pool_warm": PracticalSetRepository.is_active_pool_warm(),
+                "score_distributions_warm": ScoreDistributionService.is_warm()
+            }
+        }
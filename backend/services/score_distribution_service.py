@@ -0,0 +1,142 @@
+from repositories.score_distribution_repository import ScoreDistributionRepository
+from repositories.exam_repository import ExamRepository
+from utils.score_histogram import ScoreHistogram
+from utils.cache import TTLCache
+from config.settings import settings
+from utils.tracing import traced
+from typing import Dict, Optional
+from fastapi import HTTPException, status
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+SCORE_BIN_WIDTH = 0.5
+
+class _ScoreDistributions:
+    """
+    Per-worker view of the score distribution of each exam type.
+    Local scores are counted immediately and buffered in `pending`; a background task started
+    in server.py $inc-merges the buffer into Mongo every flush interval and reloads the view
+    with other workers' counts, so requests only ever read memory.
+    """
+    merged: Dict[str, ScoreHistogram] = {}
+    pending: Dict[str, Dict[int, int]] = {}
+    loaded_at: Optional[float] = None
+    lock = threading.Lock()
+    # (user_id, exam_type) -> latest final score, as fresh as the distributions themselves
+    latest_scores = TTLCache(
+        max_entries=settings.score_latest_cache_max_entries,
+        ttl_seconds=settings.score_distribution_flush_seconds
+    )
+
+class ScoreDistributionService:
+    def __init__(self):
+        self.distribution_repo = ScoreDistributionRepository()
+        self.exam_repo = ExamRepository()
+    
+    def _reload(self) -> None:
+        merged = {}
+        for doc in self.distribution_repo.get_all():
+            merged[doc["exam_type"]] = ScoreHistogram(
+                doc["scale"], doc.get("bin_width", SCORE_BIN_WIDTH), doc.get("counts", {})
+            )
+        with _ScoreDistributions.lock:
+            # Scores recorded while loading are not persisted yet, keep them visible
+            for exam_type, counts in _ScoreDistributions.pending.items():
+                if exam_type not in merged:
+                    previous = _ScoreDistributions.merged[exam_type]
+                    merged[exam_type] = ScoreHistogram(previous.scale, previous.bin_width)
+                merged[exam_type].merge(counts)
+            _ScoreDistributions.merged = merged
+            _ScoreDistributions.loaded_at = time.monotonic()
+    
+    @staticmethod
+    def is_warm() -> bool:
+        return _ScoreDistributions.loaded_at is not None
+    
+    def flush(self) -> None:
+        """Persist buffered scores and reload the merged distributions"""
+        with _ScoreDistributions.lock:
+            pending = _ScoreDistributions.pending
+            _ScoreDistributions.pending = {}
+            scales = {
+                exam_type: _ScoreDistributions.merged[exam_type].scale
+                for exam_type in pending
+            }
+        
+        unflushed = dict(pending)
+        try:
+            for exam_type, counts in pending.items():
+                self.distribution_repo.add_counts(exam_type, scales[exam_type], SCORE_BIN_WIDTH, counts)
+                del unflushed[exam_type]
+        finally:
+            if unflushed:
+                # Put back what was not written so the next flush retries it
+                with _ScoreDistributions.lock:
+                    for exam_type, counts in unflushed.items():
+                        buffered = _ScoreDistributions.pending.setdefault(exam_type, {})
+                        for bin_index, count in counts.items():
+                            buffered[bin_index] = buffered.get(bin_index, 0) + count
+        
+        self._reload()
+    
+    def _ensure_loaded(self) -> None:
+        if _ScoreDistributions.loaded_at is None:
+            self._reload()
+    
+    @traced
+    def record_score(self, user_id: str, exam_type: str, score: float, scale: float) -> None:
+        """Count a finished attempt's final score in its exam type's distribution"""
+        self._ensure_loaded()
+        _ScoreDistributions.latest_scores.set((user_id, exam_type), score)
+        with _ScoreDistributions.lock:
+            histogram = _ScoreDistributions.merged.get(exam_type)
+            if histogram is None:
+                histogram = ScoreHistogram(scale, SCORE_BIN_WIDTH)
+                _ScoreDistributions.merged[exam_type] = histogram
+            bin_index = histogram.bin_for(score)
+            histogram.add(score)
+            counts = _ScoreDistributions.pending.setdefault(exam_type, {})
+            counts[bin_index] = counts.get(bin_index, 0) + 1
+    
+    def _latest_score(self, user_id: str, exam_type: str) -> float:
+        key = (user_id, exam_type)
+        found, score = _ScoreDistributions.latest_scores.get(key)
+        if not found:
+            latest = self.exam_repo.get_latest_finished_attempt(user_id, exam_type)
+            score = latest.get("score") if latest else None
+            _ScoreDistributions.latest_scores.set(key, score)
+        if score is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"No finished {exam_type} attempts found"
+            )
+        return score
+    
+    @traced
+    def get_percentile(self, user_id: str, exam_type: str, score: Optional[float] = None,
+                       buckets: int = 10) -> dict:
+        """Rank a score (by default the user's latest one) against all scores of an exam type"""
+        if score is None:
+            score = self._latest_score(user_id, exam_type)
+        
+        self._ensure_loaded()
+        histogram = _ScoreDistributions.merged.get(exam_type)
+        if histogram is None:
+            return {
+                "exam_type": exam_type,
+                "score": score,
+                "percentile": 0.0,
+                "total_scores": 0,
+                "histogram": []
+            }
+        
+        return {
+            "exam_type": exam_type,
+            "score": score,
+            "percentile": histogram.percentile_of(score),
+            "total_scores": histogram.total,
+            "histogram": histogram.buckets(buckets)
+        }
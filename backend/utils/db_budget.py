@@ -0,0 +1,100 @@
+from pymongo import monitoring
+from contextvars import ContextVar
+from config.settings import settings
+from typing import Optional
+from collections import deque
+import bson
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+class DbUsage:
+    """Mongo round trips, reply bytes and time spent by one request"""
+    __slots__ = ("calls", "bytes", "time_ms", "max_calls", "max_bytes")
+    
+    def __init__(self):
+        self.calls = 0
+        self.bytes = 0
+        self.time_ms = 0.0
+        self.max_calls: Optional[int] = None
+        self.max_bytes: Optional[int] = None
+    
+    def over_budget(self) -> bool:
+        return (
+            (self.max_calls is not None and self.calls > self.max_calls)
+            or (self.max_bytes is not None and self.bytes > self.max_bytes)
+        )
+
+current_db_usage: ContextVar[Optional[DbUsage]] = ContextVar("current_db_usage", default=None)
+
+class DbUsageCounter(monitoring.CommandListener):
+    """Charges each Mongo command to the request in context; only registered when db_budget_mode is on"""
+    
+    def started(self, event):
+        usage = current_db_usage.get()
+        if usage is not None:
+            usage.calls += 1
+    
+    def succeeded(self, event):
+        usage = current_db_usage.get()
+        if usage is not None:
+            usage.time_ms += event.duration_micros / 1000
+            usage.bytes += len(bson.encode(event.reply))
+    
+    def failed(self, event):
+        usage = current_db_usage.get()
+        if usage is not None:
+            usage.time_ms += event.duration_micros / 1000
+
+db_usage_counter = DbUsageCounter()
+
+def db_budget(max_calls: int, max_bytes: Optional[int] = None):
+    """
+    Route dependency declaring the Mongo round trips and reply bytes a request may use.
+    Count the handler's round trips plus one for the auth dependency (legacy token lookup
+    or a worker's first revocation sync).
+    """
+    def dependency():
+        usage = current_db_usage.get()
+        if usage is not None:
+            usage.max_calls = max_calls
+            usage.max_bytes = max_bytes
+    return dependency
+
+class BudgetViolations:
+    """Recent over-budget requests, for asserting on after a test run"""
+    entries: deque = deque(maxlen=1000)
+    total = 0
+    lock = threading.Lock()
+    
+    @classmethod
+    def record(cls, method: str, route: str, usage: DbUsage) -> None:
+        entry = {
+            "method": method,
+            "route": route,
+            "calls": usage.calls,
+            "max_calls": usage.max_calls,
+            "bytes": usage.bytes,
+            "max_bytes": usage.max_bytes,
+            "time_ms": round(usage.time_ms, 2)
+        }
+        with cls.lock:
+            cls.entries.append(entry)
+            cls.total += 1
+        log = logger.error if settings.db_budget_mode == "test" else logger.warning
+        log(
+            f"DB budget exceeded on {method} {route}: {usage.calls}/{usage.max_calls} calls, "
+            f"{usage.bytes}/{usage.max_bytes} bytes, {usage.time_ms:.1f} ms"
+        )
+    
+    @classmethod
+    def report(cls) -> dict:
+        with cls.lock:
+            return {"mode": settings.db_budget_mode, "total": cls.total, "recent": list(cls.entries)}
+    
+    @classmethod
+    def reset(cls) -> None:
+        with cls.lock:
+            cls.entries.clear()
+            cls.total = 0
@@ -0,0 +1,83 @@
+from concurrent.futures import ThreadPoolExecutor
+from config.settings import settings
+from typing import Any, Callable, Dict
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+
+class ServiceExecutor:
+    """
+    Named thread pool for one class of blocking service calls, with queue-depth and wait-time metrics.
+    Keeps slow analytics or imports from queueing in front of exam-taking in the default threadpool.
+    """
+    
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-exec")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.total_run_seconds = 0.0
+    
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a blocking call on this pool, propagating the caller's contextvars"""
+        ctx = contextvars.copy_context()
+        call = functools.partial(ctx.run, fn, *args, **kwargs)
+        queued_at = time.perf_counter()
+        with self._lock:
+            self.queued += 1
+        
+        def task():
+            started_at = time.perf_counter()
+            wait = started_at - queued_at
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+                self.total_wait_seconds += wait
+                self.max_wait_seconds = max(self.max_wait_seconds, wait)
+            ok = False
+            try:
+                result = call()
+                ok = True
+                return result
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+                    if not ok:
+                        self.failed += 1
+                    self.total_run_seconds += time.perf_counter() - started_at
+        
+        return await asyncio.get_running_loop().run_in_executor(self.executor, task)
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queued": self.queued,
+                "running": self.running,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_wait_ms": round(self.total_wait_seconds * 1000 / self.completed, 2) if self.completed else 0.0,
+                "max_wait_ms": round(self.max_wait_seconds * 1000, 2),
+                "avg_run_ms": round(self.total_run_seconds * 1000 / self.completed, 2) if self.completed else 0.0
+            }
+
+analytics_executor = ServiceExecutor("analytics", settings.analytics_executor_workers)
+imports_executor = ServiceExecutor("imports", settings.imports_executor_workers)
+exams_executor = ServiceExecutor("exams", settings.exams_executor_workers)
+
+EXECUTORS: Dict[str, ServiceExecutor] = {
+    executor.name: executor
+    for executor in (analytics_executor, imports_executor, exams_executor)
+}
+
+def get_executor_stats() -> dict:
+    return {name: executor.stats() for name, executor in EXECUTORS.items()}
@@ -0,0 +1,92 @@
+from utils.metrics import Histogram, register_collector, render_histogram
+from config.settings import settings
+from collections import deque
+from typing import List, Optional
+import asyncio
+import sys
+import threading
+import time
+import traceback
+import logging
+
+logger = logging.getLogger(__name__)
+
+class LoopLagMonitor:
+    """
+    Measures event-loop lag with a periodic sleep, and runs a watchdog thread that logs
+    the loop thread's stack while it is blocked longer than loop_lag_threshold_ms.
+    """
+    histogram = Histogram()
+    recent: deque = deque(maxlen=50)
+    last_lag_seconds = 0.0
+    max_lag_seconds = 0.0
+    blocked_reports = 0
+    heartbeat: Optional[float] = None
+    loop_thread_id: Optional[int] = None
+    
+    @classmethod
+    def start(cls) -> None:
+        cls.loop_thread_id = threading.get_ident()
+        cls.heartbeat = time.monotonic()
+        asyncio.get_running_loop().create_task(cls._measure())
+        threading.Thread(target=cls._watchdog, name="loop-watchdog", daemon=True).start()
+        logger.info("Event loop lag monitor started")
+    
+    @classmethod
+    async def _measure(cls) -> None:
+        interval = settings.loop_lag_interval_ms / 1000
+        while True:
+            expected = time.monotonic() + interval
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            cls.heartbeat = now
+            cls.last_lag_seconds = lag
+            cls.max_lag_seconds = max(cls.max_lag_seconds, lag)
+            cls.recent.append(lag)
+            cls.histogram.observe(lag)
+    
+    @classmethod
+    def _watchdog(cls) -> None:
+        interval = settings.loop_lag_interval_ms / 1000
+        threshold = settings.loop_lag_threshold_ms / 1000
+        reported_heartbeat = None
+        while True:
+            time.sleep(interval)
+            heartbeat = cls.heartbeat
+            # Beats are expected every interval; anything beyond that is time the loop was blocked
+            blocked = time.monotonic() - heartbeat - interval
+            if blocked < threshold or heartbeat == reported_heartbeat:
+                continue
+            reported_heartbeat = heartbeat
+            frame = sys._current_frames().get(cls.loop_thread_id)
+            if frame is None:
+                continue
+            cls.blocked_reports += 1
+            stack = "".join(traceback.format_stack(frame))
+            logger.warning(f"Event loop blocked for {blocked * 1000:.0f} ms, loop thread stack:\n{stack}")
+    
+    @classmethod
+    def recent_max_lag_seconds(cls) -> float:
+        """Worst lag over the last few measurements"""
+        return max(cls.recent, default=0.0)
+    
+    @classmethod
+    def stats(cls) -> dict:
+        return {
+            "running": cls.heartbeat is not None,
+            "last_lag_ms": round(cls.last_lag_seconds * 1000, 2),
+            "recent_max_lag_ms": round(cls.recent_max_lag_seconds() * 1000, 2),
+            "max_lag_ms": round(cls.max_lag_seconds * 1000, 2),
+            "blocked_reports": cls.blocked_reports
+        }
+
+def _render_loop_lag(lines: List[str]) -> None:
+    lines.append("# HELP event_loop_lag_seconds Delay of periodic event loop wake-ups")
+    lines.append("# TYPE event_loop_lag_seconds histogram")
+    render_histogram(lines, "event_loop_lag_seconds", {}, LoopLagMonitor.histogram)
+    lines.append("# HELP event_loop_blocked_reports_total Times the loop was blocked past the threshold")
+    lines.append("# TYPE event_loop_blocked_reports_total counter")
+    lines.append(f"event_loop_blocked_reports_total {LoopLagMonitor.blocked_reports}")
+
+register_collector(_render_loop_lag)
@@ -0,0 +1,163 @@
+from pymongo import monitoring
+from bisect import bisect_left
+from typing import Callable, Dict, List, Tuple
+import threading
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class Histogram:
+    """Fixed-bucket latency histogram; not thread-safe, each instance has a single writer"""
+    __slots__ = ("counts", "sum", "count")
+    
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+    
+    def merge(self, other: "Histogram") -> None:
+        for i, c in enumerate(other.counts):
+            self.counts[i] += c
+        self.sum += other.sum
+        self.count += other.count
+
+class RequestMetrics:
+    """
+    HTTP metrics, only written from the event loop thread so the hot path needs no lock.
+    Routes are labelled by their template path to bound cardinality.
+    """
+    latency: Dict[Tuple[str, str], Histogram] = {}
+    statuses: Dict[Tuple[str, str, int], int] = {}
+    in_flight = 0
+    
+    @classmethod
+    def observe(cls, method: str, route: str, status: int, seconds: float) -> None:
+        key = (method, route)
+        hist = cls.latency.get(key)
+        if hist is None:
+            hist = cls.latency[key] = Histogram()
+        hist.observe(seconds)
+        status_key = (method, route, status)
+        cls.statuses[status_key] = cls.statuses.get(status_key, 0) + 1
+
+class _MongoShard:
+    def __init__(self):
+        self.pending: Dict[int, str] = {}
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.failures: Dict[Tuple[str, str], int] = {}
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """
+    Times every Mongo command per collection and command name.
+    Each thread writes its own shard; shards are only merged when metrics are scraped.
+    """
+    
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[_MongoShard] = []
+        self._shards_lock = threading.Lock()
+    
+    def _shard(self) -> _MongoShard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _MongoShard()
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+    
+    def started(self, event):
+        self._shard().pending[event.request_id] = command_collection(event.command_name, event.command)
+    
+    def succeeded(self, event):
+        shard = self._shard()
+        key = (shard.pending.pop(event.request_id, ""), event.command_name)
+        hist = shard.latency.get(key)
+        if hist is None:
+            hist = shard.latency[key] = Histogram()
+        hist.observe(event.duration_micros / 1_000_000)
+    
+    def failed(self, event):
+        shard = self._shard()
+        key = (shard.pending.pop(event.request_id, ""), event.command_name)
+        shard.failures[key] = shard.failures.get(key, 0) + 1
+    
+    def snapshot(self) -> Tuple[Dict[Tuple[str, str], Histogram], Dict[Tuple[str, str], int]]:
+        latency: Dict[Tuple[str, str], Histogram] = {}
+        failures: Dict[Tuple[str, str], int] = {}
+        with self._shards_lock:
+            shards = list(self._shards)
+        for shard in shards:
+            for key, hist in list(shard.latency.items()):
+                latency.setdefault(key, Histogram()).merge(hist)
+            for key, count in list(shard.failures.items()):
+                failures[key] = failures.get(key, 0) + count
+        return latency, failures
+
+def command_collection(command_name: str, command: dict) -> str:
+    """Collection a command targets (getMore names it under "collection"), or "" for admin commands"""
+    target = command.get(command_name)
+    if isinstance(target, str):
+        return target
+    collection = command.get("collection")
+    return collection if isinstance(collection, str) else ""
+
+mongo_command_metrics = MongoCommandMetrics()
+
+# Extra renderers appending exposition lines, registered by other subsystems
+_collectors: List[Callable[[List[str]], None]] = []
+
+def register_collector(render: Callable[[List[str]], None]) -> None:
+    _collectors.append(render)
+
+def _labels(**labels) -> str:
+    return ",".join(f'{k}="{str(v)}"' for k, v in labels.items())
+
+def _braced(labels: str) -> str:
+    return f"{{{labels}}}" if labels else ""
+
+def render_histogram(lines: List[str], name: str, labels: dict, hist: Histogram) -> None:
+    cumulative = 0
+    for bound, count in zip(LATENCY_BUCKETS, hist.counts):
+        cumulative += count
+        lines.append(f'{name}_bucket{{{_labels(**labels, le=bound)}}} {cumulative}')
+    lines.append(f'{name}_bucket{{{_labels(**labels, le="+Inf")}}} {hist.count}')
+    lines.append(f'{name}_sum{_braced(_labels(**labels))} {hist.sum:.6f}')
+    lines.append(f'{name}_count{_braced(_labels(**labels))} {hist.count}')
+
+def render_prometheus() -> str:
+    """Current metrics in the Prometheus text exposition format"""
+    lines: List[str] = []
+    
+    lines.append("# HELP http_request_duration_seconds HTTP request latency by route")
+    lines.append("# TYPE http_request_duration_seconds histogram")
+    for (method, route), hist in list(RequestMetrics.latency.items()):
+        render_histogram(lines, "http_request_duration_seconds", {"method": method, "route": route}, hist)
+    
+    lines.append("# HELP http_requests_total HTTP responses by route and status")
+    lines.append("# TYPE http_requests_total counter")
+    for (method, route, status), count in list(RequestMetrics.statuses.items()):
+        lines.append(f'http_requests_total{{{_labels(method=method, route=route, status=status)}}} {count}')
+    
+    lines.append("# HELP http_requests_in_flight HTTP requests currently being served")
+    lines.append("# TYPE http_requests_in_flight gauge")
+    lines.append(f"http_requests_in_flight {RequestMetrics.in_flight}")
+    
+    latency, failures = mongo_command_metrics.snapshot()
+    lines.append("# HELP mongo_command_duration_seconds Mongo command latency by collection and command")
+    lines.append("# TYPE mongo_command_duration_seconds histogram")
+    for (collection, command), hist in latency.items():
+        render_histogram(lines, "mongo_command_duration_seconds", {"collection": collection, "command": command}, hist)
+    
+    lines.append("# HELP mongo_command_failures_total Failed Mongo commands by collection and command")
+    lines.append("# TYPE mongo_command_failures_total counter")
+    for (collection, command), count in failures.items():
+        lines.append(f'mongo_command_failures_total{{{_labels(collection=collection, command=command)}}} {count}')
+    
+    for render in _collectors:
+        render(lines)
+    
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,80 @@
+from pymongo import monitoring
+from utils.metrics import register_collector
+from typing import List
+import threading
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Connection pool occupancy of the MongoClient, summed over all server addresses"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.open = 0
+        self.checked_out = 0
+        self.checkout_failures = 0
+        self.pool_clears = 0
+    
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+    
+    def connection_closed(self, event):
+        with self._lock:
+            self.open -= 1
+    
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.checked_out += 1
+    
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out -= 1
+    
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+    
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+    
+    # Remaining pool events carry nothing we track
+    def pool_created(self, event):
+        pass
+    
+    def pool_ready(self, event):
+        pass
+    
+    def pool_closed(self, event):
+        pass
+    
+    def connection_ready(self, event):
+        pass
+    
+    def connection_check_out_started(self, event):
+        pass
+    
+    def stats(self, max_pool_size: int) -> dict:
+        with self._lock:
+            return {
+                "max_pool_size": max_pool_size,
+                "open": self.open,
+                "checked_out": self.checked_out,
+                "available": max(0, max_pool_size - self.checked_out),
+                "checkout_failures": self.checkout_failures,
+                "pool_clears": self.pool_clears
+            }
+
+pool_monitor = PoolMonitor()
+
+def _render_pool(lines: List[str]) -> None:
+    lines.append("# HELP mongo_pool_connections_checked_out Mongo connections currently in use")
+    lines.append("# TYPE mongo_pool_connections_checked_out gauge")
+    lines.append(f"mongo_pool_connections_checked_out {pool_monitor.checked_out}")
+    lines.append("# HELP mongo_pool_connections_open Mongo connections currently open")
+    lines.append("# TYPE mongo_pool_connections_open gauge")
+    lines.append(f"mongo_pool_connections_open {pool_monitor.open}")
+    lines.append("# HELP mongo_pool_checkout_failures_total Failed Mongo connection checkouts")
+    lines.append("# TYPE mongo_pool_checkout_failures_total counter")
+    lines.append(f"mongo_pool_checkout_failures_total {pool_monitor.checkout_failures}")
+
+register_collector(_render_pool)
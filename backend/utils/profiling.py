@@ -0,0 +1,108 @@
+from collections import Counter
+from typing import Dict, List, Optional
+import sys
+import threading
+import time
+import tracemalloc
+import logging
+
+logger = logging.getLogger(__name__)
+
+class SamplingProfiler:
+    """
+    Statistical profiler sampling the stacks of every thread via sys._current_frames.
+    Costs nothing until a profile is requested; one profile runs at a time.
+    """
+    lock = threading.Lock()
+    
+    @classmethod
+    def profile(cls, seconds: float, interval: float) -> Optional[str]:
+        """Sample for `seconds` and return collapsed stacks ("frame;frame;frame count" lines), or None if busy"""
+        if not cls.lock.acquire(blocking=False):
+            return None
+        try:
+            own_thread = threading.get_ident()
+            names = {t.ident: t.name for t in threading.enumerate()}
+            stacks: Counter = Counter()
+            deadline = time.monotonic() + seconds
+            samples = 0
+            while time.monotonic() < deadline:
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_thread:
+                        continue
+                    stacks[cls._collapse(names.get(thread_id, str(thread_id)), frame)] += 1
+                samples += 1
+                time.sleep(interval)
+            logger.info(f"Profiled {samples} samples over {seconds}s")
+            return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+        finally:
+            cls.lock.release()
+    
+    @staticmethod
+    def _collapse(thread_name: str, frame) -> str:
+        frames: List[str] = []
+        while frame is not None:
+            code = frame.f_code
+            frames.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+            frame = frame.f_back
+        frames.append(thread_name)
+        frames.reverse()
+        return ";".join(frames)
+
+class AllocationTracker:
+    """tracemalloc snapshots kept by name so two of them can be diffed"""
+    snapshots: Dict[str, tracemalloc.Snapshot] = {}
+    max_snapshots = 10
+    lock = threading.Lock()
+    
+    @classmethod
+    def start(cls, frames: int) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+    
+    @classmethod
+    def stop(cls) -> None:
+        with cls.lock:
+            cls.snapshots.clear()
+        tracemalloc.stop()
+    
+    @classmethod
+    def status(cls) -> dict:
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        with cls.lock:
+            names = list(cls.snapshots)
+        return {"tracing": tracing, "current_bytes": current, "peak_bytes": peak, "snapshots": names}
+    
+    @classmethod
+    def take_snapshot(cls, name: str, top: int) -> List[dict]:
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>")
+        ))
+        with cls.lock:
+            cls.snapshots.pop(name, None)
+            cls.snapshots[name] = snapshot
+            while len(cls.snapshots) > cls.max_snapshots:
+                cls.snapshots.pop(next(iter(cls.snapshots)))
+        return [
+            {"location": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+            for stat in snapshot.statistics("lineno")[:top]
+        ]
+    
+    @classmethod
+    def diff(cls, base: str, current: str, top: int) -> Optional[List[dict]]:
+        with cls.lock:
+            old = cls.snapshots.get(base)
+            new = cls.snapshots.get(current)
+        if old is None or new is None:
+            return None
+        return [
+            {
+                "location": str(stat.traceback),
+                "size_diff_bytes": stat.size_diff,
+                "size_bytes": stat.size,
+                "count_diff": stat.count_diff
+            }
+            for stat in new.compare_to(old, "lineno")[:top]
+        ]
@@ -0,0 +1,14 @@
+from contextvars import ContextVar
+from typing import Optional
+
+# ASGI scope of the request being served; FastAPI fills in the matched route during routing
+current_scope: ContextVar[Optional[dict]] = ContextVar("current_scope", default=None)
+current_request_id: ContextVar[Optional[str]] = ContextVar("current_request_id", default=None)
+
+def current_route() -> Optional[str]:
+    """Route template of the current request, its raw path before routing, or None outside requests"""
+    scope = current_scope.get()
+    if scope is None:
+        return None
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope.get("path")
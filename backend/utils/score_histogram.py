@@ -0,0 +1,50 @@
+from typing import Dict, List, Optional
+
+class ScoreHistogram:
+    """
+    Fixed-width histogram over a bounded score range, used as a mergeable quantile sketch.
+    Exam scores live in [0, scale], so equal-width bins give rank error bounded by the
+    bin width, and merging two sketches is just adding counts.
+    """
+    
+    def __init__(self, scale: float, bin_width: float = 0.5, counts: Optional[Dict[int, int]] = None):
+        self.scale = scale
+        self.bin_width = bin_width
+        self.bin_count = int(scale / bin_width) + 1
+        self.counts: List[int] = [0] * self.bin_count
+        self.total = 0
+        if counts:
+            self.merge(counts)
+    
+    def bin_for(self, score: float) -> int:
+        return min(max(int(score / self.bin_width), 0), self.bin_count - 1)
+    
+    def add(self, score: float, count: int = 1) -> None:
+        self.counts[self.bin_for(score)] += count
+        self.total += count
+    
+    def merge(self, counts: Dict[int, int]) -> None:
+        for bin_index, count in counts.items():
+            self.counts[min(int(bin_index), self.bin_count - 1)] += count
+            self.total += count
+    
+    def percentile_of(self, score: float) -> float:
+        """Percentage of scores below this one, counting ties in its bin as half"""
+        if self.total == 0:
+            return 0.0
+        bin_index = self.bin_for(score)
+        below = sum(self.counts[:bin_index])
+        return round((below + self.counts[bin_index] / 2) / self.total * 100, 2)
+    
+    def buckets(self, bucket_count: int = 10) -> List[dict]:
+        """Coarse histogram for display, with bucket_count equal-width buckets"""
+        width = self.scale / bucket_count
+        buckets = [
+            {"lower": round(i * width, 2), "upper": round((i + 1) * width, 2), "count": 0}
+            for i in range(bucket_count)
+        ]
+        for bin_index, count in enumerate(self.counts):
+            if count:
+                bucket_index = min(int(bin_index * self.bin_width / width), bucket_count - 1)
+                buckets[bucket_index]["count"] += count
+        return buckets
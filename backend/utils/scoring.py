@@ -0,0 +1,59 @@
+from typing import Any, Dict, List
+
+def calculate_score(questions: List[dict], answers: Dict[str, Any], exam_type: str = "THEORY") -> dict:
+    """Calculate exam score based on rules: +1 correct, -0.25 incorrect, 0 unanswered"""
+    total_questions = len(questions)
+    correct = 0
+    incorrect = 0
+    unanswered = 0
+    results = []
+    
+    for question in questions:
+        question_id = question["question_id"]
+        correct_answer = question["correct_answer"]
+        selected_answer = answers.get(question_id)
+        
+        is_correct = False
+        status = "unanswered"
+        
+        if selected_answer is None:
+            unanswered += 1
+        elif selected_answer == correct_answer:
+            correct += 1
+            is_correct = True
+            status = "correct"
+        else:
+            incorrect += 1
+            status = "incorrect"
+        
+        results.append({
+            "question_id": question_id,
+            "question_text": question["text"],
+            "choices": question.get("choices", []),
+            "theme_id": question.get("theme_id"),  # Include theme_id for analytics
+            "selected_answer": selected_answer,
+            "correct_answer": correct_answer,
+            "is_correct": is_correct,
+            "status": status
+        })
+    
+    # Calculate raw score
+    raw_score = (correct * 1.0) + (incorrect * -0.25)
+    raw_score = max(raw_score, 0)  # Non-negative
+    
+    # Scale based on exam type
+    # SIMULACRO: scale to 100, others: scale to 70
+    scale = 100 if exam_type == "SIMULACRO" else 70
+    final_score = (raw_score / total_questions) * scale if total_questions > 0 else 0
+    
+    return {
+        "total_questions": total_questions,
+        "correct": correct,
+        "incorrect": incorrect,
+        "unanswered": unanswered,
+        "raw_score": raw_score,
+        "final_score": round(final_score, 2),
+        "scale": scale,
+        "exam_type": exam_type,
+        "results": results
+    }
@@ -1,8 +1,16 @@
 from passlib.context import CryptContext
 from jose import JWTError, jwt
+from fastapi import HTTPException, status
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from config.settings import settings
 from typing import Optional
+import asyncio
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -10,7 +18,111 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return pwd_context.hash(password, rounds=PasswordPool.rounds)
+
+def hash_rounds(hashed_password: str) -> int:
+    """Cost factor of a bcrypt hash ($2b$<rounds>$...)"""
+    return int(hashed_password.split("$")[2])
+
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    Upgrade hashes weaker than the calibrated cost, and downgrade only above the configured cap,
+    so workers calibrating one round apart don't keep rehashing each other's hashes.
+    """
+    rounds = hash_rounds(hashed_password)
+    return rounds < PasswordPool.rounds or rounds > settings.bcrypt_max_rounds
+
+class PasswordPool:
+    """
+    Bounded executor for bcrypt so password work never blocks the event loop.
+    Submissions beyond the queue limit are rejected with 503 instead of piling up.
+    """
+    executor = ThreadPoolExecutor(max_workers=settings.password_pool_workers, thread_name_prefix="bcrypt")
+    rounds = settings.bcrypt_rounds or settings.bcrypt_min_rounds
+    pending = 0
+    submitted = 0
+    completed = 0
+    rejected = 0
+    total_wait_seconds = 0.0
+    max_wait_seconds = 0.0
+    lock = threading.Lock()
+    
+    @classmethod
+    def calibrate(cls) -> int:
+        """Pick the highest bcrypt cost whose hash time stays within bcrypt_target_ms"""
+        if settings.bcrypt_rounds:
+            cls.rounds = settings.bcrypt_rounds
+            return cls.rounds
+        
+        started = time.perf_counter()
+        pwd_context.hash("calibration", rounds=settings.bcrypt_min_rounds)
+        base_ms = (time.perf_counter() - started) * 1000
+        
+        rounds = settings.bcrypt_min_rounds
+        # Each extra round doubles the cost
+        while rounds < settings.bcrypt_max_rounds and base_ms * 2 ** (rounds + 1 - settings.bcrypt_min_rounds) <= settings.bcrypt_target_ms:
+            rounds += 1
+        cls.rounds = rounds
+        logger.info(f"bcrypt calibrated to {rounds} rounds ({base_ms:.0f} ms at {settings.bcrypt_min_rounds})")
+        return rounds
+    
+    @classmethod
+    async def run(cls, fn, *args):
+        with cls.lock:
+            if cls.pending >= settings.password_pool_max_queue:
+                cls.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many concurrent logins, retry shortly",
+                    headers={"Retry-After": "1"}
+                )
+            cls.pending += 1
+            cls.submitted += 1
+        
+        queued_at = time.perf_counter()
+        
+        def task():
+            wait = time.perf_counter() - queued_at
+            with cls.lock:
+                cls.total_wait_seconds += wait
+                cls.max_wait_seconds = max(cls.max_wait_seconds, wait)
+            return fn(*args)
+        
+        def release(_future) -> None:
+            # Runs when the hash finishes, or when it is cancelled before starting; a cancelled
+            # request does not stop a hash already running, so that one stays counted until done
+            with cls.lock:
+                cls.pending -= 1
+                cls.completed += 1
+        
+        try:
+            future = cls.executor.submit(task)
+        except RuntimeError:
+            release(None)
+            raise
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future)
+    
+    @classmethod
+    def stats(cls) -> dict:
+        with cls.lock:
+            return {
+                "workers": settings.password_pool_workers,
+                "max_queue": settings.password_pool_max_queue,
+                "bcrypt_rounds": cls.rounds,
+                "pending": cls.pending,
+                "submitted": cls.submitted,
+                "completed": cls.completed,
+                "rejected": cls.rejected,
+                "avg_wait_ms": round(cls.total_wait_seconds * 1000 / cls.completed, 2) if cls.completed else 0.0,
+                "max_wait_ms": round(cls.max_wait_seconds * 1000, 2)
+            }
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await PasswordPool.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await PasswordPool.run(get_password_hash, password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
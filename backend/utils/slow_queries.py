@@ -0,0 +1,121 @@
+from pymongo import monitoring
+from config.settings import settings
+from utils.metrics import command_collection
+from utils.request_context import current_route, current_request_id
+from typing import Any, Dict, List, Tuple
+import json
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+def redact_shape(value: Any) -> Any:
+    """Keep keys and operators of a filter, replacing every literal with "?" """
+    if isinstance(value, dict):
+        return {k: redact_shape(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        if any(isinstance(v, dict) for v in value):
+            return [redact_shape(v) for v in value]
+        return "?"
+    return "?"
+
+def command_filter(command_name: str, command: dict) -> Any:
+    if command_name == "aggregate":
+        return command.get("pipeline", [])
+    if command_name in ("update", "delete"):
+        ops = command.get("updates") or command.get("deletes") or []
+        return ops[0].get("q", {}) if ops else {}
+    if command_name in ("findAndModify", "count", "distinct"):
+        return command.get("query", {})
+    return command.get("filter", {})
+
+def docs_returned(reply: dict) -> int:
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        return len(cursor.get("firstBatch") or cursor.get("nextBatch") or [])
+    return reply.get("n", 0)
+
+class SlowQueryLog(monitoring.CommandListener):
+    """
+    Logs Mongo commands slower than slow_query_threshold_ms with their redacted filter shape
+    and originating route/request id, and aggregates them per shape for the worst-offenders report.
+    """
+    
+    def __init__(self):
+        self._local = threading.local()
+        self._shapes: Dict[Tuple[str, str, str], dict] = {}
+        self._lock = threading.Lock()
+    
+    def _pending(self) -> dict:
+        pending = getattr(self._local, "pending", None)
+        if pending is None:
+            pending = self._local.pending = {}
+        return pending
+    
+    def started(self, event):
+        # Keep a reference only; the shape is computed for slow commands alone
+        self._pending()[event.request_id] = event.command
+    
+    def succeeded(self, event):
+        command = self._pending().pop(event.request_id, None)
+        duration_ms = event.duration_micros / 1000
+        if command is None or duration_ms < settings.slow_query_threshold_ms:
+            return
+        self._record(event.command_name, command, duration_ms, docs_returned(event.reply))
+    
+    def failed(self, event):
+        self._pending().pop(event.request_id, None)
+    
+    def _record(self, command_name: str, command: dict, duration_ms: float, docs: int) -> None:
+        collection = command_collection(command_name, command)
+        shape = json.dumps(redact_shape(command_filter(command_name, command)), sort_keys=True, default=str)
+        route = current_route()
+        request_id = current_request_id.get()
+        logger.warning(
+            f"Slow query {duration_ms:.1f} ms: {collection}.{command_name} shape={shape} "
+            f"docs={docs} route={route} request_id={request_id}"
+        )
+        
+        key = (collection, command_name, shape)
+        with self._lock:
+            entry = self._shapes.get(key)
+            if entry is None:
+                if len(self._shapes) >= settings.slow_query_max_shapes:
+                    # Make room by forgetting the least costly shape
+                    del self._shapes[min(self._shapes, key=lambda k: self._shapes[k]["total_ms"])]
+                entry = self._shapes[key] = {
+                    "collection": collection,
+                    "command": command_name,
+                    "shape": shape,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "docs_returned": 0,
+                    "routes": {}
+                }
+            entry["count"] += 1
+            entry["total_ms"] += duration_ms
+            entry["max_ms"] = max(entry["max_ms"], duration_ms)
+            entry["docs_returned"] += docs
+            if route:
+                entry["routes"][route] = entry["routes"].get(route, 0) + 1
+    
+    def worst_shapes(self, top: int) -> List[dict]:
+        """Slow query shapes ordered by total time spent"""
+        with self._lock:
+            entries = [
+                {**entry, "routes": dict(entry["routes"])}
+                for entry in self._shapes.values()
+            ]
+        entries.sort(key=lambda e: e["total_ms"], reverse=True)
+        for entry in entries:
+            entry["avg_ms"] = round(entry["total_ms"] / entry["count"], 2)
+            entry["total_ms"] = round(entry["total_ms"], 2)
+            entry["max_ms"] = round(entry["max_ms"], 2)
+        return entries[:top]
+    
+    def reset(self) -> None:
+        with self._lock:
+            self._shapes.clear()
+
+slow_query_log = SlowQueryLog()
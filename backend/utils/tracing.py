@@ -0,0 +1,207 @@
+from pymongo import monitoring
+from contextvars import ContextVar
+from contextlib import contextmanager
+from collections import deque
+from datetime import datetime, timezone
+from config.settings import settings
+from utils.metrics import command_collection
+from typing import List, Optional
+import asyncio
+import functools
+import itertools
+import json
+import queue
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Trace:
+    """Spans of one request; appended to from the loop and executor threads"""
+    __slots__ = ("trace_id", "started", "started_at", "spans")
+    
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.started = time.perf_counter()
+        self.started_at = datetime.now(timezone.utc)
+        self.spans: List[dict] = []
+    
+    def add(self, span_id: int, parent_id: Optional[int], name: str, start: float, end: float,
+            attrs: Optional[dict] = None) -> None:
+        self.spans.append({
+            "span_id": span_id,
+            "parent_id": parent_id,
+            "name": name,
+            "start_ms": round((start - self.started) * 1000, 3),
+            "duration_ms": round((end - start) * 1000, 3),
+            **({"attrs": attrs} if attrs else {})
+        })
+
+current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+current_span_id: ContextVar[Optional[int]] = ContextVar("current_span_id", default=None)
+_span_ids = itertools.count(1)
+
+@contextmanager
+def span(name: str, **attrs):
+    """Record a nested span in the current trace; a no-op outside traced requests"""
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    span_id = next(_span_ids)
+    parent_id = current_span_id.get()
+    token = current_span_id.set(span_id)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        current_span_id.reset(token)
+        trace.add(span_id, parent_id, name, start, time.perf_counter(), attrs)
+
+def traced(fn=None, *, name: Optional[str] = None):
+    """Decorator wrapping a function (sync or async) in a span named after its qualified name"""
+    def decorate(f):
+        span_name = name or f.__qualname__
+        
+        if asyncio.iscoroutinefunction(f):
+            @functools.wraps(f)
+            async def async_wrapper(*args, **kwargs):
+                if current_trace.get() is None:
+                    return await f(*args, **kwargs)
+                with span(span_name):
+                    return await f(*args, **kwargs)
+            return async_wrapper
+        
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            if current_trace.get() is None:
+                return f(*args, **kwargs)
+            with span(span_name):
+                return f(*args, **kwargs)
+        return wrapper
+    
+    return decorate(fn) if fn is not None else decorate
+
+class TracingCommandListener(monitoring.CommandListener):
+    """Adds a leaf span per Mongo command under whatever span issued it"""
+    
+    def __init__(self):
+        self._local = threading.local()
+    
+    def _pending(self) -> dict:
+        pending = getattr(self._local, "pending", None)
+        if pending is None:
+            pending = self._local.pending = {}
+        return pending
+    
+    def started(self, event):
+        trace = current_trace.get()
+        if trace is None:
+            return
+        collection = command_collection(event.command_name, event.command)
+        self._pending()[event.request_id] = (trace, current_span_id.get(), time.perf_counter(), collection)
+    
+    def _finish(self, event, failed: bool):
+        pending = self._pending().pop(event.request_id, None)
+        if pending is None:
+            return
+        trace, parent_id, start, collection = pending
+        attrs = {"collection": collection}
+        if failed:
+            attrs["failed"] = True
+        trace.add(next(_span_ids), parent_id, f"mongo.{event.command_name}", start,
+                  start + event.duration_micros / 1_000_000, attrs)
+    
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+    
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+tracing_command_listener = TracingCommandListener()
+
+class TraceExporter:
+    """
+    Keeps finished traces in a ring buffer and optionally appends them to a JSON-lines file.
+    File writes happen on a background thread so exporting never blocks the event loop.
+    """
+    buffer: deque = deque(maxlen=settings.tracing_buffer_size)
+    lock = threading.Lock()
+    pending: "queue.Queue[Optional[dict]]" = queue.Queue(maxsize=settings.tracing_file_queue_size)
+    writer: Optional[threading.Thread] = None
+    dropped = 0
+    
+    @classmethod
+    def export(cls, trace: Trace, method: str, route: str, status: int) -> None:
+        record = {
+            "trace_id": trace.trace_id,
+            "method": method,
+            "route": route,
+            "status": status,
+            "started_at": trace.started_at.isoformat(),
+            "duration_ms": round((time.perf_counter() - trace.started) * 1000, 3),
+            "db_calls": sum(1 for s in trace.spans if s["name"].startswith("mongo.")),
+            "spans": sorted(trace.spans, key=lambda s: s["start_ms"])
+        }
+        with cls.lock:
+            cls.buffer.append(record)
+            if settings.tracing_mode != "file":
+                return
+            if cls.writer is None:
+                cls.writer = threading.Thread(target=cls._write_loop, name="trace-writer", daemon=True)
+                cls.writer.start()
+        try:
+            cls.pending.put_nowait(record)
+        except queue.Full:
+            # Drop rather than stall requests when the disk cannot keep up
+            with cls.lock:
+                cls.dropped += 1
+    
+    @classmethod
+    def _write_loop(cls) -> None:
+        while True:
+            batch = [cls.pending.get()]
+            while len(batch) < 100:
+                try:
+                    batch.append(cls.pending.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in batch
+            records = [r for r in batch if r is not None]
+            if records:
+                try:
+                    with open(settings.tracing_file_path, "a") as f:
+                        f.writelines(json.dumps(r) + "\n" for r in records)
+                except OSError as e:
+                    logger.error(f"Failed to export {len(records)} traces: {e}")
+            if stop:
+                return
+    
+    @classmethod
+    def close(cls, timeout: float = 5.0) -> None:
+        """Flush queued records to the file and stop the writer thread"""
+        with cls.lock:
+            writer, cls.writer = cls.writer, None
+        if writer is None:
+            return
+        cls.pending.put(None)
+        writer.join(timeout)
+    
+    @classmethod
+    def recent(cls, limit: int, route: Optional[str] = None) -> List[dict]:
+        """Most recent traces first, without their spans"""
+        with cls.lock:
+            records = list(cls.buffer)
+        records.reverse()
+        if route:
+            records = [r for r in records if r["route"] == route]
+        return [{k: v for k, v in r.items() if k != "spans"} for r in records[:limit]]
+    
+    @classmethod
+    def get(cls, trace_id: str) -> Optional[dict]:
+        with cls.lock:
+            for record in reversed(cls.buffer):
+                if record["trace_id"] == trace_id:
+                    return record
+        return None